@@ -11,17 +11,21 @@ from __future__ import annotations
 import argparse
 import asyncio
 import json
+import mmap
 import os
 import re
+import threading
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Literal, Optional, Sequence, TypedDict, cast
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Literal, Optional, Sequence, TypedDict, cast
 from dotenv import load_dotenv
 
+import orjson
+
 from langchain.agents import create_agent
 from langchain_core.callbacks import BaseCallbackHandler
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage, SystemMessage
 from langchain_core.tools import BaseTool
 from langchain_openai import ChatOpenAI
 from langchain_groq import ChatGroq
@@ -36,6 +40,9 @@ from json_repair import repair_json
 
 LOG_TIME_FORMAT = '%H:%M:%S'
 JSON_TOOL_NAME = "json"
+JSON_DUMP_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+PROJECT_SLUG_RE = re.compile(r"[^A-Za-z0-9._-]")
+INITIAL_ATTEMPT_LABEL = "초기 시도"
 
 load_dotenv()
 # ---------------------------------------------------------------------------
@@ -46,7 +53,7 @@ class Config:
     """Runtime configuration loaded from environment variables."""
 
     seed_path: Path = Path(os.getenv("SARIF_SEED_PATH", "./vulnshop_snippet_add_extract.json"))
-    batch_size: int = int(os.getenv("SARIF_BATCH_SIZE", "2"))
+    max_concurrent_classifications: int = int(os.getenv("SARIF_MAX_CONCURRENCY", "4"))
     mcp_url: str = os.getenv("MCP_SERVER_URL") or os.getenv("SARIF_MCP_URL", "http://localhost:8000/mcp") # http://localhost:8000/mcp, http://localhost:9121/mcp
     llm_provider: str = os.getenv("SARIF_LLM_PROVIDER", "openrouter").lower() # groq, openai, openrouter, anthropic
     model_name: str = os.getenv("SARIF_MODEL_NAME", "x-ai/grok-4.1-fast") 
@@ -75,8 +82,8 @@ class Config:
     max_classification_attempts: int = int(os.getenv("SARIF_MAX_CLASSIFICATION_ATTEMPTS", "2"))
 
     def validate(self) -> None:
-        if self.batch_size <= 0:
-            raise ValueError("SARIF_BATCH_SIZE must be greater than zero.")
+        if self.max_concurrent_classifications <= 0:
+            raise ValueError("SARIF_MAX_CONCURRENCY must be greater than zero.")
         if self.json_tool_mode not in {"auto", "on", "off"}:
             raise ValueError("SARIF_JSON_TOOL_MODE must be one of: auto, on, off")
         if self.include_tool_usage not in {"on", "off"}:
@@ -129,15 +136,21 @@ class PipelineResult(TypedDict):
 
 
 class GraphState(TypedDict, total=False):
-    queue: List[SeedFinding]
-    batch: List[SeedFinding]
-    batch_index: int
+    """Per-finding graph state; nodes return only the keys they change.
+
+    Stored results go straight to the run's `ResultLog`, so the state only
+    carries the finding in flight. `errors` is created per finding and nodes
+    append to it in place.
+    """
+
+    index: int
     finding: SeedFinding
     classification: ClassificationResult
-    classifications: List[ClassificationResult]
     errors: List[str]
-    report: Dict[str, Any]
-    reports: List[Dict[str, Any]]
+
+
+# Called by the classification node to start report generation in the background.
+ReportScheduler = Callable[[int, SeedFinding, ClassificationResult], None]
 
 
 # ---------------------------------------------------------------------------
@@ -222,28 +235,94 @@ REPORT_OUTPUT_PARSER = PydanticOutputParser(pydantic_object=ReportSchema)
 # ---------------------------------------------------------------------------
 # Utilities
 # ---------------------------------------------------------------------------
-def chunk_iterable(items: Sequence[SeedFinding], size: int) -> Iterable[Sequence[SeedFinding]]:
-    """Yield fixed-size chunks from `items`."""
-    for idx in range(0, len(items), size):
-        yield items[idx : idx + size]
-
-
 def log_progress(message: str) -> None:
     timestamp = datetime.now().strftime(LOG_TIME_FORMAT)
     print(f'[{timestamp}] {message}')
 
 
 def load_seed_file(path: Path) -> List[SeedFinding]:
-    """Load seed findings from disk."""
+    """Load seed findings from disk.
+
+    The file is memory-mapped and decoded with orjson so large SARIF dumps are
+    parsed straight from the page cache instead of an intermediate str copy.
+    """
     if not path.exists():
         raise FileNotFoundError(f"Seed file not found: {path}")
-    with path.open("r", encoding="utf-8") as fp:
-        data = json.load(fp)
+    with path.open("rb") as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            raise ValueError("Seed file must contain a list of findings.")
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            data = orjson.loads(view)
     if not isinstance(data, list):
         raise ValueError("Seed file must contain a list of findings.")
     return data  # type: ignore[return-value]
 
 
+def _dumps_indented(value: Any, indent: bytes) -> bytes:
+    """Serialise `value` with 2-space indentation nested under `indent`."""
+    return orjson.dumps(value, option=JSON_DUMP_OPTIONS).replace(b"\n", b"\n" + indent)
+
+
+def write_json_array(fp: BinaryIO, items: Iterable[Any], indent: bytes = b"") -> None:
+    """Stream `items` to binary `fp` as a JSON array, one element at a time."""
+    inner = indent + b"  "
+    fp.write(b"[")
+    empty = True
+    for item in items:
+        fp.write(b"\n" + inner if empty else b",\n" + inner)
+        fp.write(_dumps_indented(item, inner))
+        empty = False
+    fp.write(b"]" if empty else b"\n" + indent + b"]")
+
+
+def write_json_object(fp: BinaryIO, obj: Dict[str, Any]) -> None:
+    """Stream `obj` to binary `fp`, writing list values element by element."""
+    fp.write(b"{")
+    for idx, (key, value) in enumerate(obj.items()):
+        fp.write(b",\n  " if idx else b"\n  ")
+        fp.write(orjson.dumps(str(key)) + b": ")
+        if isinstance(value, list):
+            write_json_array(fp, value, indent=b"  ")
+        else:
+            fp.write(_dumps_indented(value, b"  "))
+    fp.write(b"\n}" if obj else b"}")
+
+
+class ResultLog:
+    """Append-only JSON-Lines log of per-finding results.
+
+    One line is written per stored finding, so results are persisted as they
+    arrive instead of accumulating in memory until the run ends.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.count = 0
+        self.report_count = 0
+        self._fp = path.open("wb")
+        # Sync graph nodes may run on executor threads.
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        line = orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+        with self._lock:
+            self._fp.write(line)
+            self._fp.flush()
+            if record.get("classification") is not None:
+                self.count += 1
+            self.report_count += len(record.get("reports") or [])
+
+    def close(self) -> None:
+        self._fp.close()
+
+    def read_records(self) -> List[Dict[str, Any]]:
+        """Read every record back, ordered by seed index."""
+        with self.path.open("rb") as fp:
+            records = [orjson.loads(line) for line in fp if line.strip()]
+        records.sort(key=lambda record: record.get("index", 0))
+        return records
+
+
 def make_json_safe(value: Any) -> Any:
     """Convert LangChain-specific objects into JSON-serialisable structures."""
     if isinstance(value, (str, int, float, bool)) or value is None:
@@ -474,6 +553,12 @@ def _parse_with_escape_repair(parser: PydanticOutputParser, text: str) -> BaseMo
     """Attempt structured parse with layered escape repairs."""
     text = _unwrap_tool_envelope(text)
     text = _strip_code_fences(text)
+    # Fast path: most responses are already clean JSON, so skip the repair passes.
+    try:
+        return parser.pydantic_object.model_validate(orjson.loads(text))
+    except Exception:
+        pass
+
     attempts = [text]
     escaped_backticks = _escape_quotes_in_backticks(text)
     if escaped_backticks != text:
@@ -537,12 +622,6 @@ def _coerce_line_range(value: Any) -> Optional[str]:
 
 
 
-def _append_error(state: GraphState, message: str) -> GraphState:
-    errors = list(state.get("errors") or [])
-    errors.append(message)
-    return {**state, "errors": errors}
-
-
 def _coerce_optional_str(value: Any, fallback: Any = None) -> Optional[str]:
     """Normalize various ID types to optional strings."""
     candidate = value if value not in (None, "") else fallback
@@ -551,86 +630,42 @@ def _coerce_optional_str(value: Any, fallback: Any = None) -> Optional[str]:
     return str(candidate)
 
 
-def build_select_batch_node(batch_size: int):
-    def node(state: GraphState) -> GraphState:
-        queue = list(state.get("queue") or [])
-        if not queue:
-            log_progress("처리할 시드가 없어 이번 배치는 종료됩니다.")
-            return {**state, "batch": [], "batch_index": 0, "finding": None}
-        batch = queue[:batch_size]
-        remaining = queue[batch_size:]
-        log_progress(f"시드 {len(batch)}건 배치 준비(잔여 {len(remaining)}건)")
-        return {
-            **state,
-            "queue": remaining,
-            "batch": batch,
-            "batch_index": 0,
-            "finding": None,
-        }
-
-    return node
-
-def build_load_finding_node():
+def build_store_results_node(result_log: ResultLog):
     def node(state: GraphState) -> GraphState:
-        batch = state.get("batch") or []
-        index = int(state.get("batch_index") or 0)
-        if index >= len(batch):
-            return {**state, "finding": None}
-        finding = batch[index]
-        log_progress(
-            f"분류 진행: 시드 {finding.get('id', 'unknown')} (배치 {index + 1}/{len(batch)})"
+        classification = state.get("classification")
+        result_log.append(
+            {
+                "index": state.get("index", 0),
+                "classification": cast(ClassificationResult, classification) if classification else None,
+                "reports": [],
+                "errors": state.get("errors") or [],
+            }
         )
-        next_state = dict(state)
-        next_state["batch_index"] = index + 1
-        next_state["finding"] = finding
-        return next_state
+        return {"classification": None}
 
     return node
 
-def route_batch(state: GraphState) -> str:
-    batch = state.get("batch") or []
-    return "process" if batch else "done"
-
 
-def route_finding(state: GraphState) -> str:
-    finding = state.get("finding")
-    return "process" if finding else "next_batch"
-
-
-def store_results_node(state: GraphState) -> GraphState:
-    classification = state.get("classification")
-    classifications = list(state.get("classifications") or [])
-    report = state.get("report")
-    reports = list(state.get("reports") or [])
-
-    if classification:
-        classifications.append(cast(ClassificationResult, classification))
-
-    if report and classification:
-        # Only store report when it matches the current true_positive classification
-        if (
-            str(report.get("id")) == str(classification.get("id"))
-            and classification.get("verdict") == "true_positive"
-        ):
-            reports.append(report)
-    elif report:
-        # If classification is missing, ignore stray report
-        log_progress("분류 없이 전달된 리포트가 있어 무시합니다.")
-    if report and not reports:
+def store_report(
+    result_log: ResultLog,
+    index: int,
+    classification: ClassificationResult,
+    report: Dict[str, Any],
+) -> None:
+    """Record a finished report alongside its seed index."""
+    reports: List[Dict[str, Any]] = []
+    # Only store report when it matches the current true_positive classification
+    if (
+        str(report.get("id")) == str(classification.get("id"))
+        and classification.get("verdict") == "true_positive"
+    ):
+        reports.append(report)
+    elif not result_log.report_count:
         # If the report was ignored due to mismatch, make it clear in logs
         log_progress("리포트가 분류와 매칭되지 않아 저장하지 않습니다.")
         reports.append(report)
-
-    updated = dict(state)
-    updated["classifications"] = classifications
-    updated["reports"] = reports
-    updated.pop("classification", None)
-    updated.pop("report", None)
-    error_count = len(updated.get("errors") or [])
-    log_progress(
-        f"진행 상황: 분류 {len(classifications)}건, 오류 {error_count}건"
-    )
-    return updated
+    if reports:
+        result_log.append({"index": index, "classification": None, "reports": reports, "errors": []})
 
 
 def _stringify_content(content: Any) -> str:
@@ -669,6 +704,7 @@ def _unwrap_tool_envelope(text: str) -> str:
 
 
 def _extract_json_tool_payload(records: Sequence[Dict[str, Any]]) -> Optional[str]:
+    """Return the newest usable JSON-tool payload (see `ToolCallLogger.json_records`)."""
     for record in reversed(records):
         if record.get("tool") != JSON_TOOL_NAME:
             continue
@@ -728,6 +764,8 @@ class ToolCallLogger(BaseCallbackHandler):
     def __init__(self, *, stage: str = "") -> None:
         self._active: Dict[str, Dict[str, Any]] = {}
         self.records: List[Dict[str, Any]] = []
+        # JSON pass-through calls only, so payload extraction skips MCP records
+        self.json_records: List[Dict[str, Any]] = []
         self._stage = stage
 
     def on_tool_start(
@@ -756,6 +794,8 @@ class ToolCallLogger(BaseCallbackHandler):
         if self._stage:
             entry["stage"] = self._stage
         self.records.append(entry)
+        if entry["tool"] == JSON_TOOL_NAME:
+            self.json_records.append(entry)
 
     def usage_by_tool(self) -> Dict[str, List[Dict[str, Any]]]:
         grouped: Dict[str, List[Dict[str, Any]]] = {}
@@ -868,6 +908,16 @@ PRIMARY_SYSTEM_PROMPT = PRIMARY_SYSTEM_PROMPT_TEMPLATE.format(
 # ---------------------------------------------------------------------------
 # Prompt helpers
 # ---------------------------------------------------------------------------
+SNIPPET_KEYS = ("code_snippet", "note", "label")
+SOURCE_NOTE_KEYS = ("note", "code_snippet", "label")
+REPORT_SNIPPET_KEYS = ("code_snippet", "note")
+
+
+def _first_nonempty(entry: Dict[str, Any], keys: Sequence[str] = SNIPPET_KEYS) -> Any:
+    """Return the first truthy value of `keys` in `entry`, or an empty string."""
+    return next(filter(None, map(entry.get, keys)), "")
+
+
 def render_finding_for_prompt(finding: SeedFinding) -> str:
     """Convert the structured seed finding into a readable prompt snippet."""
     sink = finding.get("sink") or finding.get("vulnerable_sink") or {}
@@ -900,28 +950,25 @@ def render_finding_for_prompt(finding: SeedFinding) -> str:
     if sources:
         parts.append("Potential sources:")
         for source in sources:
-            line_range = source.get("line_range")
-            line_value = (
-                fmt_line_range(line_range)
-                if line_range
-                else source.get("line") or "N/A"
-            )
-            note = source.get("note") or source.get("code_snippet") or source.get("label") or ""
-            parts.append(
-                f"  - id={source.get('id', '?')} file={source.get('file_path', 'N/A')} "
-                f"lines={line_value} note={note}"
-            )
+            get = source.get
+            line_range = get("line_range")
+            line_value = fmt_line_range(line_range) if line_range else get("line") or "N/A"
+            note = _first_nonempty(source, SOURCE_NOTE_KEYS)
+            source_id = get("id", "?")
+            file_path = get("file_path", "N/A")
+            parts.append(f"  - id={source_id} file={file_path} lines={line_value} note={note}")
 
     # Normalise taint flows: parser may return list of lists or flat list
-    def iter_flows(raw: Any) -> Iterable[Sequence[Dict[str, Any]]]:
-        if isinstance(raw, list):
-            for item in raw:
-                if isinstance(item, list):
-                    yield [step for step in item if isinstance(step, dict)]
-                elif isinstance(item, dict):
-                    yield [item]
-
-    flattened_flows = list(flow for flow in iter_flows(taint_flows) if flow)
+    flattened_flows = (
+        [
+            flow
+            for item in taint_flows
+            if isinstance(item, (list, dict))
+            and (flow := [step for step in item if isinstance(step, dict)] if isinstance(item, list) else [item])
+        ]
+        if isinstance(taint_flows, list)
+        else []
+    )
     if flattened_flows:
         parts.append("Taint flow steps:")
         multiple_paths = len(flattened_flows) > 1
@@ -929,12 +976,12 @@ def render_finding_for_prompt(finding: SeedFinding) -> str:
             if multiple_paths:
                 parts.append(f"  Path {path_idx}:")
             for step in flow:
-                snippet = step.get("code_snippet") or step.get("note") or step.get("label") or ""
-                parts.append(
-                    f"    - step={step.get('step', '?')} "
-                    f"{step.get('file_path', 'N/A')}:{step.get('line', 'N/A')} "
-                    f"{snippet}"
-                )
+                get = step.get
+                snippet = _first_nonempty(step)
+                step_no = get("step", "?")
+                file_path = get("file_path", "N/A")
+                line = get("line", "N/A")
+                parts.append(f"    - step={step_no} {file_path}:{line} {snippet}")
 
     return "\n".join(parts)
 
@@ -961,57 +1008,57 @@ def _summarise_taint_flow(finding: SeedFinding) -> Dict[str, Any]:
             if isinstance(first, dict):
                 source_node = first
     propagation_nodes = first_path[1:] if len(first_path) > 1 else []
+    sink = finding.get("sink") or None
 
     return {
         "source": source_node or None,
         "propagation": propagation_nodes or None,
-        "sink": finding.get("sink") or None,
+        "sink": sink,
     }
 
 
-def _build_report_prompt(finding: SeedFinding, classification: ClassificationResult) -> str:
+def _build_report_prompt(
+    finding: SeedFinding,
+    classification: ClassificationResult,
+    taint_summary: Dict[str, Any],
+    sink_line_number: Any,
+) -> str:
     sink = finding.get("sink") or {}
-    location = {
-        "file_path": sink.get("file_path", ""),
-        "line_number": _coerce_line_range(sink.get("line_range")) or "",
-    }
-
-    taint_summary = _summarise_taint_flow(finding)
     source = taint_summary.get("source")
     source_lines = ""
     if source:
-        source_lines = (
-            f"{source.get('file_path', '')}:{source.get('line', '')} "
-            f"{source.get('code_snippet', '') or source.get('note', '') or ''}"
-        )
-    propagation = taint_summary.get("propagation") or []
-    propagation_lines = [
-        f"{item.get('file_path', '')}:{item.get('line', '')} "
-        f"{item.get('code_snippet', '') or item.get('note', '') or ''}"
-        for item in propagation
-    ]
-
-    sink_line = f"{sink.get('file_path', '')}:{_coerce_line_range(sink.get('line_range')) or ''}"
+        get = source.get
+        snippet = _first_nonempty(source, REPORT_SNIPPET_KEYS)
+        source_lines = f"{get('file_path', '')}:{get('line', '')} {snippet}"
+    propagation_lines: List[str] = []
+    for item in taint_summary.get("propagation") or []:
+        get = item.get
+        snippet = _first_nonempty(item, REPORT_SNIPPET_KEYS)
+        propagation_lines.append(f"{get('file_path', '')}:{get('line', '')} {snippet}")
+
+    sink_path = sink.get("file_path", "")
+    sink_line = f"{sink_path}:{sink_line_number}"
     desc_raw = classification.get("details", "")
     if isinstance(desc_raw, str):
         description = desc_raw
     else:
         try:
-            description = json.dumps(desc_raw, ensure_ascii=False)
-        except Exception:
+            description = orjson.dumps(desc_raw, option=orjson.OPT_NON_STR_KEYS).decode()
+        except orjson.JSONEncodeError:
             description = str(desc_raw)
 
-    return "\n".join(
-        [
-            f"ID: {finding.get('id', '')}",
-            f"Vulnerability info: {finding.get('vulnerability_info', '')}",
-            f"Location (sink): {sink_line}",
-            f"Source (from taint flow if any): {source_lines or 'N/A'}",
-            "Propagation (sampled from taint flow):",
-            *(propagation_lines or ["N/A"]),
-            f"Classification details: {description}",
-            "Task: Produce a concise vulnerability report JSON with the requested fields.",
-        ]
+    finding_id = finding.get("id", "")
+    vulnerability_info = finding.get("vulnerability_info", "")
+    propagation_text = "\n".join(propagation_lines) if propagation_lines else "N/A"
+    return (
+        f"ID: {finding_id}\n"
+        f"Vulnerability info: {vulnerability_info}\n"
+        f"Location (sink): {sink_line}\n"
+        f"Source (from taint flow if any): {source_lines or 'N/A'}\n"
+        "Propagation (sampled from taint flow):\n"
+        f"{propagation_text}\n"
+        f"Classification details: {description}\n"
+        "Task: Produce a concise vulnerability report JSON with the requested fields."
     )
 
 
@@ -1036,23 +1083,32 @@ REPORT_SYSTEM_PROMPT_TEMPLATE = (
 # ---------------------------------------------------------------------------
 # Core processing
 # ---------------------------------------------------------------------------
-def build_classification_node(agent: Any, report_agent: Any):
+def build_finding_workflow(agent: Any, schedule_report: ReportScheduler, result_log: ResultLog):
+    """Compile the per-finding graph: classify -> store_results."""
+    graph = StateGraph(GraphState)
+    graph.add_node("classify", build_classification_node(agent, schedule_report))
+    graph.add_node("store_results", build_store_results_node(result_log))
+
+    graph.set_entry_point("classify")
+    graph.add_edge("classify", "store_results")
+    graph.add_edge("store_results", END)
+    return graph.compile()
+
+
+def build_classification_node(agent: Any, schedule_report: ReportScheduler):
     async def node(state: GraphState) -> GraphState:
         finding = state["finding"]
-        message = HumanMessage(
-            content=(
-                "Classify the following finding:\n"
-                f"{render_finding_for_prompt(finding)}"
-            )
-        )
+        errors = state["errors"]
+        # Plain role/content dicts are coerced by the agent's message reducer.
+        message = {
+            "role": "user",
+            "content": f"Classify the following finding:\n{render_finding_for_prompt(finding)}",
+        }
 
         last_error: Optional[str] = None
         max_retries = CONFIG.max_classification_attempts
         for attempt in range(0, max_retries + 1):
-            is_retry = attempt > 0
-            retry_label = (
-                f"재시도 {attempt}/{max_retries}" if is_retry else "초기 시도"
-            )
+            retry_label = f"재시도 {attempt}/{max_retries}" if attempt else INITIAL_ATTEMPT_LABEL
             logger = ToolCallLogger(stage="classification")
             try:
                 raw = await agent.ainvoke({"messages": [message]}, config={"callbacks": [logger]})
@@ -1060,17 +1116,17 @@ def build_classification_node(agent: Any, report_agent: Any):
                 last_error = f"시드 {finding.get('id', 'unknown')} 분류 호출 실패 ({retry_label}): {exc}"
                 log_progress(last_error)
                 if attempt == max_retries:
-                    state = _append_error(state, last_error)
                     parsed = {
                         "id": _coerce_optional_str(None, finding.get("id")) or "",
                         "verdict": "error",
                         "details": "LLM 호출이 실패했습니다.",
                         "notes": {"error": str(exc)},
                     }
-                    return {**state, "classification": parsed}
+                    errors.append(last_error)
+                    return {"classification": parsed}
                 continue
 
-            json_payload = _extract_json_tool_payload(logger.records)
+            json_payload = _extract_json_tool_payload(logger.json_records)
             output_text = json_payload or extract_agent_output(raw)
 
             if not output_text:
@@ -1080,14 +1136,14 @@ def build_classification_node(agent: Any, report_agent: Any):
                 )
                 log_progress(last_error)
                 if attempt == max_retries:
-                    state = _append_error(state, last_error)
                     parsed = {
                         "id": _coerce_optional_str(None, finding.get("id")) or "",
                         "verdict": "error",
                         "details": "LLM 응답이 비어 있어 분류를 수행하지 못했습니다.",
                         "notes": {"raw_output": output_text},
                     }
-                    return {**state, "classification": parsed}
+                    errors.append(last_error)
+                    return {"classification": parsed}
                 continue
 
             try:
@@ -1100,14 +1156,14 @@ def build_classification_node(agent: Any, report_agent: Any):
                 )
                 log_progress(last_error)
                 if attempt == max_retries:
-                    state = _append_error(state, last_error)
                     parsed = {
                         "id": _coerce_optional_str(None, finding.get("id")) or "",
                         "verdict": "error",
                         "details": "LLM JSON 파싱이 실패했습니다.",
                         "notes": {"error": str(exc), "raw_output": output_text},
                     }
-                    return {**state, "classification": parsed}
+                    errors.append(last_error)
+                    return {"classification": parsed}
                 continue
 
             coerced_id = _coerce_optional_str(parsed.get("id"), finding.get("id"))
@@ -1118,18 +1174,14 @@ def build_classification_node(agent: Any, report_agent: Any):
                 parsed.setdefault("tool_usage", {})
                 parsed["tool_usage"].update(logger.usage_by_tool())
 
-            report: Optional[Dict[str, Any]] = None
             if parsed.get("verdict") == "true_positive":
                 log_progress(f"리포트 생성 시작: 시드 {coerced_id}")
-                report = await generate_report(report_agent, finding, parsed)
+                schedule_report(state.get("index", 0), finding, parsed)
 
             log_progress(
                 f"분류 완료: 시드 {coerced_id} → {parsed.get('verdict', 'unknown')}"
             )
-            next_state = {**state, "classification": parsed}
-            if report is not None:
-                next_state["report"] = report
-            return next_state
+            return {"classification": parsed}
 
         # Should not reach here due to returns in loop, but keep fallback.
         fallback = {
@@ -1138,8 +1190,8 @@ def build_classification_node(agent: Any, report_agent: Any):
             "details": "LLM 호출이 반복적으로 실패했습니다.",
             "notes": {"error": last_error or "unknown"},
         }
-        state = _append_error(state, fallback["details"])
-        return {**state, "classification": fallback}
+        errors.append(fallback["details"])
+        return {"classification": fallback}
 
     return node
 
@@ -1150,16 +1202,18 @@ async def generate_report(
     classification: ClassificationResult,
 ) -> Dict[str, Any]:
     """Call report agent (with MCP tools) to build a structured report for a true_positive finding."""
-    prompt_text = _build_report_prompt(finding, classification)
-    messages = [
-        HumanMessage(content=prompt_text),
-    ]
+    # Summarised once per report and shared by the prompt and the defaults below
+    taint_summary = _summarise_taint_flow(finding)
+    sink = finding.get("sink") or {}
+    sink_line_number = _coerce_line_range(sink.get("line_range")) or ""
+    prompt_text = _build_report_prompt(finding, classification, taint_summary, sink_line_number)
+    messages = [{"role": "user", "content": prompt_text}]
     logger = ToolCallLogger(stage="report")
     model_dict: Dict[str, Any]
     last_error: Exception | None = None
     try:
         raw = await report_agent.ainvoke({"messages": messages}, config={"callbacks": [logger]})
-        json_payload = _extract_json_tool_payload(logger.records)
+        json_payload = _extract_json_tool_payload(logger.json_records)
         output_text = json_payload or extract_agent_output(raw)
         coerced = _coerce_report_payload(output_text)
         if coerced is not None:
@@ -1173,29 +1227,31 @@ async def generate_report(
         model_dict = {}
 
     # Fill defaults and guaranteed fields
-    taint_summary = _summarise_taint_flow(finding)
     sink_fallback = finding.get("sink") or {}
 
     def _node_from_entry(entry: Any) -> Optional[Dict[str, Any]]:
         if not isinstance(entry, dict):
             return None
-        line_number = _coerce_line_range(entry.get("line_range")) or entry.get("line")
+        get = entry.get
+        file_path = get("file_path", "")
+        line_number = _coerce_line_range(get("line_range")) or get("line")
+        code_snippet = get("code_snippet")
+        note = get("note")
         node: Dict[str, Any] = {
-            "file_path": entry.get("file_path", ""),
+            "file_path": file_path,
             "line_number": line_number or "",
         }
-        if entry.get("code_snippet"):
-            node["code_snippet"] = entry.get("code_snippet")
-        if entry.get("note"):
-            node["explanation"] = entry.get("note")
+        if code_snippet:
+            node["code_snippet"] = code_snippet
+        if note:
+            node["explanation"] = note
         return node
 
-    sink = finding.get("sink") or {}
     location = model_dict.get("location") or {}
     if not isinstance(location, dict):
         location = {}
     location.setdefault("file_path", sink.get("file_path", ""))
-    location.setdefault("line_number", _coerce_line_range(sink.get("line_range")) or "")
+    location.setdefault("line_number", sink_line_number)
     model_dict["location"] = location
 
     # Provide default taint_flow_analysis from seed (including code_snippet) if missing
@@ -1275,10 +1331,16 @@ def maybe_enable_langsmith(disabled: bool):
 
 
 async def run_pipeline() -> PipelineResult:
-    """Entry point that wires MCP tools, agents, and batch processing together."""
+    """Entry point that wires MCP tools, agents, and concurrent classification together."""
     seeds = load_seed_file(CONFIG.seed_path)
     llm = build_llm()
-    project_slug = re.sub(r"[^A-Za-z0-9._-]", "_", CONFIG.project_title or "project")
+    project_slug = PROJECT_SLUG_RE.sub("_", CONFIG.project_title or "project")
+
+    analysis_dir = Path("results")
+    analysis_dir.mkdir(parents=True, exist_ok=True)
+    analysis_path = analysis_dir / f"{project_slug}_latest.json"
+    report_path = analysis_dir / f"{project_slug}_report_latest.json"
+    result_log = ResultLog(analysis_path.with_suffix(".jsonl"))
 
     connection = {"transport": "streamable_http", "url": CONFIG.mcp_url}
     async with create_session(connection) as session:
@@ -1294,41 +1356,45 @@ async def run_pipeline() -> PipelineResult:
             format_instructions=REPORT_OUTPUT_PARSER.get_format_instructions()
         ))
 
-        graph = StateGraph(GraphState)
-        graph.add_node("select_batch", build_select_batch_node(CONFIG.batch_size))
-        graph.add_node("load_finding", build_load_finding_node())
-        graph.add_node("classify", build_classification_node(primary_agent, report_agent))
-        graph.add_node("store_results", store_results_node)
-
-        graph.set_entry_point("select_batch")
-        graph.add_conditional_edges("select_batch", route_batch, {"process": "load_finding", "done": END})
-        graph.add_conditional_edges("load_finding", route_finding, {"process": "classify", "next_batch": "select_batch"})
-        graph.add_edge("classify", "store_results")
-        graph.add_edge("store_results", "load_finding")
-
-        workflow = graph.compile()
-
-        initial_state: GraphState = {
-            "queue": list(seeds),
-            "batch": [],
-            "batch_index": 0,
-            "classifications": [],
-            "reports": [],
-            "errors": [],
-        }
+        semaphore = asyncio.Semaphore(CONFIG.max_concurrent_classifications)
+        total = len(seeds)
+        pending_reports: List[asyncio.Task[None]] = []
 
-        final_state: GraphState = await workflow.ainvoke(
-            initial_state, config={"recursion_limit": max(1000, len(seeds) * 10)}
-        )
+        async def report_seed(index: int, finding: SeedFinding, classification: ClassificationResult) -> None:
+            async with semaphore:
+                report = await generate_report(report_agent, finding, classification)
+            store_report(result_log, index, classification, report)
 
-    all_classifications = list(final_state.get("classifications") or [])
-    all_reports = list(final_state.get("reports") or [])
-    errors_list = list(final_state.get("errors") or [])
+        def schedule_report(index: int, finding: SeedFinding, classification: ClassificationResult) -> None:
+            # Reports overlap with the classification of later findings.
+            pending_reports.append(asyncio.create_task(report_seed(index, finding, classification)))
 
-    analysis_dir = Path("results")
-    analysis_dir.mkdir(parents=True, exist_ok=True)
-    analysis_path = analysis_dir / f"{project_slug}_latest.json"
-    report_path = analysis_dir / f"{project_slug}_report_latest.json"
+        workflow = build_finding_workflow(primary_agent, schedule_report, result_log)
+
+        async def classify_seed(index: int, finding: SeedFinding) -> None:
+            async with semaphore:
+                log_progress(f"분류 진행: 시드 {finding.get('id', 'unknown')} ({index + 1}/{total})")
+                initial_state: GraphState = {"index": index, "finding": finding, "errors": []}
+                await workflow.ainvoke(initial_state)
+            log_progress(f"진행 상황: {result_log.count}/{total}건 완료")
+
+        try:
+            await asyncio.gather(
+                *(classify_seed(index, finding) for index, finding in enumerate(seeds))
+            )
+            await asyncio.gather(*pending_reports)
+        finally:
+            result_log.close()
+
+    # Coalesce the incremental log (sorted by seed index) into the final files.
+    all_classifications: List[ClassificationResult] = []
+    all_reports: List[Dict[str, Any]] = []
+    errors_list: List[str] = []
+    for record in result_log.read_records():
+        if record.get("classification"):
+            all_classifications.append(record["classification"])
+        all_reports.extend(record.get("reports") or [])
+        errors_list.extend(record.get("errors") or [])
 
     verdict_counts: Dict[str, int] = {'true_positive': 0, 'false_positive': 0, 'error': 0, 'other': 0}
     for item in all_classifications:
@@ -1356,10 +1422,10 @@ async def run_pipeline() -> PipelineResult:
         },
     }
 
-    with analysis_path.open("w", encoding="utf-8") as fp:
-        json.dump(result, fp, ensure_ascii=False, indent=2)
-    with report_path.open("w", encoding="utf-8") as fp:
-        json.dump(all_reports, fp, ensure_ascii=False, indent=2)
+    with analysis_path.open("wb") as fp:
+        write_json_object(fp, result)
+    with report_path.open("wb") as fp:
+        write_json_array(fp, all_reports)
 
     log_progress(f"총 {len(all_classifications)}건 분류 결과 정리")
     log_progress(f"분석 결과 저장: {analysis_path}")
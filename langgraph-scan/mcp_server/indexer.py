@@ -5,25 +5,47 @@ ctags 인덱스 및 ripgrep 검색 기능 구현
 
 from __future__ import annotations
 
-import json
+import hashlib
 import logging
+import mmap
 import os
 import re
 import subprocess
 import sys
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import astuple, dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
 
 from config import (
-    REPO_ROOT, CTAGS_BIN, RG_BIN,
+    REPO_ROOT, REPO_REV, CTAGS_BIN, CTAGS_WORKERS, INDEX_CACHE_DIR, RG_BIN,
     DEFAULT_MAX_RESULTS, HARD_MAX_RESULTS,
-    USE_TREE_SITTER, TREE_SITTER_MAX_FUNC_LINES,
-    EXCLUDE_GLOBS, is_allowed_path, has_allowed_ext
+    USE_TREE_SITTER, TREE_SITTER_MAX_FUNC_LINES, USE_REF_INDEX,
+    EXCLUDE_GLOBS, is_allowed_path, has_allowed_ext,
+    repo_realpath, is_in_repo, repo_relpath
 )
 
 # ---------------- ctags index ----------------
 
+CTAGS_BASE_ARGS: List[str] = [
+    CTAGS_BIN,
+    # Tab-separated output; every extension field as key:value (z/Z), address as line number
+    "--output-format=u-ctags",
+    "--excmd=number",
+    "--fields=+nKSlzZ",
+    # Narrow languages for speed & precision
+    "--languages=+Python,+JavaScript,+TypeScript,+Java,+Kotlin",
+    # Extension maps
+    "--map-JavaScript=+.js", "--map-JavaScript=+.jsx", "--map-JavaScript=+.mjs",
+    "--map-TypeScript=+.ts", "--map-TypeScript=+.tsx",
+    "--map-Kotlin=+.kt", "--map-Kotlin=+.kts",
+    "-f", "-",
+]
+
 @dataclass
 class DefinitionEntry:
     """ctags에서 찾은 심볼 정의 정보"""
@@ -41,62 +63,102 @@ class CTagsIndex:
         """레포지토리 루트로 인덱스 초기화"""
         self.repo_root = repo_root
         self._by_symbol: Dict[str, List[DefinitionEntry]] = {}
+        self.references: ReferenceIndex | None = None
 
-    def build(self) -> None:
-        """Python/JS/TS/Java/Kotlin 언어에 대해 ctags 인덱스 빌드"""
-        cmd = [
-            CTAGS_BIN,
-            "-R",
-            "--fields=+n+K+S+language",
-            "--output-format=json",
-            # Narrow languages for speed & precision
-            "--languages=+Python,+JavaScript,+TypeScript,+Java,+Kotlin",
-            # Extension maps
-            "--map-JavaScript=+.js", "--map-JavaScript=+.jsx", "--map-JavaScript=+.mjs",
-            "--map-TypeScript=+.ts", "--map-TypeScript=+.tsx",
-            "--map-Kotlin=+.kt", "--map-Kotlin=+.kts",
-            "-f", "-",
-            str(self.repo_root)
-        ]
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=self.repo_root)
-        if not proc.stdout:
-            logging.error("Failed to run ctags (no stdout). Is universal-ctags installed?")
-            raise RuntimeError("Failed to run ctags (no stdout). Is universal-ctags installed?")
+    def build(self, use_cache: bool = False) -> None:
+        """Python/JS/TS/Java/Kotlin 언어에 대해 ctags 인덱스 빌드
+
+        ripgrep으로 파일 목록을 만든 뒤 CPU 코어 수만큼 나눠 ctags 프로세스를
+        병렬 실행하고 결과를 병합. ripgrep이 없으면 단일 `ctags -R`로 대체.
+        use_cache면 (HEAD, 파일 수, 최신 mtime)이 같은 디스크 캐시가 있을 때 ctags를 생략.
+        빌드 결과는 항상 캐시에 기록.
+        """
+        try:
+            files = self._list_files()
+        except (OSError, RuntimeError) as e:
+            logging.warning(f"File listing via ripgrep failed, falling back to ctags -R: {e}")
+            self._by_symbol = _run_ctags(["-R", str(self.repo_root)], None, self.repo_root)
+            self.references = None
+            return
+        self.references = None
+        if not files:
+            self._by_symbol = {}
+            return
+
+        cache_path = self._cache_path(files)
+        if use_cache and cache_path and self._load_cache(cache_path):
+            # 캐시 적중 시 전체 파일을 다시 읽지 않음 (find_references는 ripgrep 사용)
+            logging.info(f"Loaded ctags index from cache {cache_path}")
+            return
+        if USE_REF_INDEX:
+            self.references = ReferenceIndex.from_files(files)
+
+        workers = CTAGS_WORKERS or os.cpu_count() or 1
+        workers = max(1, min(workers, len(files)))
+        buckets = [files[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(lambda bucket: _run_ctags(["-L", "-"], bucket, self.repo_root), buckets))
 
         by_symbol: Dict[str, List[DefinitionEntry]] = {}
-        for line in proc.stdout:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            if obj.get("_type") != "tag" and obj.get("type") != "tag":
-                continue
-            name = obj.get("name")
-            path = obj.get("path")
-            fields = obj.get("fields", {})
-            lang = fields.get("language") or obj.get("language")
-            kind = obj.get("kind") or fields.get("kind")
-            line_no = obj.get("line") or fields.get("line")
-            try:
-                line_no = int(line_no) if line_no is not None else None
-            except Exception:
-                line_no = None
-            sig = fields.get("signature")
-            scope = fields.get("scope") or fields.get("class") or fields.get("namespace")
-            if not name or not path or line_no is None:
-                continue
-            entry = DefinitionEntry(symbol=name, file=str(Path(path)), line=line_no, kind=kind, language=lang, signature=sig, scope=scope)
-            by_symbol.setdefault(name, []).append(entry)
-
-        stderr = proc.stderr.read() if proc.stderr else ""
-        code = proc.wait()
-        if code != 0:
-            logging.error(f"ctags exited with {code}: {stderr}")
-            raise RuntimeError(f"ctags exited with {code}: {stderr}")
+        for part in parts:
+            for name, entries in part.items():
+                by_symbol.setdefault(name, []).extend(entries)
         self._by_symbol = by_symbol
+        if cache_path:
+            self._save_cache(cache_path)
+
+    def _cache_path(self, files: List[str]) -> Optional[Path]:
+        """(HEAD, ctags 인자, 정렬된 파일별 경로+mtime)으로 캐시 파일 경로 계산 (캐시 비활성화면 None)"""
+        if not INDEX_CACHE_DIR:
+            return None
+        # 파일 추가/삭제/이름 변경도 키에 반영되도록 경로와 mtime을 모두 해시
+        h = hashlib.sha1(repr((REPO_REV, CTAGS_BASE_ARGS)).encode("utf-8"))
+        for f in sorted(files):
+            try:
+                mtime = os.stat(f).st_mtime_ns
+            except OSError:
+                mtime = -1
+            h.update(f"{f}\0{mtime}\n".encode("utf-8", "surrogateescape"))
+        key = h.hexdigest()
+        repo_key = hashlib.sha1(str(self.repo_root).encode("utf-8")).hexdigest()[:16]
+        return Path(INDEX_CACHE_DIR) / f"{repo_key}-{key}.json"
+
+    def _load_cache(self, cache_path: Path) -> bool:
+        """디스크 캐시에서 심볼 인덱스 로드 (없거나 손상되면 False)"""
+        try:
+            raw = orjson.loads(cache_path.read_bytes())
+            self._by_symbol = {name: [DefinitionEntry(*row) for row in rows] for name, rows in raw.items()}
+        except (OSError, orjson.JSONDecodeError, TypeError, AttributeError) as e:
+            logging.debug(f"ctags cache unavailable ({cache_path}): {e}")
+            return False
+        return True
+
+    def _save_cache(self, cache_path: Path) -> None:
+        """심볼 인덱스를 디스크 캐시에 기록하고 같은 레포의 이전 캐시는 삭제"""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_suffix(".tmp")
+            tmp.write_bytes(orjson.dumps({name: [astuple(e) for e in entries] for name, entries in self._by_symbol.items()}))
+            os.replace(tmp, cache_path)
+            repo_key = cache_path.name.split("-", 1)[0]
+            for old in cache_path.parent.glob(f"{repo_key}-*.json"):
+                if old != cache_path:
+                    old.unlink(missing_ok=True)
+        except OSError as e:
+            logging.warning(f"Failed to write ctags cache {cache_path}: {e}")
+
+    def _list_files(self) -> List[str]:
+        """ripgrep으로 인덱싱 대상 파일 목록 수집 (EXCLUDE_GLOBS 적용)"""
+        # ctags -R처럼 .gitignore 대상/숨김 파일도 포함 (제외는 EXCLUDE_GLOBS로만)
+        cmd = [RG_BIN, "--files", "--no-ignore", "--hidden"]
+        for g in EXCLUDE_GLOBS:
+            cmd += ["--glob", g]
+        cmd.append(str(self.repo_root))
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=self.repo_root)
+        # rg exits 1 when no files match
+        if proc.returncode not in (0, 1):
+            raise RuntimeError(f"rg --files exited with {proc.returncode}: {proc.stderr}")
+        return [line for line in proc.stdout.splitlines() if line]
 
     def find_definitions(self, symbol: str, file: Optional[str] = None, language: Optional[str] = None) -> List[DefinitionEntry]:
         """심볼의 정의를 찾아 반환 (파일/언어 필터링 가능)"""
@@ -110,6 +172,126 @@ class CTagsIndex:
             return preferred
         return entries
 
+WORD_RE = re.compile(r"\w+")
+
+class ReferenceIndex:
+    """식별자 토큰 -> (파일 번호, 라인) 역색인 (단순 단어 검색을 ripgrep 없이 처리)
+
+    스니펫은 저장하지 않고 검색 시 파일에서 읽음 (메모리 절약, 현재 내용 반환)
+    """
+    def __init__(self) -> None:
+        """빈 역색인 생성"""
+        self._files: List[str] = []
+        # Keyed by lower-cased token so smart-case lookups can be served too
+        self._by_token: Dict[str, List[Tuple[int, int]]] = {}
+
+    @classmethod
+    def from_files(cls, files: Iterable[str]) -> "ReferenceIndex":
+        """파일 목록을 읽어 역색인 빌드 (허용 확장자/바이너리 아닌 파일만)"""
+        index = cls()
+        by_token = index._by_token
+        for f in files:
+            real = repo_realpath(f)
+            if not (is_in_repo(real) and has_allowed_ext(real)):
+                continue
+            try:
+                with open(real, "rb") as fp:
+                    data = fp.read()
+            except OSError:
+                continue
+            if b"\0" in data:
+                continue
+            file_id = len(index._files)
+            index._files.append(repo_relpath(real))
+            for line_no, text in enumerate(data.decode("utf-8", errors="ignore").split("\n"), 1):
+                for token in {t.lower() for t in WORD_RE.findall(text)}:
+                    by_token.setdefault(token, []).append((file_id, line_no))
+        return index
+
+    def find(self, word: str, search_root: Path, repo_root: Path, max_results: int) -> Tuple[List[Reference], int]:
+        """rg -w -S와 같은 규칙(소문자면 대소문자 무시)으로 단어 참조 검색"""
+        entries = self._by_token.get(word.lower(), [])
+        # 소문자 단어는 대소문자 무시, 그 외는 정확히 일치
+        flags = re.IGNORECASE if word == word.lower() else 0
+        pattern = re.compile(rf"(?<!\w){re.escape(word)}(?!\w)", flags)
+        root_rel = "" if search_root == repo_root else str(search_root.relative_to(repo_root))
+        prefix = root_rel + os.sep
+        refs: List[Reference] = []
+        lines_by_file: Dict[int, Optional[List[str]]] = {}
+        for file_id, line_no in entries:
+            rel = self._files[file_id]
+            if root_rel and not (rel == root_rel or rel.startswith(prefix)):
+                continue
+            if file_id not in lines_by_file:
+                try:
+                    data = (repo_root / rel).read_bytes()
+                    lines_by_file[file_id] = data.decode("utf-8", errors="ignore").split("\n")
+                except OSError:
+                    lines_by_file[file_id] = None
+            lines = lines_by_file[file_id]
+            if lines is None or line_no > len(lines):
+                continue
+            text = lines[line_no - 1]
+            # 색인 이후 파일이 바뀌었으면 해당 라인에 단어가 없을 수 있음
+            if not pattern.search(text):
+                continue
+            refs.append(Reference(file=rel, line=line_no, snippet=text))
+            if len(refs) >= max_results:
+                break
+        return refs, len(refs)
+
+def _run_ctags(args: List[str], files: Optional[List[str]], cwd: Path) -> Dict[str, List[DefinitionEntry]]:
+    """ctags 프로세스 하나를 실행하고 출력된 태그를 심볼별로 수집 (files는 stdin으로 전달)"""
+    try:
+        proc = subprocess.Popen(
+            CTAGS_BASE_ARGS + args,
+            stdin=subprocess.PIPE if files is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=cwd,
+        )
+    except OSError as e:
+        logging.error("Failed to run ctags. Is universal-ctags installed?")
+        raise RuntimeError("Failed to run ctags. Is universal-ctags installed?") from e
+    stdin_text = "\n".join(files) + "\n" if files is not None else None
+    stdout, stderr = proc.communicate(stdin_text)
+    if proc.returncode != 0:
+        logging.error(f"ctags exited with {proc.returncode}: {stderr}")
+        raise RuntimeError(f"ctags exited with {proc.returncode}: {stderr}")
+    return _parse_ctags_output(stdout.splitlines())
+
+def _parse_ctags_output(lines: Iterable[str]) -> Dict[str, List[DefinitionEntry]]:
+    """ctags 탭 구분 출력 라인을 심볼별 DefinitionEntry 목록으로 변환
+
+    형식: name<TAB>path<TAB>line;"<TAB>kind:...<TAB>line:...<TAB>language:...[<TAB>signature:...][<TAB>scope:kind:name]
+    """
+    by_symbol: Dict[str, List[DefinitionEntry]] = {}
+    for line in lines:
+        if not line or line.startswith("!_"):
+            continue
+        parts = line.rstrip("\r\n").split("\t")
+        if len(parts) < 4:
+            continue
+        name, path = parts[0], parts[1]
+        kind = lang = sig = scope = None
+        line_no = None
+        for field in parts[3:]:
+            key, _, value = field.partition(":")
+            if key == "line":
+                line_no = int(value) if value.isdigit() else None
+            elif key == "kind":
+                kind = value
+            elif key == "language":
+                lang = value
+            elif key == "signature":
+                sig = value
+            elif key == "scope":
+                # "class:Foo" -> "Foo"
+                scope = value.partition(":")[2] or value
+        if not name or not path or line_no is None:
+            continue
+        entry = DefinitionEntry(symbol=name, file=str(Path(path)), line=line_no, kind=kind, language=lang, signature=sig, scope=scope)
+        by_symbol.setdefault(name, []).append(entry)
+    return by_symbol
+
 # --------------- ripgrep search ---------------
 
 @dataclass
@@ -119,74 +301,223 @@ class Reference:
     line: int
     snippet: str
 
-def _rg_json_matches(args: List[str]) -> Iterable[Dict[str, Any]]:
-    """ripgrep을 JSON 모드로 실행하여 매치 객체 반환"""
-    proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=REPO_ROOT)
-    if not proc.stdout:
-        return
-    for line in proc.stdout:
-        try:
-            obj = json.loads(line)
-        except json.JSONDecodeError:
+# Extension -> built-in ripgrep type (`rg --type-list`)
+RG_TYPES_BY_EXT: Dict[str, str] = {
+    ".py": "py",
+    ".js": "js", ".jsx": "js", ".mjs": "js",
+    ".ts": "ts", ".tsx": "ts",
+    ".java": "java",
+    ".kt": "kotlin", ".kts": "kotlin",
+    ".c": "c", ".h": "c",
+    ".cc": "cpp", ".cpp": "cpp", ".cxx": "cpp", ".hpp": "cpp",
+    ".go": "go", ".rs": "rust", ".rb": "ruby", ".php": "php",
+    ".cs": "csharp", ".scala": "scala", ".swift": "swift",
+    ".m": "objc", ".mm": "objcpp",
+    ".proto": "protobuf",
+    ".yml": "yaml", ".yaml": "yaml", ".toml": "toml", ".json": "json",
+    ".ini": "config", ".txt": "txt", ".md": "markdown",
+}
+
+def _rg_type_args(exts: Iterable[str]) -> List[str]:
+    """허용 확장자를 ripgrep --type 인자로 변환 (알 수 없는 확장자는 custom 타입으로 추가)"""
+    types: List[str] = []
+    custom: List[str] = []
+    for ext in exts:
+        ext = "." + ext.strip().lower().lstrip("*.")
+        if ext == ".":
             continue
-        if obj.get("type") == "match":
+        rg_type = RG_TYPES_BY_EXT.get(ext)
+        if rg_type is None:
+            custom.append(f"*{ext}")
+        elif rg_type not in types:
+            types.append(rg_type)
+    args: List[str] = []
+    for glob in custom:
+        args += ["--type-add", f"custom:{glob}"]
+    if custom:
+        types.append("custom")
+    for rg_type in types:
+        args += ["--type", rg_type]
+    return args
+
+# Allowed extension filter; only applied when ALLOWED_EXTS is set explicitly
+RG_TYPE_ARGS: List[str] = _rg_type_args(os.getenv("ALLOWED_EXTS", "").split(","))
+
+# Characters that make a find_references pattern a regex (otherwise searched as a whole word)
+REGEX_META = frozenset(r".*+?[](){}|\^$")
+
+def _rg_lines(args: List[str]) -> Iterator[bytes]:
+    """ripgrep을 실행하여 stdout 라인을 바이트로 반환 (제너레이터를 닫으면 프로세스 종료)"""
+    proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=REPO_ROOT)
+    try:
+        if not proc.stdout:
+            return
+        yield from proc.stdout
+        if proc.stderr:
+            _ = proc.stderr.read()
+        proc.wait()
+    finally:
+        # Closed early (result cap hit): stop rg instead of letting it search on
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=0.5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        for stream in (proc.stdout, proc.stderr):
+            if stream:
+                stream.close()
+
+def _rg_json_matches(args: List[str]) -> Iterator[Dict[str, Any]]:
+    """ripgrep을 JSON 모드로 실행하여 매치 객체 반환"""
+    with closing(_rg_lines(args)) as lines:
+        for line in lines:
+            # Skip begin/end/context/summary records without decoding them
+            if not line.startswith(b'{"type":"match"'):
+                continue
+            try:
+                obj = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue
             yield obj
-    if proc.stderr:
-        _ = proc.stderr.read()
-    proc.wait()
 
-def find_references_with_ripgrep(symbol_or_pattern: str, subdir: Optional[str], max_results: int) -> Tuple[List[Reference], int]:
-    """ripgrep으로 심볼/패턴의 참조를 검색하여 반환"""
+def find_references_with_ripgrep(symbol_or_pattern: str, subdir: Optional[str], max_results: int, files_only: bool = False, ref_index: ReferenceIndex | None = None) -> Tuple[List[Reference], int]:
+    """ripgrep으로 심볼/패턴의 참조를 검색하여 반환 (files_only면 매칭 파일만, line=0)
+
+    ref_index가 주어지고 패턴이 단순 단어면 ripgrep 대신 메모리 역색인에서 응답.
+    """
     if max_results <= 0:
         max_results = DEFAULT_MAX_RESULTS
     max_results = min(max_results, HARD_MAX_RESULTS)
 
-    search_root = (REPO_ROOT / subdir) if subdir else REPO_ROOT
-    search_root = search_root.resolve()
-    if not str(search_root).startswith(str(REPO_ROOT)):
+    search_root = Path(repo_realpath(str(subdir))) if subdir else REPO_ROOT
+    if not is_in_repo(str(search_root)):
         logging.error(f"Invalid subdir: {subdir} resolves to {search_root} which is outside {REPO_ROOT}")
         raise ValueError("Invalid subdir")
 
-    is_regex = any(ch in symbol_or_pattern for ch in r".*+?[](){}|\^$")
-    base_args = [RG_BIN, "--json", "-n", "-S"]
+    is_regex = not REGEX_META.isdisjoint(symbol_or_pattern)
+    if ref_index is not None and not files_only and WORD_RE.fullmatch(symbol_or_pattern):
+        return ref_index.find(symbol_or_pattern, search_root, REPO_ROOT, max_results)
+    base_args = [RG_BIN, "-S"] + (["-l"] if files_only else ["--json", "-n"])
     if not is_regex:
         base_args += ["-w"]
     # Apply exclude globs
     for g in EXCLUDE_GLOBS:
         base_args += ["--glob", g]
-    # Allowed extension filter
-    for ext in set(["*"+ext for ext in os.getenv("ALLOWED_EXTS", "").split(",") if ext]):
-        if ext != "*":
-            base_args += ["--glob", f"*{ext}"]
+    base_args += RG_TYPE_ARGS
     base_args += ["-m", str(max_results), symbol_or_pattern, str(search_root)]
 
     refs: List[Reference] = []
     total = 0
-    for m in _rg_json_matches(base_args):
-        data = m.get("data", {})
-        path = data.get("path", {}).get("text")
-        line_no = data.get("line_number")
-        lines = data.get("lines", {}).get("text", "")
-        if not path or not line_no:
-            continue
-        p = (REPO_ROOT / path).resolve()
-        if not (str(p).startswith(str(REPO_ROOT)) and has_allowed_ext(p)):
-            continue
-        snippet = lines.rstrip("\n")
-        refs.append(Reference(file=str(p.relative_to(REPO_ROOT)), line=int(line_no), snippet=snippet))
-        total += 1
-        if len(refs) >= max_results:
-            break
+    if files_only:
+        with closing(_rg_lines(base_args)) as lines:
+            for line in lines:
+                path = line.decode("utf-8", errors="replace").rstrip("\n")
+                if not path:
+                    continue
+                real = repo_realpath(path)
+                if not (is_in_repo(real) and has_allowed_ext(real)):
+                    continue
+                refs.append(Reference(file=repo_relpath(real), line=0, snippet=""))
+                total += 1
+                if len(refs) >= max_results:
+                    break
+        return refs, total
+
+    with closing(_rg_json_matches(base_args)) as matches:
+        for m in matches:
+            data = m.get("data", {})
+            path = data.get("path", {}).get("text")
+            line_no = data.get("line_number")
+            lines = data.get("lines", {}).get("text", "")
+            if not path or not line_no:
+                continue
+            real = repo_realpath(path)
+            if not (is_in_repo(real) and has_allowed_ext(real)):
+                continue
+            snippet = lines.rstrip("\n")
+            refs.append(Reference(file=repo_relpath(real), line=int(line_no), snippet=snippet))
+            total += 1
+            if len(refs) >= max_results:
+                break
     return refs, total
 
 # --------------- optional tree-sitter for function bounds ---------------
 
-def detect_function_bounds(path: Path, line: int) -> Tuple[int,int] | None:
-    """tree-sitter로 지정 라인 주변의 가장 작은 함수/메서드 범위 찾기"""
+# Generic set of function-like nodes across languages
+FUNCISH_NODE_TYPES = frozenset((
+    "function_definition","function_declaration","method_definition","function_item",
+    "function","method","class_method_definition","constructor_declaration"
+))
+
+@lru_cache(maxsize=256)
+def _read_source(path_str: str, mtime_ns: int) -> Tuple[bytes, List[int]]:
+    """(경로, mtime) 기준으로 소스 바이트와 라인 시작 오프셋을 캐싱"""
+    src = Path(path_str).read_bytes()
+    return src, _line_starts(src)
+
+@lru_cache(maxsize=256)
+def _load_parsed_source(path_str: str, mtime_ns: int, lang_name: str) -> Tuple[bytes, Any, List[int]]:
+    """(경로, mtime) 기준으로 소스 바이트, 파싱 트리, 라인 시작 오프셋을 캐싱"""
+    from tree_sitter_languages import get_parser
+    src, line_starts = _read_source(path_str, mtime_ns)
+    tree = get_parser(lang_name).parse(src)
+    return src, tree, line_starts
+
+def read_line_range_bytes(path: Path, mtime_ns: int, start: int, end: int) -> Tuple[bytes, int, int]:
+    """캐시된 소스에서 start~end 라인(1-based, 포함, 파일 범위로 보정)의 바이트만 잘라 반환
+
+    반환값은 (개행으로 이어진 라인 바이트, 보정된 start, 보정된 end). CRLF는 LF로 정규화.
+    """
+    src, line_starts = _read_source(str(path), mtime_ns)
+    n_lines = len(line_starts) - (1 if not src or src.endswith(b"\n") else 0)
+    start = max(1, start)
+    end = min(n_lines, end)
+    if start > end:
+        return b"", start, end
+    stop = line_starts[end] - 1 if end < len(line_starts) else len(src)
+    chunk = src[line_starts[start - 1]:stop]
+    if b"\r" in chunk:
+        chunk = chunk.replace(b"\r\n", b"\n")
+        if chunk.endswith(b"\r"):
+            chunk = chunk[:-1]
+    return chunk, start, end
+
+def prefetch_sources(paths: Iterable[Tuple[Path, int]]) -> None:
+    """(경로, mtime_ns) 목록을 병렬로 읽어 소스 캐시를 미리 채움"""
+    paths = list(paths)
+    if len(paths) < 2:
+        return
+    with ThreadPoolExecutor(max_workers=min(8, len(paths))) as pool:
+        for fut in [pool.submit(_read_source, str(p), mtime_ns) for p, mtime_ns in paths]:
+            try:
+                fut.result()
+            except OSError:
+                # Surfaced again (or skipped) by the caller on its own read
+                pass
+
+def _line_starts(src: bytes) -> List[int]:
+    """각 라인의 시작 바이트 오프셋 목록 (bytes.find로 개행 탐색)"""
+    starts = [0]
+    find = src.find
+    pos = find(b"\n")
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = find(b"\n", pos + 1)
+    return starts
+
+def clear_source_cache() -> None:
+    """소스/파싱 캐시 비우기 (reindex 시 호출)"""
+    _load_parsed_source.cache_clear()
+    _read_source.cache_clear()
+
+def detect_function_bounds(path: Path, line: int, mtime_ns: Optional[int] = None) -> Tuple[int,int] | None:
+    """tree-sitter로 지정 라인 주변의 가장 작은 함수/메서드 범위 찾기 (mtime_ns를 넘기면 stat 생략)"""
     if not USE_TREE_SITTER:
         return None
     try:
-        from tree_sitter_languages import get_language, get_parser
+        from tree_sitter_languages import get_language
     except Exception as e:
         logging.debug(f"tree-sitter not available: {e}")
         return None
@@ -202,49 +533,57 @@ def detect_function_bounds(path: Path, line: int) -> Tuple[int,int] | None:
     if not lang_name:
         return None
     try:
-        lang = get_language(lang_name)
-        parser = get_parser(lang_name)
+        get_language(lang_name)
     except Exception as e:
         logging.debug(f"Failed to get tree-sitter parser for {lang_name}: {e}")
         return None
-    src = path.read_text(errors="ignore")
-    tree = parser.parse(bytes(src, "utf-8"))
-    target_byte = _line_to_byte_offset(src, line)
-    node = tree.root_node
+    if mtime_ns is None:
+        mtime_ns = path.stat().st_mtime_ns
+    _, tree, line_starts = _load_parsed_source(str(path), mtime_ns, lang_name)
+    target_byte = _line_to_byte_offset(line_starts, line)
     best: Optional[Tuple[int,int]] = None
-
-    def visit(n):
-        """트리 노드를 순회하며 함수 노드 찾기"""
-        nonlocal best
-        # Generic set of function-like nodes across languages
-        funcish = (
-            "function_definition","function_declaration","method_definition","function_item",
-            "function","method","class_method_definition","constructor_declaration"
-        )
-        if n.start_byte <= target_byte <= n.end_byte:
-            if n.type in funcish:
-                s_line = n.start_point[0] + 1
-                e_line = n.end_point[0] + 1
-                if (e_line - s_line) <= TREE_SITTER_MAX_FUNC_LINES:
-                    best = (s_line, e_line) if (best is None or (e_line - s_line) < (best[1]-best[0])) else best
-            for i in range(n.named_child_count):
-                visit(n.named_children[i])
-    visit(node)
+    # Descend only through nodes containing the target (usually one child per level,
+    # two when the target sits on a shared boundary); pre-order like a recursive walk
+    stack = [tree.root_node]
+    while stack:
+        n = stack.pop()
+        if n.type in FUNCISH_NODE_TYPES:
+            s_line = n.start_point[0] + 1
+            e_line = n.end_point[0] + 1
+            if (e_line - s_line) <= TREE_SITTER_MAX_FUNC_LINES and (best is None or (e_line - s_line) < (best[1]-best[0])):
+                best = (s_line, e_line)
+        stack.extend(c for c in reversed(n.named_children) if c.start_byte <= target_byte <= c.end_byte)
     return best
 
-def _line_to_byte_offset(src: str, line: int) -> int:
-    """라인 번호를 바이트 오프셋으로 변환"""
+def _line_to_byte_offset(line_starts: List[int], line: int) -> int:
+    """라인 번호를 바이트 오프셋으로 변환 (라인 시작 오프셋 목록 기준)"""
     if line <= 1:
         return 0
-    count = 0
-    i = 1
-    for ch in src:
-        count += 1
-        if ch == '\n':
-            i += 1
-            if i >= line:
-                break
-    return count
+    return line_starts[min(line, len(line_starts)) - 1]
+
+def read_line_window(path: Path, start: int, end: int) -> List[str]:
+    """mmap으로 파일을 열어 start~end 라인(1-based, 포함)만 디코딩하여 반환"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            for _ in range(start - 1):
+                pos = mm.find(b"\n", pos) + 1
+                if pos == 0:
+                    return []
+            end_pos = pos
+            for _ in range(end - start + 1):
+                nl = mm.find(b"\n", end_pos)
+                if nl == -1:
+                    end_pos = len(mm)
+                    break
+                end_pos = nl + 1
+            chunk = mm[pos:end_pos]
+    lines = chunk.decode("utf-8", errors="ignore").split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return [l[:-1] if l.endswith("\r") else l for l in lines]
 
 def clamp(n: int, lo: int, hi: int) -> int:
     """값을 지정된 범위로 제한"""
@@ -7,11 +7,15 @@ from __future__ import annotations
 import logging
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 from typing import Sequence
 
 # -------- Basic settings --------
 REPO_ROOT: Path = Path(os.getenv("REPO_ROOT", ".")).resolve()
+REPO_ROOT_STR: str = str(REPO_ROOT)
+# Separator-terminated prefix so "/repo-other" does not match "/repo"
+REPO_ROOT_PREFIX: str = os.path.join(REPO_ROOT_STR, "")
 HOST: str = os.getenv("HOST", "0.0.0.0")
 PORT: int = int(os.getenv("PORT", "8000"))
 
@@ -28,24 +32,34 @@ DEFAULT_MAX_RESULTS: int = int(os.getenv("DEFAULT_MAX_RESULTS", "50"))
 HARD_MAX_RESULTS: int = int(os.getenv("HARD_MAX_RESULTS", "500"))
 
 # Restrict read_source / reference search to these extensions (comma-separated).
+# Parsed once at import into a tuple of interned strings.
 ALLOWED_EXTS: Sequence[str] = tuple(
-    [ext.strip() for ext in os.getenv(
+    [sys.intern(ext.strip()) for ext in os.getenv(
         "ALLOWED_EXTS",
         ".c,.cc,.cpp,.cxx,.h,.hpp,.py,.js,.jsx,.mjs,.ts,.tsx,.java,.kt,.kts,.go,.rs,.rb,.php,.cs,.scala,.swift,.m,.mm,.proto,.yml,.yaml,.toml,.json,.ini,.txt,.md"
     ).split(",") if ext.strip()]
 )
+# Built once so has_allowed_ext can hand str.endswith the whole tuple
+_ALLOWED_EXT_TUPLE = tuple(ALLOWED_EXTS)
 
 # Ripgrep & ctags binaries
 RG_BIN: str = os.getenv("RG_BIN", "rg")
 CTAGS_BIN: str = os.getenv("CTAGS_BIN", "ctags")  # universal-ctags required
+# Parallel ctags workers for index builds (0 = os.cpu_count())
+CTAGS_WORKERS: int = int(os.getenv("CTAGS_WORKERS", "0"))
+# On-disk ctags index cache reused across restarts (empty = disabled)
+INDEX_CACHE_DIR: str = os.getenv("INDEX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "code-index-mcp"))
 
 # Optional Tree-sitter (requires 'tree_sitter_languages' or individual language packages)
 USE_TREE_SITTER: bool = os.getenv("USE_TREE_SITTER", "true").lower() in ("1","true","yes")
 TREE_SITTER_MAX_FUNC_LINES: int = int(os.getenv("TREE_SITTER_MAX_FUNC_LINES", "500"))
 
-# Exclude globs for ripgrep
-EXCLUDE_GLOBS = tuple(
-    g.strip() for g in os.getenv("EXCLUDE_GLOBS", """
+# In-memory identifier index used to answer plain-word find_references without ripgrep
+USE_REF_INDEX: bool = os.getenv("USE_REF_INDEX", "false").lower() in ("1","true","yes")
+
+# Exclude globs for ripgrep (interned, parsed once at import)
+EXCLUDE_GLOBS: Sequence[str] = tuple(
+    sys.intern(g.strip()) for g in os.getenv("EXCLUDE_GLOBS", """
 !.git
 !**/.git/**
 !node_modules/**
@@ -63,8 +77,32 @@ EXCLUDE_GLOBS = tuple(
 )
 
 # Git metadata for reproducibility
+def _read_git_head(repo: Path) -> str | None:
+    """.git/HEAD를 직접 읽어 commit hash 반환 (git 프로세스 실행 없이)"""
+    git_dir = repo / ".git"
+    head = (git_dir / "HEAD").read_text().strip()
+    if not head.startswith("ref: "):
+        return head or None
+    ref = head[len("ref: "):]
+    ref_file = git_dir / ref
+    if ref_file.is_file():
+        return ref_file.read_text().strip() or None
+    packed = git_dir / "packed-refs"
+    if packed.is_file():
+        for line in packed.read_text().splitlines():
+            if line.endswith(" " + ref):
+                return line.split(" ", 1)[0]
+    return None
+
+@lru_cache(maxsize=None)
 def detect_git_rev(repo: Path) -> str | None:
-    """Git 레포지토리의 현재 commit hash 검출"""
+    """Git 레포지토리의 현재 commit hash 검출 (결과 캐시)"""
+    try:
+        rev = _read_git_head(repo)
+        if rev:
+            return rev
+    except OSError:
+        pass
     import subprocess
     try:
         rev = subprocess.check_output(["git", "-C", str(repo), "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
@@ -75,15 +113,39 @@ def detect_git_rev(repo: Path) -> str | None:
 
 REPO_REV: str | None = detect_git_rev(REPO_ROOT)
 
+@lru_cache(maxsize=4096)
+def _resolve_file(p_str: str) -> str:
+    """경로 resolve 결과만 캐시 (파일 존재 여부는 매번 확인)"""
+    return os.path.realpath(p_str)
+
+@lru_cache(maxsize=4096)
+def repo_realpath(p_str: str) -> str:
+    """REPO_ROOT 기준 (상대/절대) 경로를 realpath로 정규화 (결과 캐시)"""
+    return os.path.realpath(os.path.join(REPO_ROOT_STR, p_str))
+
+def is_in_repo(real: str) -> bool:
+    """정규화된 경로가 REPO_ROOT 안에 있는지 확인 (resolve 없이 prefix 비교)"""
+    return real == REPO_ROOT_STR or real.startswith(REPO_ROOT_PREFIX)
+
+def repo_relpath(real: str) -> str:
+    """REPO_ROOT 안의 정규화된 경로를 레포 기준 상대 경로로 변환"""
+    return real[len(REPO_ROOT_PREFIX):] if real != REPO_ROOT_STR else "."
+
+def clear_path_cache() -> None:
+    """파일 구성이 바뀌었을 때 (reindex 등) 경로 캐시 초기화"""
+    _resolve_file.cache_clear()
+    repo_realpath.cache_clear()
+
 def is_allowed_path(p: Path) -> bool:
     """경로가 허용된 범위 내에 있는 파일인지 확인"""
     try:
-        p = p.resolve()
-        return str(p).startswith(str(REPO_ROOT)) and p.is_file()
+        sp = _resolve_file(str(p))
     except Exception as e:
         logging.debug(f"Path validation failed for {p}: {e}")
         return False
+    # 삭제/교체된 파일을 허용하지 않도록 존재 여부는 캐시하지 않음
+    return is_in_repo(sp) and os.path.isfile(sp)
 
-def has_allowed_ext(p: Path) -> bool:
-    """파일이 허용된 확장자를 가지고 있는지 확인"""
-    return any(str(p).endswith(ext) for ext in ALLOWED_EXTS)
+def has_allowed_ext(p: Path | str) -> bool:
+    """파일이 허용된 확장자를 가지고 있는지 확인 (대소문자 구분)"""
+    return str(p).endswith(_ALLOWED_EXT_TUPLE)
@@ -5,6 +5,7 @@ MCP 서버 메인 파일
 from __future__ import annotations
 
 import hashlib
+from pathlib import Path
 from typing import List, Optional, TypedDict
 from mcp.server.fastmcp import FastMCP, Context
 from dotenv import load_dotenv
@@ -14,9 +15,13 @@ import sys, logging # stdio 모드를 위함
 from config import (
     REPO_ROOT, REPO_REV, # STDIO에선 HOST/PORT 불필요
     MAX_BYTES, DEFAULT_BEFORE, DEFAULT_AFTER, MAX_BEFORE, MAX_AFTER,
-    DEFAULT_MAX_RESULTS, HARD_MAX_RESULTS, is_allowed_path, has_allowed_ext
+    DEFAULT_MAX_RESULTS, HARD_MAX_RESULTS, is_allowed_path, has_allowed_ext, clear_path_cache,
+    repo_realpath, repo_relpath
+)
+from indexer import (
+    CTagsIndex, find_references_with_ripgrep, detect_function_bounds,
+    clear_source_cache, prefetch_sources, read_line_range_bytes, read_line_window, clamp
 )
-from indexer import CTagsIndex, find_references_with_ripgrep, detect_function_bounds, clamp
 
 mcp = FastMCP("code-index-mcp", instructions=(
     "Tools for precise code browsing. Always use read_definition / find_references / read_source instead of asking for whole files.\n"
@@ -32,7 +37,7 @@ def initialize_index():
     global ctags_index
     ctags_index = CTagsIndex(REPO_ROOT)
     logging.info(f"Building ctags index for {REPO_ROOT}")
-    ctags_index.build()
+    ctags_index.build(use_cache=True)
     logging.info("ctags index built.")
 
 class ReferenceItem(TypedDict):
@@ -64,9 +69,10 @@ class DefinitionResponse(TypedDict):
     results: List[dict]
 
 @mcp.tool()
-def find_references(symbol_or_pattern: str, dir: Optional[str] = REPO_ROOT, max_results: int = DEFAULT_MAX_RESULTS) -> FindReferencesResponse:
-    """심볼이나 패턴의 참조를 ripgrep으로 검색"""
-    refs, total = find_references_with_ripgrep(symbol_or_pattern, dir, max_results)
+def find_references(symbol_or_pattern: str, dir: Optional[str] = REPO_ROOT, max_results: int = DEFAULT_MAX_RESULTS, files_only: bool = False) -> FindReferencesResponse:
+    """심볼이나 패턴의 참조를 ripgrep으로 검색 (files_only면 매칭 파일 목록만 반환)"""
+    ref_index = ctags_index.references if ctags_index else None
+    refs, total = find_references_with_ripgrep(symbol_or_pattern, dir, max_results, files_only=files_only, ref_index=ref_index)
     truncated = total > len(refs)
     return {
         "repo": str(REPO_ROOT),
@@ -79,30 +85,30 @@ def find_references(symbol_or_pattern: str, dir: Optional[str] = REPO_ROOT, max_
 @mcp.tool()
 def read_source(path: str, line: int, before: int = DEFAULT_BEFORE, after: int = DEFAULT_AFTER) -> ReadSourceResponse:
     """지정된 라인 주변의 소스 코드를 읽어옴"""
-    from pathlib import Path
-    p = (REPO_ROOT / path).resolve()
-    if not (is_allowed_path(p) and has_allowed_ext(p)):
+    real = repo_realpath(path)
+    p = Path(real)
+    if not (is_allowed_path(p) and has_allowed_ext(real)):
         raise ValueError("Path not allowed")
     before = clamp(before, 0, MAX_BEFORE)
     after = clamp(after, 0, MAX_AFTER)
 
-    lines = p.read_text(errors="ignore").splitlines()
     start = max(1, line - before)
-    end = min(len(lines), line + after)
-    snippet_lines = lines[start-1:end]
+    snippet_lines = read_line_window(p, start, line + after)
+    end = start + len(snippet_lines) - 1
     text = "\n".join(snippet_lines)
+    blob = text.encode("utf-8")
     truncated = False
-    if len(text.encode("utf-8")) > MAX_BYTES:
+    if len(blob) > MAX_BYTES:
         half = MAX_BYTES // 2
-        head = text.encode("utf-8")[:half]
-        tail = text.encode("utf-8")[-half:]
-        text = head.decode("utf-8", errors="ignore") + "\n...\n" + tail.decode("utf-8", errors="ignore")
+        text = (blob[:half] + b"\n...\n" + blob[-half:]).decode("utf-8", errors="ignore")
+        # Re-encode the (small) truncated text: cut multi-byte chars were dropped on decode
+        blob = text.encode("utf-8")
         truncated = True
-    sha256 = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    sha256 = hashlib.sha256(blob).hexdigest()
     return {
         "repo": str(REPO_ROOT),
         "rev": REPO_REV,
-        "path": str(p.relative_to(REPO_ROOT)),
+        "path": repo_relpath(real),
         "start_line": start,
         "end_line": end,
         "text": text,
@@ -117,13 +123,27 @@ def read_definition(symbol: str, file: Optional[str] = None, language: Optional[
         raise RuntimeError("Index not initialized yet")
     entries = ctags_index.find_definitions(symbol, file=file, language=language)
     results: List[dict] = []
+    candidates = []
     for e in entries[:10]:
-        from pathlib import Path
-        p = (REPO_ROOT / e.file).resolve()
-        if not (is_allowed_path(p) and has_allowed_ext(p)):
-            continue
+        real = repo_realpath(e.file)
+        p = Path(real)
+        if is_allowed_path(p) and has_allowed_ext(real):
+            candidates.append((e, p))
+    # Stat each distinct file once and warm the source cache concurrently
+    mtimes: dict = {}
+    if include_body:
+        for _, p in candidates:
+            if p not in mtimes:
+                try:
+                    mtimes[p] = p.stat().st_mtime_ns
+                except OSError:
+                    # 확인 이후 삭제된 파일: 해당 후보만 건너뜀
+                    mtimes[p] = None
+        candidates = [(e, p) for e, p in candidates if mtimes[p] is not None]
+        prefetch_sources((p, m) for p, m in mtimes.items() if m is not None)
+    for e, p in candidates:
         item: dict = {
-            "file": str(p.relative_to(REPO_ROOT)),
+            "file": repo_relpath(str(p)),
             "line": e.line,
             "kind": e.kind,
             "language": e.language,
@@ -131,23 +151,19 @@ def read_definition(symbol: str, file: Optional[str] = None, language: Optional[
             "scope": e.scope,
         }
         if include_body:
-            bounds = detect_function_bounds(p, e.line)
-            if bounds:
-                s, t = bounds
-                try:
-                    lines = p.read_text(errors="ignore").splitlines()
-                    s = max(1, s); t = min(len(lines), t)
-                    text = "\n".join(lines[s-1:t])
-                    truncated = False
-                    if len(text.encode("utf-8")) > 4096:
-                        text = text.encode("utf-8")[:4096].decode("utf-8", errors="ignore")
-                        truncated = True
+            try:
+                bounds = detect_function_bounds(p, e.line, mtimes[p])
+                if bounds:
+                    s, t = bounds
+                    body, s, t = read_line_range_bytes(p, mtimes[p], s, t)
+                    truncated = len(body) > 4096
+                    text = body[:4096].decode("utf-8", errors="ignore")
                     item["body"] = text
                     item["body_truncated"] = truncated
                     item["start_line"] = s
                     item["end_line"] = t
-                except Exception:
-                    pass
+            except Exception:
+                pass
         results.append(item)
     return {
         "repo": str(REPO_ROOT),
@@ -162,6 +178,8 @@ def reindex() -> dict:
     global ctags_index
     if ctags_index is None:
         ctags_index = CTagsIndex(REPO_ROOT)
+    clear_path_cache()
+    clear_source_cache()
     ctags_index.build()
     return {"status": "ok", "repo": str(REPO_ROOT)}
 
@@ -3,7 +3,11 @@ Main entry point for Discovery-With-Seed project
 """
 import argparse
 import asyncio
+import atexit
+import logging
 import os
+from dataclasses import dataclass
+from operator import attrgetter
 from pathlib import Path
 from typing import Any
 from src.agents import DiscoveryAgent, AnalysisAgent
@@ -17,6 +21,7 @@ from src.config import (
     ANALYSIS_WORKERS_DEFAULT,
     ANALYSIS_WORKER_OVERRIDES,
     ANALYSIS_WORKER_MAX_RETRIES,
+    ANALYSIS_MAX_CONCURRENT_AGENTS,
 )
 from src.utils.logging import init_logger
 from langchain_mcp_adapters.client import MultiServerMCPClient
@@ -30,7 +35,9 @@ try:
 except ImportError:
     LangfuseCallbackHandler = None
 
-from src.utils import fetch_unseen_vulnerabilities
+from src.utils import fetch_unseen_vulnerabilities, fetch_classified_vulnerabilities
+from src.utils.mcp_tools import get_mcp_tools, get_mcp_tools_by_name, close_mcp_sessions
+from src.utils.rate_limiter import is_transient_error
 from src.agents.discovery_agent.nodes import _apply_classifications_to_local_file  # type: ignore
 
 def parse_args():
@@ -96,7 +103,17 @@ def setup_tracing(project_name: str, enable_langsmith: bool, enable_langfuse: bo
             else:
                 try:
                     # v3: instantiate client once (env vars also work); handler pulls from singleton
-                    Langfuse(public_key=public_key, secret_key=secret_key, base_url=base_url)
+                    # Batch span exports so concurrent workers don't trigger frequent small flushes
+                    langfuse_client = Langfuse(
+                        public_key=public_key,
+                        secret_key=secret_key,
+                        base_url=base_url,
+                        flush_at=int(os.getenv("LANGFUSE_FLUSH_AT", "100")),
+                        flush_interval=float(os.getenv("LANGFUSE_FLUSH_INTERVAL", "5")),
+                        timeout=int(os.getenv("LANGFUSE_TIMEOUT", "10")),
+                    )
+                    # Export whatever is still batched when main() returns
+                    atexit.register(langfuse_client.flush)
                     langfuse_handler = LangfuseCallbackHandler()
                     callbacks.append(langfuse_handler)
                     print(f"\n✅ Langfuse tracing ENABLED (Callback)")
@@ -125,19 +142,14 @@ async def activate_mcp_project(mcp_client, project_name: str):
     
     try:
         print(f"\n📡 Fetching MCP tools...")
-        tools = await mcp_client.get_tools()
+        tools = await get_mcp_tools(mcp_client)
         
         print(f"✅ Received {len(tools)} tools from MCP server")
         print(f"\nAvailable tools:")
-        for i, tool in enumerate(tools, 1):
-            print(f"  {i}. {tool.name}")
+        print("\n".join(f"  {i}. {tool.name}" for i, tool in enumerate(tools, 1)))
         
         print(f"\n🔍 Looking for 'activate_project' tool...")
-        activate_tool = None
-        for tool in tools:
-            if tool.name == "activate_project":
-                activate_tool = tool
-                break
+        activate_tool = (await get_mcp_tools_by_name(mcp_client)).get("activate_project")
         
         if activate_tool:
             print(f"✅ Found 'activate_project' tool")
@@ -173,6 +185,7 @@ async def run_discovery(
     seed_file: str | None = None,
     workers: int | None = None,
     callbacks: list | None = None,
+    output_queue: asyncio.Queue | None = None,
 ):
     """
     Run Discovery Agent
@@ -183,6 +196,8 @@ async def run_discovery(
         mcp_client: MCP client instance
         provider: LLM provider name
         callbacks: List of tracing callbacks
+        output_queue: If given, classified elements (including those classified by
+            earlier runs) are put on it as lists while discovery runs
     """
     print("="*80)
     print("🔍 DISCOVERY PHASE")
@@ -201,19 +216,32 @@ async def run_discovery(
     # Load elements
     if seed_source == "json":
         local_seed_file = discovery_agent._ensure_local_seed_file(project_title)
-        elements = [
-            elem for elem in discovery_agent._load_seed_payload(Path(local_seed_file))
-            if not elem.get("vulnerability_types")
-        ]
+        elements = list(discovery_agent._load_seed_payload_filtered(
+            Path(local_seed_file),
+            lambda elem: not elem.get("vulnerability_types"),
+        ))
     else:
         elements = await fetch_unseen_vulnerabilities(project_title)
         local_seed_file = None
 
+    if output_queue is not None:
+        # Elements classified by earlier runs can be analyzed right away
+        if seed_source == "json":
+            previously_classified = list(discovery_agent._load_seed_payload_filtered(
+                Path(local_seed_file),
+                lambda elem: bool(elem.get("vulnerability_types")),
+            ))
+        else:
+            previously_classified = await fetch_classified_vulnerabilities(project_title)
+        if previously_classified:
+            await output_queue.put(previously_classified)
+
     result = await discovery_agent.classify_elements(
         project_title, 
         elements, 
         worker_count=workers,
-        callbacks=callbacks
+        callbacks=callbacks,
+        output_queue=output_queue,
     )
 
     # Apply updates (API or local file) centrally
@@ -271,6 +299,16 @@ def build_target_system_prompt(label: str, cwe: str | None, description: str, ex
     return "\n".join(focus_lines)
 
 
+@dataclass(slots=True)
+class WorkerResult:
+    """Outcome of one analysis worker."""
+
+    worker_id: int
+    stage: str
+    total_analyzed: int = 0
+    error: str | None = None
+
+
 def parse_worker_overrides(value: str) -> dict[str, int]:
     overrides: dict[str, int] = {}
     if not value:
@@ -292,6 +330,10 @@ def parse_worker_overrides(value: str) -> dict[str, int]:
     return overrides
 
 
+# Settings are fixed for the process, so parse the override string once
+_WORKER_OVERRIDES = parse_worker_overrides(ANALYSIS_WORKER_OVERRIDES)
+
+
 async def run_analysis(
     project_title: str,
     llm,
@@ -302,9 +344,14 @@ async def run_analysis(
     classification_file: str | None = None,
     ignore_previous_versions: bool = False,
     callbacks: list | None = None,
+    input_queue: asyncio.Queue | None = None,
 ):
     """
     Run Analysis Agents (one per vulnerability category).
+
+    With input_queue, elements are taken from discovery as they are classified
+    instead of being fetched once. Each list read from the queue (plus whatever
+    else is already queued) is analyzed as one round; None ends the stream.
     """
     print("="*80)
     print("🔬 ANALYSIS PHASE")
@@ -316,13 +363,19 @@ async def run_analysis(
         print("⚠️  No analysis targets configured. Skipping analysis phase.")
         return {"project_title": project_title, "stage": "skipped", "targets": []}
 
-    worker_overrides = parse_worker_overrides(ANALYSIS_WORKER_OVERRIDES)
+    worker_overrides = _WORKER_OVERRIDES
     default_workers = max(1, ANALYSIS_WORKERS_DEFAULT)
     max_worker_retries = max(0, ANALYSIS_WORKER_MAX_RETRIES)
 
-    print("Launching analysis workers per vulnerability category:\n")
-    normalized_targets = []
-    for target in targets:
+    total_workers = sum(
+        max(1, worker_overrides.get((t.get("label") or "").upper(), default_workers))
+        for t in targets
+    )
+    # Shared across all categories so concurrent targets respect the global LLM budget
+    max_concurrency = ANALYSIS_MAX_CONCURRENT_AGENTS if ANALYSIS_MAX_CONCURRENT_AGENTS > 0 else total_workers
+    worker_slots = asyncio.Semaphore(max_concurrency)
+
+    async def run_target(target: dict[str, Any], elements: list[dict[str, Any]] | None = None) -> dict[str, Any]:
         label = target.get("label")
         cwe = target.get("cwe")
         description = target.get("description", "")
@@ -331,57 +384,75 @@ async def run_analysis(
         system_prompt = build_target_system_prompt(label, cwe, description, analysis_prompt)
         label_key = (label or "").upper()
         worker_count = max(1, worker_overrides.get(label_key, default_workers))
-        print(f"  • {label} ({cwe or 'n/a'}) using {worker_count} worker(s)")
+
+        # One agent per category; analyze() is reentrant so all its workers share it
+        agent = AnalysisAgent(
+            llm,
+            mcp_client,
+            provider,
+            classification_source=classification_source,
+            classification_file=classification_file,
+            ignore_previous_versions=ignore_previous_versions,
+            target_label=label,
+            target_cwe=cwe,
+            system_prompt=system_prompt,
+            target_is_general=target_is_general,
+        )
 
         async def run_worker(worker_idx: int):
             attempt = 0
             last_error: Exception | None = None
             while attempt <= max_worker_retries:
                 try:
-                    agent = AnalysisAgent(
-                        llm,
-                        mcp_client,
-                        provider,
-                        classification_source=classification_source,
-                        classification_file=classification_file,
-                        ignore_previous_versions=ignore_previous_versions,
-                        target_label=label,
-                        target_cwe=cwe,
-                        system_prompt=system_prompt,
-                        target_is_general=target_is_general,
-                    )
-                    result = await agent.analyze(
-                        project_title,
-                        worker_id=worker_idx,
-                        worker_count=worker_count,
-                        callbacks=callbacks
-                    )
+                    async with worker_slots:
+                        result = await agent.analyze(
+                            project_title,
+                            worker_id=worker_idx,
+                            worker_count=worker_count,
+                            callbacks=callbacks,
+                            elements=elements,
+                        )
                     stage = result.get("stage")
                     if stage == "completed":
-                        return {
-                            "worker_id": worker_idx,
-                            "stage": stage,
-                            "result": result,
-                        }
+                        return WorkerResult(
+                            worker_id=worker_idx,
+                            stage=stage,
+                            total_analyzed=result.get("total_analyzed", 0),
+                        )
                     last_error = RuntimeError(f"Stage {stage}")
                 except Exception as exc:  # pylint: disable=broad-except
                     last_error = exc
+                    if not is_transient_error(exc):
+                        break
                 attempt += 1
                 if attempt <= max_worker_retries:
+                    backoff = 2 ** attempt
                     print(
-                        f"     ↻ Worker {worker_idx + 1}/{worker_count} for {label} retrying"
-                        f" ({attempt}/{max_worker_retries})"
+                        f"     ↻ Worker {worker_idx + 1}/{worker_count} for {label} retrying in {backoff}s"
+                        f" ({attempt}/{max_worker_retries}): {type(last_error).__name__}"
                     )
-            return {
-                "worker_id": worker_idx,
-                "stage": "error",
-                "error": str(last_error) if last_error else "Unknown error",
-            }
+                    # Sleep outside worker_slots so the backoff doesn't hold a concurrency slot
+                    await asyncio.sleep(backoff)
+            return WorkerResult(
+                worker_id=worker_idx,
+                stage="error",
+                error=str(last_error) if last_error else "Unknown error",
+            )
 
         worker_tasks = [asyncio.create_task(run_worker(idx)) for idx in range(worker_count)]
-        worker_results = await asyncio.gather(*worker_tasks)
+        # Report each worker as it finishes so a retrying straggler doesn't hold back the rest
+        worker_results: list[WorkerResult] = []
+        completed_workers = 0
+        for finished in asyncio.as_completed(worker_tasks):
+            r = await finished
+            worker_results.append(r)
+            if r.stage == "completed":
+                completed_workers += 1
+                print(f"     ✅ {label} worker {r.worker_id + 1}/{worker_count}: analyzed {r.total_analyzed} elements")
+            else:
+                print(f"     ❌ {label} worker {r.worker_id + 1}/{worker_count}: {r.error or 'failed'}")
+        worker_results.sort(key=attrgetter("worker_id"))
 
-        completed_workers = sum(1 for r in worker_results if r.get("stage") == "completed")
         if completed_workers == worker_count:
             target_stage = "completed"
         elif completed_workers == 0:
@@ -389,16 +460,9 @@ async def run_analysis(
             print(f"❌ {label}: all workers failed")
         else:
             target_stage = "partial"
+        print(f"\n📋 {label} ({cwe or 'n/a'}) finished: {completed_workers}/{worker_count} workers completed ({target_stage})")
 
-        for r in worker_results:
-            status = r.get("stage")
-            if status == "completed":
-                analyzed = r.get("result", {}).get("total_analyzed", 0)
-                print(f"     ✅ Worker {r['worker_id'] + 1}: analyzed {analyzed} elements")
-            else:
-                print(f"     ❌ Worker {r['worker_id'] + 1}: {r.get('error', 'failed')}")
-
-        normalized_targets.append({
+        return {
             "label": label,
             "cwe": cwe,
             "description": description,
@@ -406,7 +470,59 @@ async def run_analysis(
             "worker_count": worker_count,
             "stage": target_stage,
             "workers": worker_results,
-        })
+        }
+
+    print("Launching analysis workers per vulnerability category:\n")
+    print("\n".join(
+        f"  • {target.get('label')} ({target.get('cwe') or 'n/a'}) using "
+        f"{max(1, worker_overrides.get((target.get('label') or '').upper(), default_workers))} worker(s)"
+        for target in targets
+    ))
+    if max_concurrency < total_workers:
+        print(f"\n  Running at most {max_concurrency} worker(s) at a time across all categories")
+
+    async def run_round(elements: list[dict[str, Any]] | None = None) -> list[dict[str, Any]]:
+        target_tasks = [asyncio.create_task(run_target(target, elements)) for target in targets]
+        return list(await asyncio.gather(*target_tasks))
+
+    if input_queue is None:
+        normalized_targets = await run_round()
+    else:
+        rounds: list[list[dict[str, Any]]] = []
+        stream_done = False
+        while not stream_done:
+            batch = await input_queue.get()
+            if batch is None:
+                break
+            elements = list(batch)
+            # Fold everything discovery produced meanwhile into the same round
+            while not input_queue.empty():
+                more = input_queue.get_nowait()
+                if more is None:
+                    stream_done = True
+                    break
+                elements.extend(more)
+            print(f"\n📥 Analyzing {len(elements)} newly classified element(s) from discovery\n")
+            rounds.append(await run_round(elements))
+
+        normalized_targets = []
+        for idx, target in enumerate(targets):
+            per_round = [round_results[idx] for round_results in rounds]
+            if all(r["stage"] == "completed" for r in per_round):
+                target_stage = "completed"
+            elif all(r["stage"] == "error" for r in per_round):
+                target_stage = "error"
+            else:
+                target_stage = "partial"
+            normalized_targets.append({
+                "label": target.get("label"),
+                "cwe": target.get("cwe"),
+                "description": target.get("description", ""),
+                "is_general": target.get("is_general", False),
+                "worker_count": max(1, worker_overrides.get((target.get("label") or "").upper(), default_workers)),
+                "stage": target_stage,
+                "workers": [worker for r in per_round for worker in r["workers"]],
+            })
 
     total_targets = len(normalized_targets)
     completed_targets = sum(1 for t in normalized_targets if t["stage"] == "completed")
@@ -417,9 +533,8 @@ async def run_analysis(
     else:
         overall_stage = "partial"
 
+    latest_file = Path("analysis_results") / f"{project_title}_latest.json"
     if overall_stage == "completed":
-        from pathlib import Path
-        latest_file = Path("analysis_results") / f"{project_title}_latest.json"
         if latest_file.exists():
             print(f"\n✅ Analysis complete! Results saved to:")
             print(f"   {latest_file.absolute()}\n")
@@ -466,7 +581,7 @@ async def main():
         print(f"\nEnvironment settings detected:")
         print(f"   Provider: {env_provider}")
         print(f"   Model: {env_model or 'default'}")
-        choice = input("\nUse these settings? (Y/n): ").strip().lower()
+        choice = (await asyncio.to_thread(input, "\nUse these settings? (Y/n): ")).strip().lower()
         if choice in ['', 'y', 'yes']:
             provider = env_provider
             model_name = env_model
@@ -484,7 +599,7 @@ async def main():
         print("6. OpenAI Compatible (vLLM, LocalAI, Ollama, etc.)")
         print("7. OpenRouter (openrouter.ai)")
 
-        provider_choice = input("Enter choice (1/2/3/4/5/6/7, default: 1): ").strip()
+        provider_choice = (await asyncio.to_thread(input, "Enter choice (1/2/3/4/5/6/7, default: 1): ")).strip()
         provider_map = {
             "1": "google",
             "2": "groq",
@@ -520,7 +635,7 @@ async def main():
             print("  Default: x-ai/grok-4.1-fast")
             print("  Base URL: https://openrouter.ai/api/v1 (overridable via OPENROUTER_BASE_URL)")
 
-        model_name = input("Model: ").strip() or None
+        model_name = (await asyncio.to_thread(input, "Model: ")).strip() or None
     else:
         if provider not in allowed_providers:
             raise ValueError(f"Unsupported provider '{provider}'. Supported providers: {sorted(allowed_providers)}")
@@ -529,7 +644,7 @@ async def main():
 
     try:
         llm = get_llm(provider=provider, model_name=model_name)
-        print("[DEBUG] llm: ", llm)
+        logging.getLogger(__name__).debug("llm: %r", llm)
         print(f"LLM initialized: {provider} - {model_name or 'default model'}\n")
     except ValueError as e:
         print(f"Error: {e}")
@@ -539,7 +654,7 @@ async def main():
         project_title = args.project.strip() or DEFAULT_PROJECT_TITLE
         print(f"Using project title from arguments: {project_title}")
     else:
-        project_title = input(f"Enter project title (default: {DEFAULT_PROJECT_TITLE}): ").strip()
+        project_title = (await asyncio.to_thread(input, f"Enter project title (default: {DEFAULT_PROJECT_TITLE}): ")).strip()
         if not project_title:
             project_title = DEFAULT_PROJECT_TITLE
 
@@ -550,11 +665,12 @@ async def main():
     print(f"\nProject Title: {project_title}\n")
 
     # Setup Tracing
+    # None (not []) when tracing is off, so no callback manager is set up per graph step
     tracing_callbacks = setup_tracing(
         f"discovery-with-seed-{project_title}",
         enable_langsmith=not args.no_langsmith,
         enable_langfuse=not args.no_langfuse
-    )
+    ) or None
 
     logger = init_logger(project_title)
     print(f"Communication log: {logger.get_log_file_path()}\n")
@@ -573,6 +689,7 @@ async def main():
     print("MCP client created\n")
 
     try:
+        # Finish activation (and its output) before prompting, so nothing prints over the prompt
         mcp_activated = await activate_mcp_project(mcp_client, project_title)
 
         if not mcp_activated:
@@ -587,10 +704,9 @@ async def main():
             print("1. Discovery only")
             print("2. Analysis only")
             print("3. Full workflow (Discovery -> Analysis)")
-            mode = input("Enter choice (1/2/3): ").strip()
+            mode = (await asyncio.to_thread(input, "Enter choice (1/2/3): ")).strip()
 
         analysis_source = "json" if seed_source == "json" else "http"
-        discovery_output_file = None
 
         if mode == "1":
             await run_discovery(
@@ -623,42 +739,105 @@ async def main():
             )
         elif mode == "3":
             print("\nRunning full workflow...\n")
-            discovery_result = await run_discovery(
-                project_title,
-                llm,
-                mcp_client,
-                provider,
-                seed_source=seed_source,
-                seed_file=seed_file,
-                workers=None,
-                callbacks=tracing_callbacks
-            )
-            discovery_output_file = discovery_result.get("discovery_output_file")
-
-            if discovery_result['stage'] == 'completed':
-                print("Discovery completed successfully\n")
-                analysis_result = await run_analysis(
+            if not get_analysis_targets():
+                # Without targets nothing would consume a queue: run the phases one after the other
+                discovery_result = await run_discovery(
                     project_title,
                     llm,
                     mcp_client,
                     provider,
-                    classification_source=analysis_source,
-                    classification_file=discovery_output_file if analysis_source == "json" else None,
-                    ignore_previous_versions=ignore_previous_versions,
+                    seed_source=seed_source,
+                    seed_file=seed_file,
+                    workers=None,
                     callbacks=tracing_callbacks
                 )
+                discovery_output_file = discovery_result.get("discovery_output_file")
 
-                if analysis_result['stage'] == 'completed':
-                    print("Analysis completed successfully\n")
+                if discovery_result['stage'] == 'completed':
+                    print("Discovery completed successfully\n")
+                    analysis_result = await run_analysis(
+                        project_title,
+                        llm,
+                        mcp_client,
+                        provider,
+                        classification_source=analysis_source,
+                        classification_file=discovery_output_file if analysis_source == "json" else None,
+                        ignore_previous_versions=ignore_previous_versions,
+                        callbacks=tracing_callbacks
+                    )
+
+                    if analysis_result['stage'] == 'completed':
+                        print("Analysis completed successfully\n")
+                    else:
+                        print("Analysis incomplete\n")
                 else:
-                    print("Analysis incomplete\n")
+                    print("Discovery incomplete, skipping analysis\n")
             else:
-                print("Discovery incomplete, skipping analysis\n")
+                # Analysis starts on the first classified elements instead of waiting for discovery
+                classified_queue: asyncio.Queue = asyncio.Queue(maxsize=128)
+
+                async def discover_and_close():
+                    cancelled = False
+                    completed = False
+                    try:
+                        result = await run_discovery(
+                            project_title,
+                            llm,
+                            mcp_client,
+                            provider,
+                            seed_source=seed_source,
+                            seed_file=seed_file,
+                            workers=None,
+                            callbacks=tracing_callbacks,
+                            output_queue=classified_queue,
+                        )
+                        completed = result['stage'] == 'completed'
+                        return result
+                    except asyncio.CancelledError:
+                        # Cancelled because analysis stopped: nobody is left to read the end marker
+                        cancelled = True
+                        raise
+                    finally:
+                        if not cancelled:
+                            if not completed:
+                                # Discovery incomplete: drop what analysis hasn't picked up yet
+                                # so no further round runs on it
+                                while not classified_queue.empty():
+                                    classified_queue.get_nowait()
+                            await classified_queue.put(None)
+
+                discovery_task = asyncio.create_task(discover_and_close())
+                try:
+                    analysis_result = await run_analysis(
+                        project_title,
+                        llm,
+                        mcp_client,
+                        provider,
+                        classification_source=analysis_source,
+                        ignore_previous_versions=ignore_previous_versions,
+                        callbacks=tracing_callbacks,
+                        input_queue=classified_queue,
+                    )
+                except BaseException:
+                    # The consumer is gone; stop discovery rather than let it block on a full queue
+                    discovery_task.cancel()
+                    await asyncio.gather(discovery_task, return_exceptions=True)
+                    raise
+                discovery_result = await discovery_task
+
+                if discovery_result['stage'] == 'completed':
+                    print("Discovery completed successfully\n")
+                    if analysis_result['stage'] == 'completed':
+                        print("Analysis completed successfully\n")
+                    else:
+                        print("Analysis incomplete\n")
+                else:
+                    print("Discovery incomplete, skipping analysis of the remaining elements\n")
         else:
             print("Invalid choice\n")
 
     finally:
-        pass
+        await close_mcp_sessions(mcp_client)
 
     print("\n" + "="*80)
     print("Workflow Complete!")
@@ -667,4 +846,9 @@ async def main():
 
 
 if __name__ == "__main__":
+    # 디버그 출력은 LOG_LEVEL=DEBUG 일 때만 표시
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "WARNING").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
     asyncio.run(main())
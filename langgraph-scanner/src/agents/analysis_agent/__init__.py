@@ -1,5 +1,5 @@
 """Analysis Agent module"""
-from .graph import build_analysis_graph
+from .graph import build_analysis_graph, get_analysis_graph
 from .agent import AnalysisAgent
 
-__all__ = ["build_analysis_graph", "AnalysisAgent"]
+__all__ = ["build_analysis_graph", "get_analysis_graph", "AnalysisAgent"]
@@ -2,10 +2,15 @@
 Analysis Agent - Main agent class
 """
 import datetime
+import logging
+import os
 import uuid
 from pathlib import Path
-from .graph import build_analysis_graph
+from .graph import get_analysis_graph
 from ...models import AnalysisState
+from ...config import ANALYSIS_BATCH_CONCURRENCY, ANALYSIS_CHUNK_TOKEN_BUDGET
+
+log = logging.getLogger(__name__)
 
 
 class AnalysisAgent:
@@ -32,6 +37,9 @@ class AnalysisAgent:
         target_cwe: str | None = None,
         system_prompt: str | None = None,
         target_is_general: bool = False,
+        max_concurrency: int | None = None,
+        token_budget: int | None = None,
+        checkpointer=None,
     ):
         self.llm = llm
         self.mcp_client = mcp_client
@@ -43,33 +51,64 @@ class AnalysisAgent:
         self.target_cwe = target_cwe
         self.system_prompt = system_prompt
         self.target_is_general = target_is_general
-        self.graph = build_analysis_graph(llm, mcp_client, provider)
-        self.graph.get_graph(xray=False).draw_mermaid_png(
-            background_color="white",
-            output_file_path=datetime.datetime.now().strftime("analysis_agent_graph_%Y%m%d_%H%M%S.png")
-        )
+        # Chunks analyzed concurrently within one batch of a worker
+        self.max_concurrency = max(1, max_concurrency or ANALYSIS_BATCH_CONCURRENCY)
+        # Chunks are packed up to this many estimated tokens (0 = MAX_CHUNK_SIZE characters)
+        self.token_budget = max(0, token_budget if token_budget is not None else ANALYSIS_CHUNK_TOKEN_BUDGET)
+        # Compiled graph is shared across agents; only draw it when first built
+        self.graph, newly_built = get_analysis_graph(llm, mcp_client, provider, checkpointer)
+        # Rendering calls out to mermaid.ink, so it is opt-in (EXPORT_GRAPH=1)
+        if newly_built and os.getenv("EXPORT_GRAPH", "").lower() not in ("", "0", "false"):
+            self.export_graph()
+
+    def export_graph(self, path: str | None = None) -> None:
+        """
+        Render the analysis graph as a Mermaid PNG
 
+        Args:
+            path: Output file (default: analysis_agent_graph_<timestamp>.png)
+        """
+        try:
+            self.graph.get_graph(xray=False).draw_mermaid_png(
+                background_color="white",
+                output_file_path=path or datetime.datetime.now().strftime("analysis_agent_graph_%Y%m%d_%H%M%S.png")
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            print(f"⚠️  Could not render analysis graph diagram: {exc}")
 
     
-    async def analyze(self, project_title: str, worker_id: int = 0, worker_count: int = 1, callbacks: list | None = None) -> dict:
+    async def analyze(
+        self,
+        project_title: str,
+        worker_id: int = 0,
+        worker_count: int = 1,
+        callbacks: list | None = None,
+        elements: list | None = None,
+    ) -> dict:
         """
         Run analysis workflow
+
+        Safe to call concurrently on one agent: each call gets its own state and thread_id.
         
         Args:
             project_title: Project title for API
+            elements: Classified elements to analyze instead of fetching them
+                from the API or the classification file
         
         Returns:
             Analysis results
         """
         classification_file = self.classification_file
-        if self.classification_source == "json":
+        if self.classification_source == "json" and elements is None:
             default_file = Path("discovery_results") / f"{project_title}_discovery.json"
             classification_file = classification_file or str(default_file)
             print(f"📂 Using local discovery results: {classification_file}")
 
-        print(f"[DEBUG] Starting AnalysisAgent.analyze for worker={worker_id} of {worker_count}")
+        log.debug("Starting AnalysisAgent.analyze for worker=%d of %d", worker_id, worker_count)
+        thread_id = f"analysis::{project_title}::{uuid.uuid4().hex}"
         initial_state: AnalysisState = {
             "project_title": project_title,
+            "run_id": thread_id,
             "classification_source": self.classification_source,
             "classification_file": classification_file,
             "ignore_previous_versions": self.ignore_previous_versions,
@@ -78,11 +117,19 @@ class AnalysisAgent:
             "system_prompt": self.system_prompt,
             "target_is_general": self.target_is_general,
             "classified_elements": [],
+            "element_keys": [],
+            "element_sizes": {},
             "total_elements": 0,
             "processed_count": 0,
             "current_batch": [],
+            "current_chunks": [],
+            "max_concurrency": self.max_concurrency,
+            "token_budget": self.token_budget,
             "analyzed_batch": [],
-            "all_analyzed": [],
+            "failed_batch": [],
+            "analyzed_total": 0,
+            "severity_counts": {},
+            "cwe_counts": {},
             "analyzed_keys": set(),
             "failed_elements": [],
             "failed_retry_count": 0,
@@ -90,20 +137,12 @@ class AnalysisAgent:
             "current_stage": "init",
             "worker_id": worker_id,
             "worker_count": worker_count,
+            "preloaded_elements": elements,
         }
-        print(f"[DEBUG] Initial failed_retry_count={initial_state['failed_retry_count']}, state_id={id(initial_state)}")
-        
-        # Run graph with sufficient recursion limit
-        # Calculation:
-        # - Worst case: 3 elements per batch (large JSON data)
-        # - 1500 elements ÷ 3 = 500 batches
-        # - Each batch: 5 nodes (prepare → analyze → save → check → loop)
-        # - Total: 500 batches × 5 nodes = 2500 iterations
-        # - Safety margin: 3000 (allows for some failed retries)
-        thread_id = f"analysis::{project_title}::{uuid.uuid4().hex}"
         
+        # The batch loop runs inside one node (run_all_batches), so the graph takes
+        # two steps regardless of the number of batches: no recursion_limit override
         invoke_config = {
-            "recursion_limit": 3000,
             "configurable": {
                 "thread_id": thread_id
             }
@@ -111,10 +150,20 @@ class AnalysisAgent:
         if callbacks:
             invoke_config["callbacks"] = callbacks
             
-        result = await self.graph.ainvoke(
-            initial_state,
-            config=invoke_config
-        )
+        try:
+            result = await self.graph.ainvoke(
+                initial_state,
+                config=invoke_config
+            )
+        finally:
+            # Loaded by the first graph build, so no extra import cost here
+            from .nodes import flush_pending_writes
+
+            # Result writes still queued when the run stopped early
+            await flush_pending_writes(thread_id)
+            # The shared graph outlives this run; drop its checkpoints so memory doesn't grow per run
+            if self.graph.checkpointer:
+                await self.graph.checkpointer.adelete_thread(thread_id)
         
         return {
             # "project_title": project_title,
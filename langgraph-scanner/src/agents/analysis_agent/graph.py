@@ -1,11 +1,15 @@
 """
 Analysis Agent - Detailed vulnerability analysis with taint flow
+
+langgraph (and the node module that pulls in langchain / the ReAct agent) is
+imported when a graph is first built, not when this package is imported.
 """
-from langgraph.graph import StateGraph, START, END
-from langgraph.types import Command
-from langgraph.checkpoint.memory import MemorySaver
 from ...models import AnalysisState
-from . import nodes
+
+# Compiled graphs keyed by (id(llm), id(mcp_client), provider, id(checkpointer)). The llm,
+# client and checkpointer are kept in the value so their ids cannot be recycled while
+# the entry is alive.
+_GRAPH_CACHE: dict = {}
 
 
 def build_analysis_graph(llm, mcp_client, provider: str = "unknown", checkpointer=None):
@@ -14,31 +18,38 @@ def build_analysis_graph(llm, mcp_client, provider: str = "unknown", checkpointe
     
     Workflow:
     1. fetch_classified: Fetch classified vulnerabilities from API
-    2. prepare_batch: Split into chunks for analysis
-    3. analyze_batch: Deep taint analysis with MCP tools
-    4. save_results: Save detailed analysis results
-    5. check_completion: Check if all elements analyzed
+    2. run_all_batches: Loop over batches until all elements are analyzed
+       a. prepare_batch: Split into chunks for analysis
+       b. analyze_batch: Deep taint analysis with MCP tools
+       c. save_results: Save detailed analysis results
+       d. check_completion: Check if all elements analyzed
     
     Args:
         llm: Language model instance
         mcp_client: MCP client for source code browsing
         provider: LLM provider name (google/groq/openai)
+        checkpointer: Optional checkpointer (e.g. MemorySaver, AsyncSqliteSaver).
+            Defaults to none: a run never resumes from or inspects its checkpoints,
+            and snapshotting the growing state after every node costs O(N^2) overall.
     
     Returns:
         Compiled StateGraph
     """
+    from langgraph.graph import StateGraph, START, END
+    from . import nodes
+
     workflow = StateGraph(AnalysisState)
     
-    # Create async wrapper for analyze_batch
-    async def analyze_batch_wrapper(state: AnalysisState):
-        return await nodes.analyze_batch(state, llm, mcp_client, provider)
+    # Create async wrapper for run_all_batches
+    async def run_all_batches_wrapper(state: AnalysisState):
+        return await nodes.run_all_batches(state, llm, mcp_client, provider)
     
     # Add nodes
-    workflow.add_node("fetch_classified", lambda state: nodes.fetch_classified(state))
-    workflow.add_node("prepare_batch", lambda state: nodes.prepare_batch(state))
-    workflow.add_node("analyze_batch", analyze_batch_wrapper)
-    workflow.add_node("save_results", lambda state: nodes.save_results(state))
-    workflow.add_node("check_completion", lambda state: nodes.check_completion(state))
+    # Async node: file reads go to worker threads and the API fetch awaits on the
+    # graph's own event loop instead of a nested asyncio.run
+    workflow.add_node("fetch_classified", nodes.fetch_classified)
+    # The batch loop runs as plain Python inside one node rather than as a graph cycle
+    workflow.add_node("run_all_batches", run_all_batches_wrapper)
     
     # Define edges
     workflow.add_edge(START, "fetch_classified")
@@ -48,24 +59,31 @@ def build_analysis_graph(llm, mcp_client, provider: str = "unknown", checkpointe
         "fetch_classified",
         lambda state: "continue" if state.get("current_stage") not in ["completed", "error"] else "done",
         {
-            "continue": "prepare_batch",
+            "continue": "run_all_batches",
             "done": END
         }
     )
     
-    workflow.add_edge("prepare_batch", "analyze_batch")
-    workflow.add_edge("analyze_batch", "save_results")
-    workflow.add_edge("save_results", "check_completion")
-    
-    # Conditional edge from check_completion
-    workflow.add_conditional_edges(
-        "check_completion",
-        lambda state: "continue" if state.get("current_stage") == "processing" else "done",
-        {
-            "continue": "prepare_batch",  # Loop back for next batch
-            "done": END
-        }
-    )
+    workflow.add_edge("run_all_batches", END)
     
-    memory = checkpointer or MemorySaver()
-    return workflow.compile(checkpointer=memory)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def get_analysis_graph(llm, mcp_client, provider: str = "unknown", checkpointer=None):
+    """
+    Return the compiled Analysis Agent graph for this llm/mcp_client/provider,
+    building it on first use and sharing it with every later caller.
+
+    The graph is stateless between runs (each run uses its own thread_id), so all
+    workers and categories of a run can share one compiled instance.
+
+    Returns:
+        Tuple of (compiled StateGraph, whether it was newly built)
+    """
+    key = (id(llm), id(mcp_client), provider, id(checkpointer))
+    cached = _GRAPH_CACHE.get(key)
+    if cached is not None:
+        return cached[3], False
+    graph = build_analysis_graph(llm, mcp_client, provider, checkpointer)
+    _GRAPH_CACHE[key] = (llm, mcp_client, checkpointer, graph)
+    return graph, True
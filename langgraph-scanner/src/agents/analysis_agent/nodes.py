@@ -3,10 +3,13 @@ Analysis Agent Nodes
 """
 import json
 import asyncio
+import logging
+import random
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from threading import Lock
-from typing import List, Dict, Any, Optional
+from typing import Awaitable, List, Dict, Any, Optional
 from langgraph.types import Command
 from langgraph.prebuilt import create_react_agent
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage, ToolMessage  # ✅ 추가
@@ -15,6 +18,7 @@ from ...utils import (
     fetch_classified_vulnerabilities,
     split_elements_into_chunks,
     get_chunk_stats,
+    measure_elements,
 )
 from ...config import (
     MAX_ANSWER_CHARS,
@@ -23,27 +27,217 @@ from ...config import (
     ANALYSIS_CONTEXT_WINDOW,
     ANALYSIS_RESPONSE_TOKEN_RESERVE,
     MAX_FAILED_RETRIES,
+    FAILED_RETRY_BACKOFF,
     VULNERABILITY_TYPE_DEFINITIONS,
 )
 from ...utils.rate_limiter import get_rate_limiter
+from ...utils.mcp_tools import get_mcp_tools
 from ...utils.logging import get_logger
 
 import json_repair
 
-def make_elem_key(elem: Dict[str, Any], target_label: Optional[str] = None) -> tuple[str, str, str]:
-    file_path = elem.get("file_path")
-    line_num = elem.get("line_num", "")
+try:
+    import orjson
+except ImportError:  # stdlib json로 대체
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import ijson
+except ImportError:  # 파일 전체를 한 번에 파싱
+    ijson = None  # type: ignore[assignment]
+
+def _normalize_line_num(line_num: Any) -> str:
+    # JSON/API 입력은 대부분 이미 문자열
+    if type(line_num) is str:
+        return line_num
     # slice도 문자열로 정규화
     if isinstance(line_num, slice):
         start = line_num.start if line_num.start is not None else ""
         stop = line_num.stop if line_num.stop is not None else ""
-        line_num_str = f"{start}-{stop}"
+        return f"{start}-{stop}"
+    return str(line_num) if line_num is not None else ""
+
+
+def make_elem_key(elem: Dict[str, Any], target_label: Optional[str] = None) -> tuple[str, str, str]:
+    return elem.get("file_path"), _normalize_line_num(elem.get("line_num", "")), target_label or ""
+
+
+# One lock per result file (resolved path); a latest file's lock also covers its
+# pending .jsonl companion. Writers of different files no longer wait on each other.
+_PATH_LOCKS: Dict[str, Lock] = {}
+_PATH_LOCKS_GUARD = Lock()
+
+
+def _lock_for(path: Path) -> Lock:
+    key = str(path.resolve())
+    with _PATH_LOCKS_GUARD:
+        lock = _PATH_LOCKS.get(key)
+        if lock is None:
+            lock = _PATH_LOCKS[key] = Lock()
+    return lock
+
+
+# Debug traces of the batch loop (LOG_LEVEL=DEBUG); progress output stays on print
+log = logging.getLogger(__name__)
+
+# Compiled ReAct executors keyed by (id(llm), tool ids). The llm and tools are kept in
+# the value so their ids cannot be recycled while the entry is alive.
+_REACT_AGENT_CACHE: Dict[tuple, tuple] = {}
+
+
+def _get_react_agent(llm, tools: List[Any]):
+    """
+    Return a compiled ReAct agent for this llm + tool set, shared by every batch and
+    worker of the run instead of being recompiled per batch.
+    """
+    key = (id(llm), tuple(id(tool) for tool in tools))
+    cached = _REACT_AGENT_CACHE.get(key)
+    if cached is None:
+        cached = (llm, list(tools), create_react_agent(llm, tools))
+        _REACT_AGENT_CACHE[key] = cached
+    return cached[2]
+
+
+def _loads_json(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _loads_json_lenient(data: bytes) -> Any:
+    """Parse with the fast parser; only a damaged file (e.g. interrupted write) goes to json_repair"""
+    try:
+        return _loads_json(data)
+    except ValueError:
+        return json_repair.loads(data.decode('utf-8', errors='replace'))
+
+
+def _dump_json_line(item: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _encode_array_item(item: Any) -> bytes:
+    """Encode one element as it appears inside json.dump(..., indent=2) of a list."""
+    if orjson is not None:
+        encoded = orjson.dumps(item, option=orjson.OPT_INDENT_2)
     else:
-        line_num_str = str(line_num) if line_num is not None else ""
-    return file_path, line_num_str, target_label or ""
+        encoded = json.dumps(item, ensure_ascii=False, indent=2).encode("utf-8")
+    # JSON strings cannot hold raw newlines, so every newline is a line break
+    return b"  " + encoded.replace(b"\n", b"\n  ")
+
+
+def _write_json_array(f, items: List[Any]) -> None:
+    """Stream a JSON array to binary file `f` one element at a time."""
+    if not items:
+        f.write(b"[]")
+        return
+    f.write(b"[\n")
+    for index, item in enumerate(items):
+        if index:
+            f.write(b",\n")
+        f.write(_encode_array_item(item))
+    f.write(b"\n]")
+
+
+def _pending_results_file(latest_file: Path) -> Path:
+    """Append-only companion of `{project}_latest.json` holding not yet compacted results."""
+    return latest_file.with_suffix(".jsonl")
+
+
+def _append_pending_results(latest_file: Path, results: List[Dict[str, Any]]) -> None:
+    """Append one JSON line per result; caller holds _lock_for(latest_file)."""
+    with open(_pending_results_file(latest_file), 'ab') as f:
+        f.write(b"".join(_dump_json_line(result) for result in results))
+
+
+def _write_failed_elements(failed_file: Path, failed_elements: List[Dict[str, Any]]) -> None:
+    """Save elements that failed every retry as a JSON array the classification loader accepts"""
+    with _lock_for(failed_file):
+        with open(failed_file, 'wb') as f:
+            _write_json_array(f, failed_elements)
+
+
+def _load_pending_results(latest_file: Path) -> List[Dict[str, Any]]:
+    """Read results appended since the last compaction; caller holds _lock_for(latest_file)."""
+    pending_file = _pending_results_file(latest_file)
+    if not pending_file.exists():
+        return []
+    results = []
+    with open(pending_file, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                results.append(_loads_json(line))
+            except ValueError:
+                # Partial last line of an interrupted run
+                print(f"   ⚠️ Skipping unreadable line in {pending_file.name}")
+    return results
 
 
-FILE_IO_LOCK = Lock()
+def _splice_into_json_array(path: Path, items: List[Dict[str, Any]]) -> bool:
+    """
+    Append items to the JSON array in `path` in place, before its closing bracket.
+
+    The already saved elements are kept as serialized text instead of being parsed
+    and dumped again; only the new items are encoded. Output matches
+    json.dump(..., indent=2). Returns False when the file does not end in a JSON array.
+    """
+    with open(path, 'r+b') as f:
+        size = f.seek(0, 2)
+        tail_start = max(0, size - 4096)
+        f.seek(tail_start)
+        tail = f.read().rstrip()
+        if not tail.endswith(b"]"):
+            return False
+        before = tail[:-1].rstrip()
+        if not before:
+            return False
+        separator = b"\n" if before.endswith(b"[") else b",\n"
+        f.seek(tail_start + len(before))
+        f.write(separator + b",\n".join(_encode_array_item(item) for item in items) + b"\n]")
+        f.truncate()
+    return True
+
+
+def _compact_latest_results(latest_file: Path) -> int:
+    """
+    Fold the pending JSON lines into the cumulative latest file and drop them.
+
+    Returns:
+        Number of results moved into the latest file
+    """
+    with _lock_for(latest_file):
+        pending = _load_pending_results(latest_file)
+        if not pending:
+            return 0
+        if latest_file.exists() and _splice_into_json_array(latest_file, pending):
+            _pending_results_file(latest_file).unlink()
+            return len(pending)
+        existing_results = []
+        if latest_file.exists():
+            try:
+                # Salvage what json_repair can rather than dropping earlier results
+                existing_results = _loads_json_lenient(latest_file.read_bytes())
+            except Exception as e:
+                print(f"   ⚠️ Failed to load existing latest file: {e}")
+                existing_results = []
+            if not isinstance(existing_results, list):
+                existing_results = []
+        existing_results.extend(pending)
+        with open(latest_file, 'wb') as f:
+            _write_json_array(f, existing_results)
+        _pending_results_file(latest_file).unlink()
+    return len(pending)
+
+
+def _read_latest_results(latest_file: Path) -> tuple[bytes, List[Dict[str, Any]]]:
+    """Raw latest file contents and the pending results not yet compacted into it"""
+    with _lock_for(latest_file):
+        raw_contents = latest_file.read_bytes() if latest_file.exists() else b""
+        return raw_contents, _load_pending_results(latest_file)
 
 
 def _is_json_classification_mode(state: AnalysisState) -> bool:
@@ -51,19 +245,92 @@ def _is_json_classification_mode(state: AnalysisState) -> bool:
     return isinstance(source, str) and source.lower() == "json"
 
 
+# Type named in the error when a root object's "elements" is not a list
+_IJSON_EVENT_TYPES = {
+    "start_map": "dict",
+    "string": "str",
+    "number": "float",
+    "boolean": "bool",
+    "null": "NoneType",
+}
+
+
+def _stream_classified_elements(path: Path) -> Optional[List[VulnerabilityElement]]:
+    """
+    Stream-filter the elements of a classification file with ijson, so only the
+    kept elements are held in memory, never the whole parsed payload.
+
+    Returns:
+        Classified elements, or None if ijson is unavailable or the root is not an
+        array / object (left to the full parse and its error)
+    """
+    if ijson is None:
+        return None
+    with path.open("rb") as handle:
+        head = handle.read(4096).lstrip()
+        if head[:1] == b"[":
+            prefix = "item"
+        elif head[:1] == b"{":
+            prefix = "elements.item"
+        else:
+            return None
+        handle.seek(0)
+        # First parse event of the root "elements" value (None if the key is missing)
+        elements_event: List[Optional[str]] = [None]
+
+        def watch(events):
+            for event_prefix, event, value in events:
+                if event_prefix == "elements" and elements_event[0] is None and event != "map_key":
+                    elements_event[0] = event
+                yield event_prefix, event, value
+
+        classified = [
+            elem for elem in ijson.items(watch(ijson.parse(handle, use_float=True)), prefix)
+            if elem.get("vulnerability_types")
+        ]
+    if prefix == "elements.item" and elements_event[0] != "start_array":
+        # Same error as the full parse: the payload (or its "elements") is not a list
+        found = _IJSON_EVENT_TYPES.get(elements_event[0], "dict")
+        raise ValueError(f"Classification file must contain a list, got {found}")
+    return classified
+
+
 def _load_classified_elements_from_file(file_path: str) -> List[VulnerabilityElement]:
     path = Path(file_path)
-    with path.open("r", encoding="utf-8") as handle:
-        payload = json.load(handle)
-    if isinstance(payload, dict) and "elements" in payload:
-        payload = payload["elements"]
-    if not isinstance(payload, list):
-        raise ValueError(f"Classification file must contain a list, got {type(payload).__name__}")
-    classified = [elem for elem in payload if elem.get("vulnerability_types")]
+    classified = _stream_classified_elements(path)
+    if classified is None:
+        payload = _loads_json(path.read_bytes())
+        if isinstance(payload, dict) and "elements" in payload:
+            payload = payload["elements"]
+        if not isinstance(payload, list):
+            raise ValueError(f"Classification file must contain a list, got {type(payload).__name__}")
+        classified = [elem for elem in payload if elem.get("vulnerability_types")]
     print(f"   ✅ Loaded {len(classified)} classified elements from {path}")
     return classified
 
 
+# Every worker and category of a run reads the same classification file; the lock
+# makes concurrent first readers wait for one parse instead of each parsing it
+_CLASSIFICATION_LOAD_LOCK = Lock()
+
+
+@lru_cache(maxsize=4)
+def _load_classified_elements_at(file_path: str, mtime_ns: int, size: int) -> tuple:
+    """Parsed classification file for one (path, mtime, size) version of it"""
+    return tuple(_load_classified_elements_from_file(file_path))
+
+
+def _load_classified_elements_cached(file_path: str) -> List[VulnerabilityElement]:
+    """
+    Classified elements of a classification file, parsed once per file version
+
+    Returns a new list each call; the element dicts are shared between callers.
+    """
+    stat = Path(file_path).stat()
+    with _CLASSIFICATION_LOAD_LOCK:
+        return list(_load_classified_elements_at(file_path, stat.st_mtime_ns, stat.st_size))
+
+
 def _write_empty_result_files(project_title: str) -> Path:
     """
     Ensure analysis result files exist even when no vulnerabilities are found.
@@ -76,17 +343,18 @@ def _write_empty_result_files(project_title: str) -> Path:
     output_file = output_dir / f"{project_title}_{timestamp}_analysis.json"
     latest_file = output_dir / f"{project_title}_latest.json"
 
-    with FILE_IO_LOCK:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
-            
+    with _lock_for(output_file):
+        with open(output_file, 'wb') as f:
+            _write_json_array(f, [])
+
+    with _lock_for(latest_file):
         # ⚠️ CRITICAL SENSITIVITY FIX:
         # Do NOT overwrite latest.json if it already exists!
         # This prevents a situation where a worker with 0 assignments (empty batch)
         # wipes out the results of other workers running in parallel.
         if not latest_file.exists():
-            with open(latest_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
+            with open(latest_file, 'wb') as f:
+                _write_json_array(f, [])
         else:
             # We don't overwrite, but we acknowledge it exists
             pass
@@ -230,14 +498,19 @@ Do not read the same file or symbol multiple times. Only expand the read window
 """
 
 
-def _build_system_prompt(state: AnalysisState, max_tool_calls: int) -> str:
-    """
-    Build the system prompt with optional CWE-specific focus and user-provided prefix.
-    """
-    custom_prefix = state.get("system_prompt")
-    target_label = state.get("target_label")
-    target_cwe = state.get("target_cwe")
+@lru_cache(maxsize=8)
+def _render_base_prompt(max_tool_calls: int) -> str:
+    """Format the static base prompt once per tool-call budget."""
+    return BASE_ANALYSIS_SYSTEM_PROMPT.strip().format(max_calls=max_tool_calls)
+
 
+@lru_cache(maxsize=128)
+def _compose_system_prompt(
+    custom_prefix: Optional[str],
+    target_label: Optional[str],
+    target_cwe: Optional[str],
+    max_tool_calls: int,
+) -> str:
     focus_lines: Optional[str] = None
     if target_label:
         cwe_fragment = f" ({target_cwe})" if target_cwe else ""
@@ -252,14 +525,47 @@ def _build_system_prompt(state: AnalysisState, max_tool_calls: int) -> str:
         parts.append(custom_prefix.strip())
     if focus_lines:
         parts.append(focus_lines)
-    parts.append(BASE_ANALYSIS_SYSTEM_PROMPT.strip())
+    # Only the base template has placeholders; prefixes are inserted verbatim
+    parts.append(_render_base_prompt(max_tool_calls))
+
+    return "\n\n".join(part for part in parts if part)
+
+
+def _build_system_prompt(state: AnalysisState, max_tool_calls: int) -> str:
+    """
+    Build the system prompt with optional CWE-specific focus and user-provided prefix.
+
+    The result depends only on the category and tool budget, so it is composed once
+    per category and reused for every batch and worker.
+    """
+    return _compose_system_prompt(
+        state.get("system_prompt"),
+        state.get("target_label"),
+        state.get("target_cwe"),
+        max_tool_calls,
+    )
 
-    prompt = "\n\n".join(part for part in parts if part)
-    return prompt.format(max_calls=max_tool_calls)
 
 
+@lru_cache(maxsize=128)
+def _system_prompt_message(system_prompt: str, provider: str) -> SystemMessage:
+    """
+    One SystemMessage per prompt and provider, shared by every batch and worker.
 
-def fetch_classified(state: AnalysisState) -> Command:
+    Provider prompt caches key on an identical leading prefix, so the system prompt
+    always goes first and is built once. Anthropic only caches blocks marked with
+    cache_control; OpenAI-style providers cache long prefixes automatically.
+    """
+    if provider == "anthropic":
+        return SystemMessage(content=[{
+            "type": "text",
+            "text": system_prompt,
+            "cache_control": {"type": "ephemeral"},
+        }])
+    return SystemMessage(content=system_prompt)
+
+
+async def fetch_classified(state: AnalysisState) -> Command:
     """
     Fetch classified vulnerability elements from API (excluding already analyzed ones)
     """
@@ -287,7 +593,11 @@ def fetch_classified(state: AnalysisState) -> Command:
     
     print(f"\n📥 Fetching classified vulnerabilities for project: {project_title} (worker {worker_id + 1}/{worker_count})")
     
-    if _is_json_classification_mode(state):
+    preloaded_elements = state.get("preloaded_elements")
+    if preloaded_elements is not None:
+        classified_elements = [elem for elem in preloaded_elements if elem.get("vulnerability_types")]
+        print(f"   ✅ Received {len(classified_elements)} classified elements from discovery")
+    elif _is_json_classification_mode(state):
         if not classification_file:
             print("❌ No classification file configured for JSON mode")
             return Command(
@@ -314,7 +624,7 @@ def fetch_classified(state: AnalysisState) -> Command:
                 }
             )
         try:
-            classified_elements = _load_classified_elements_from_file(str(path))
+            classified_elements = await asyncio.to_thread(_load_classified_elements_cached, str(path.resolve()))
         except Exception as exc:
             print(f"❌ Failed to load classification file: {exc}")
             return Command(
@@ -329,18 +639,15 @@ def fetch_classified(state: AnalysisState) -> Command:
             )
     else:
         # Fetch from API
-        async def fetch():
-            return await fetch_classified_vulnerabilities(project_title)
-
-        classified_elements = asyncio.run(fetch())
+        classified_elements = await fetch_classified_vulnerabilities(project_title)
         print(f"   ✅ Fetched {len(classified_elements)} classified elements from API")
 
     if target_is_general:
-        specific_labels = [
+        specific_labels = frozenset(
             definition.label
             for definition in VULNERABILITY_TYPE_DEFINITIONS.values()
             if not definition.is_general and definition.label != "NO"
-        ]
+        )
 
         def include_general(elem: Dict[str, Any]) -> bool:
             vuln_types = elem.get("vulnerability_types") or []
@@ -348,7 +655,7 @@ def fetch_classified(state: AnalysisState) -> Command:
                 return False
             if "NO" in vuln_types:
                 return False
-            return not any(v_type in specific_labels for v_type in vuln_types)
+            return specific_labels.isdisjoint(vuln_types)
 
         before_filter = len(classified_elements)
         classified_elements = [
@@ -379,18 +686,18 @@ def fetch_classified(state: AnalysisState) -> Command:
     ignore_previous = state.get("ignore_previous_versions", False)
     if ignore_previous:
         print("   ℹ️  --ignore-previous-versions enabled - not loading local latest.json cache")
-    elif latest_file.exists():
+    elif latest_file.exists() or _pending_results_file(latest_file).exists():
         try:
-            with FILE_IO_LOCK:
-                with open(latest_file, 'r', encoding='utf-8') as f:
-                    raw_contents = f.read()
+            raw_contents, pending_results = await asyncio.to_thread(_read_latest_results, latest_file)
             if raw_contents.strip():
-                local_analyzed = json_repair.loads(raw_contents)
+                local_analyzed = _loads_json_lenient(raw_contents)
             else:
                 local_analyzed = []
+            # Results of an earlier run that stopped before compacting its appends
+            local_analyzed = list(local_analyzed) + pending_results
             
             # DEBUG: Print actual counts
-            print(f"   🔍 DEBUG: Loaded {len(local_analyzed)} total items from JSON file")
+            log.debug("Loaded %d total items from JSON file", len(local_analyzed))
             
             # Extract (file_path, line_number) from local results
             items_with_location = 0
@@ -416,7 +723,7 @@ def fetch_classified(state: AnalysisState) -> Command:
                         already_analyzed_keys.add(make_elem_key(elem, target_label))
             
             local_count = len(already_analyzed_keys)
-            print(f"   🔍 DEBUG: {items_with_location} items with 'location', {items_with_valid_keys} with valid keys")
+            log.debug("%d items with 'location', %d with valid keys", items_with_location, items_with_valid_keys)
             print(f"   📂 Loaded {local_count} already-analyzed items from {latest_file.name}")
         except Exception as e:
             print(f"   ⚠️  Could not load local results: {e}")
@@ -424,50 +731,47 @@ def fetch_classified(state: AnalysisState) -> Command:
     else:
         print(f"   ℹ️  No previous results found - starting fresh")
     
-    # Also check API response for analysis_result field (fallback)
+    # One pass over the elements, one key each:
+    # - "NO" classifications (not actual vulnerabilities) are excluded
+    # - analysis_result from the API marks an element as analyzed (fallback to the local file)
+    # - elements already in the local results are skipped
     api_analyzed_keys = set()
+    no_count = 0
+    remaining: List[tuple] = []
     for elem in classified_elements:
-        if elem.get("analysis_result") and "NO" not in elem.get("vulnerability_types", []):
-            api_analyzed_keys.add(make_elem_key(elem, target_label))
-
+        if "NO" in elem.get('vulnerability_types', []):
+            no_count += 1
+            continue
+        key = make_elem_key(elem, target_label)
+        if elem.get("analysis_result"):
+            api_analyzed_keys.add(key)
+        elif key not in already_analyzed_keys:
+            remaining.append((elem, key))
     
     api_count = len(api_analyzed_keys)
     
+    # A duplicate of an element the API reports as analyzed may precede it in the list
+    if api_analyzed_keys:
+        remaining = [(elem, key) for elem, key in remaining if key not in api_analyzed_keys]
+    
     # Combine both sources
     already_analyzed_keys.update(api_analyzed_keys)
     
-    # Filter out elements with "NO" vulnerability type (not actual vulnerabilities)
-    # "NO" means the element was classified as not containing a vulnerability
-    no_classifications = [
-        elem for elem in classified_elements
-        if "NO" in elem.get('vulnerability_types', [])
-    ]
-    
-    print(f"   🔍 Found {len(no_classifications)} elements with 'NO' classification (will be excluded)")
-    
-    # Filter out:
-    # 1. Elements with "NO" vulnerability type (not real vulnerabilities)
-    # 2. Elements that are already analyzed (in already_analyzed_keys)
-    vuln_elements = [
-        elem for elem in classified_elements
-        if "NO" not in elem.get('vulnerability_types', [])  # Exclude NO classifications
-        and (elem.get('file_path'), str(elem.get('line_num', ''))) not in already_analyzed_keys  # Exclude already analyzed
-    ]
+    print(f"   🔍 Found {no_count} elements with 'NO' classification (will be excluded)")
 
     if worker_count > 1:
-        distributed: List[Dict[str, Any]] = []
-        for idx, elem in enumerate(vuln_elements):
-            if idx % worker_count == worker_id:
-                distributed.append(elem)
-        print(f"   ⚙️  Worker {worker_id + 1}/{worker_count} assigned {len(distributed)} elements")
-        vuln_elements = distributed
+        # Same round-robin assignment as idx % worker_count == worker_id, as one slice
+        remaining = remaining[worker_id::worker_count]
+        print(f"   ⚙️  Worker {worker_id + 1}/{worker_count} assigned {len(remaining)} elements")
+    vuln_elements = [elem for elem, _ in remaining]
+    vuln_keys = [key for _, key in remaining]
     
     # Print detailed summary
     print(f"\n{'='*80}")
     print(f"📊 ANALYSIS SUMMARY")
     print(f"{'='*80}")
     print(f"Total elements from API:           {len(classified_elements)}")
-    print(f"  - 'NO' classifications:          {len(no_classifications)}")
+    print(f"  - 'NO' classifications:          {no_count}")
     print(f"  - Already analyzed (local file): {local_count}")
     print(f"  - Already analyzed (from DB):    {api_count}")
     print(f"  - Total already completed:       {len(already_analyzed_keys)}")
@@ -476,7 +780,7 @@ def fetch_classified(state: AnalysisState) -> Command:
     
     if len(vuln_elements) == 0:
         # User requirement: Create empty file if no vulnerabilities
-        _write_empty_result_files(project_title)
+        await asyncio.to_thread(_write_empty_result_files, project_title)
         
         print("✅ No vulnerabilities to analyze - All work complete!")
         return Command(
@@ -494,6 +798,9 @@ def fetch_classified(state: AnalysisState) -> Command:
     return Command(
         update={
             "classified_elements": vuln_elements,
+            "element_keys": vuln_keys,
+            # Serialized size per element, measured once for every later prepare_batch
+            "element_sizes": dict(zip(vuln_keys, measure_elements(vuln_elements))),
             "total_elements": len(vuln_elements),
             "processed_count": state.get('processed_count', 0),
             "analyzed_keys": already_analyzed_keys,  # Pre-populate with already analyzed items
@@ -506,6 +813,16 @@ def fetch_classified(state: AnalysisState) -> Command:
     )
 
 
+def _classified_keys(state: AnalysisState) -> List[tuple]:
+    """make_elem_key of every classified element, as computed by fetch_classified"""
+    classified_elements = state.get('classified_elements', [])
+    keys = state.get('element_keys')
+    if keys is None or len(keys) != len(classified_elements):
+        target_label = state.get('target_label')
+        keys = [make_elem_key(elem, target_label) for elem in classified_elements]
+    return keys
+
+
 def prepare_batch(state: AnalysisState) -> Command:
     """
     Prepare next batch for analysis (excluding items already analyzed or failed)
@@ -520,28 +837,26 @@ def prepare_batch(state: AnalysisState) -> Command:
     # Filter out items already analyzed OR failed
     failed_keys = {make_elem_key(elem, target_label) for elem in failed_elements}
     
-    print(f"\n🔧 PREPARE_BATCH DEBUG:")
-    print(f"   - Input: {len(classified_elements)} elements total")
-    print(f"   - Successfully analyzed: {len(analyzed_keys)} items")
-    print(f"   - Failed (skipping): {len(failed_keys)} items")
-    print(f"   - processed_count: {processed_count}/{total_elements}")
+    log.debug(
+        "prepare_batch: input=%d analyzed=%d failed=%d processed_count=%d/%d",
+        len(classified_elements), len(analyzed_keys), len(failed_keys), processed_count, total_elements,
+    )
     
 
 
-    unanalyzed_elements = [
-        elem for elem in classified_elements
-        if make_elem_key(elem, target_label) not in analyzed_keys
-        and make_elem_key(elem, target_label) not in failed_keys
-    ]
-        
-    skipped_analyzed = len([
-        elem for elem in classified_elements
-        if make_elem_key(elem, target_label) in analyzed_keys
-    ])
-    skipped_failed = len([
-        elem for elem in classified_elements
-        if make_elem_key(elem, target_label) in failed_keys
-    ])
+    # Keys come precomputed from fetch_classified; one pass splits the elements
+    unanalyzed_elements: List[Dict[str, Any]] = []
+    unanalyzed_keys: List[tuple] = []
+    skipped_analyzed = 0
+    skipped_failed = 0
+    for elem, key in zip(classified_elements, _classified_keys(state)):
+        if key in analyzed_keys:
+            skipped_analyzed += 1
+        elif key in failed_keys:
+            skipped_failed += 1
+        else:
+            unanalyzed_elements.append(elem)
+            unanalyzed_keys.append(key)
     
     if skipped_analyzed > 0 or skipped_failed > 0:
         print(f"   🔍 Skipped: {skipped_analyzed} analyzed + {skipped_failed} failed = {skipped_analyzed + skipped_failed} total")
@@ -555,8 +870,26 @@ def prepare_batch(state: AnalysisState) -> Command:
             }
         )
     
-    # Split into chunks
-    chunks = split_elements_into_chunks(unanalyzed_elements)
+    # Take as many chunks as may be analyzed concurrently; analyze_batch fans them out
+    max_concurrency = max(1, int(state.get('max_concurrency', 1) or 1))
+    
+    # Split into chunks. With concurrent chunks the batch waits for the slowest one,
+    # so mix large and small elements to keep chunk sizes (and latencies) even
+    element_sizes = state.get('element_sizes') or {}
+    lengths = [element_sizes.get(key) for key in unanalyzed_keys]
+    if None in lengths:
+        lengths = measure_elements(unanalyzed_elements)
+    if state.get('failed_retry_count', 0):
+        # Retry pass: one element per chunk so a persistently failing element
+        # cannot take the rest of its chunk down with it again
+        chunks = [[elem] for elem in unanalyzed_elements]
+    else:
+        chunks = split_elements_into_chunks(
+            unanalyzed_elements,
+            max_tokens=state.get('token_budget') or None,
+            interleave=max_concurrency > 1,
+            lengths=lengths,
+        )
     
     if not chunks:
         return Command(
@@ -567,14 +900,19 @@ def prepare_batch(state: AnalysisState) -> Command:
         )
     
     # Get statistics
-    stats = get_chunk_stats(chunks)
+    # A chunk's JSON is "[" + ", ".join(elements) + "]"
+    size_by_id = {id(elem): length for elem, length in zip(unanalyzed_elements, lengths)}
+    stats = get_chunk_stats(
+        chunks,
+        json_lengths=[sum(size_by_id[id(elem)] for elem in chunk) + 2 * len(chunk) for chunk in chunks],
+    )
     print(f"\n📦 Chunking stats:")
     print(f"   - Total chunks: {stats['num_chunks']}")
     print(f"   - Elements per chunk: {stats['min_chunk_size']}-{stats['max_chunk_size']} (avg: {stats['avg_chunk_size']:.1f})")
     print(f"   - JSON length per chunk: {stats['min_json_length']}-{stats['max_json_length']} (avg: {stats['avg_json_length']:.0f})")
     
-    # Take first chunk as current batch
-    current_batch = chunks[0]
+    current_chunks = chunks[:max_concurrency]
+    current_batch = [elem for chunk in current_chunks for elem in chunk]
     
     processed_count = state.get('processed_count', 0)
     total_elements = state.get('total_elements', 0)
@@ -582,7 +920,7 @@ def prepare_batch(state: AnalysisState) -> Command:
     print(f"\n🔄 Analyzing batch: {processed_count + len(current_batch)}/{total_elements} ({(processed_count + len(current_batch)) / total_elements * 100:.1f}%)")
     
     print(f"\n🔧 PREPARE_BATCH OUTPUT:")
-    print(f"   - current_batch: {len(current_batch)} elements")
+    print(f"   - current_batch: {len(current_batch)} elements in {len(current_chunks)} chunk(s)")
     print(f"   - unanalyzed remaining: {len(unanalyzed_elements) - len(current_batch)} elements")
     
     # ✅ Keep original classified_elements, don't modify it
@@ -590,6 +928,7 @@ def prepare_batch(state: AnalysisState) -> Command:
     return Command(
         update={
             "current_batch": current_batch,
+            "current_chunks": current_chunks,
             # classified_elements stays the same - filtering happens via analyzed_keys
             "current_stage": "prepared"
         }
@@ -656,41 +995,125 @@ def _coerce_system_history(history: Any, keep_last: int = 4) -> List[AIMessage]:
     return coerced
 
 
-async def analyze_batch(state: AnalysisState, llm, mcp_client, provider: str = "unknown") -> Command:
+async def _get_analysis_tools(mcp_client) -> List[Any]:
     """
-    Perform deep vulnerability analysis for current batch using LLM + MCP
-    
-    Args:
-        state: Current state
-        llm: Language model instance
-        mcp_client: MCP client for tools
-        provider: LLM provider (google/groq/openai)
+    Fetch the MCP tools the analysis agent may use (block list applied).
     """
-    # Initialize logger at the start so it's available everywhere
-    logger = get_logger()
-    
-    current_batch = state.get('current_batch', [])
-    
-    if not current_batch:
-        return Command(
-            update={
-                "analyzed_batch": [],
-                "current_stage": "analyzed"
-            }
-        )
-    
-    processed_count = state.get('processed_count', 0)
-    total_elements = state.get('total_elements', 0)
-    
-    print(f"\n🔬 Analyzing batch ({len(current_batch)} elements)...")
-    print(f"   Progress: {processed_count}/{total_elements} ({processed_count / total_elements * 100:.1f}%)")
-    max_tool_calls = AGENT_MAX_TOOL_CALLS
+    tools: List[Any] = []
+    if not mcp_client:
+        return tools
+    try:
+        print(f"\n{'='*80}")
+        print(f"🔧 MCP TOOLS BINDING")
+        print(f"{'='*80}")
+        
+        # Get MCP tools (fetched once per client and cached)
+        all_tools = await get_mcp_tools(mcp_client)
+        print("🔍 Retrieved MCP tools:")
+        print("\n".join(f"  {i}. {tool.name}" for i, tool in enumerate(all_tools, 1)))
+        
+        # ============================================================
+        # TOOL FILTERING: Control which tools the agent can use
+        # ============================================================
+        # Option 1: ALLOW_LIST - Only allow specific tools (recommended for focused analysis)
+        ALLOWED_TOOLS = [
+            "list_dir",
+            "read_file",
+            "search_for_pattern",
+            "find_symbol",
+            "get_symbols_overview",
+            # "get_file_structure",
+            # "search_symbol_references",
+            # "get_declaration_location",
+            # Add more tools as needed
+        ]
+        
+        # Option 2: BLOCK_LIST - Block specific tools (use this if you want most tools)
+        BLOCKED_TOOLS = [
+            # "expensive_tool",
+            # "slow_tool",
+            # Add tools you want to block
+            "activate_project",
+            "replace_symbol_body", "insert_after_symbol", "insert_before_symbol", "write_memory", "read_memory", "list_memories", "delete_memory", "execute_shell_command", "switch_modes", "get_current_config", "check_onboarding_performed", "onboarding", "think_about_collected_information", "think_about_task_adherence", "think_about_whether_you_are_done", "prepare_for_new_conversation"
+        ]
+        # ['read_file', 'create_text_file', 'list_dir', 'find_file', 'replace_regex', 'search_for_pattern', 'get_symbols_overview', 'find_symbol', 'find_referencing_symbols', 'replace_symbol_body', 'insert_after_symbol', 'insert_before_symbol', 'write_memory', 'read_memory', 'list_memories', 'delete_memory', 'execute_shell_command', 'activate_project', 'switch_modes', 'get_current_config', 'check_onboarding_performed', 'onboarding', 'think_about_collected_information', 'think_about_task_adherence', 'think_about_whether_you_are_done', 'prepare_for_new_conversation']
+        # Apply filtering
+        # Uncomment ONE of the following:
+        
+        # Use ALLOW_LIST (recommended - only specified tools allowed)
+        # tools = [tool for tool in all_tools if tool.name in ALLOWED_TOOLS]
+        
+        # Use BLOCK_LIST (allows all except blocked ones)
+        tools = [tool for tool in all_tools if tool.name not in BLOCKED_TOOLS]
+        
+        # No filtering (use all tools)
+        # tools = all_tools
+        
+    #     if tools:
+    #         llm_with_tools = llm.bind_tools(tools)
+    #         print(f"✅ Successfully bound {len(tools)} MCP tools to LLM")
+    #         print(f"   (Filtered from {len(all_tools)} total available tools)")
+    #         print(f"\nAllowed tools:")
+    #         for i, tool in enumerate(tools, 1):
+    #             print(f"  {i}. {tool.name}")
+            
+    #         if len(all_tools) > len(tools):
+    #             blocked = [t.name for t in all_tools if t not in tools]
+    #             print(f"\n🚫 Blocked tools ({len(blocked)}):")
+    #             for tool_name in blocked[:5]:
+    #                 print(f"  • {tool_name}")
+    #             # if len(blocked) > 5:
+    #                 # print(f"  ... and {len(blocked) - 5} more")
+    #     else:
+    #         print(f"⚠️  No MCP tools available after filtering")
+    #     print(f"{'='*80}\n")
+    except Exception as e:
+        print(f"\n{'='*80}")
+        print(f"❌ MCP TOOLS BINDING FAILED")
+        print(f"{'='*80}")
+        print(f"Error: {e}")
+        print(f"Error type: {type(e).__name__}")
+        import traceback
+        print(f"\nFull traceback:")
+        traceback.print_exc()
+        print(f"{'='*80}\n")
+        tools = []
+        # Continue without MCP tools
+    return tools
+
+
+def _chunk_outcome(
+    analyzed: List[Dict[str, Any]],
+    message: Optional[str] = None,
+    summary: Optional[AIMessage] = None,
+) -> Dict[str, Any]:
+    """Result of analyzing one chunk; an empty `analyzed` list means the chunk failed."""
+    return {
+        "analyzed": analyzed,
+        "messages": [message] if message else [],
+        "summary": summary,
+    }
+
+
+async def _analyze_chunk(
+    current_batch: List[Dict[str, Any]],
+    llm,
+    tools: List[Any],
+    provider: str,
+    short_instruction: str,
+    target_label: Optional[str],
+    previous_history: Any,
+) -> Dict[str, Any]:
+    """
+    Run the ReAct agent over one chunk of elements and parse its findings.
 
-    short_instruction = _build_system_prompt(state, max_tool_calls)
+    Returns:
+        Outcome dict from _chunk_outcome
+    """
+    logger = get_logger()
 
     # Prepare user message with MANDATORY MCP usage
     batch_json = json.dumps(current_batch, ensure_ascii=False, indent=2)
-    target_label = state.get("target_label")
     target_hint = ""
     if target_label:
         target_hint = f"\nFocus strictly on {target_label} behaviors and discard unrelated findings.\n"
@@ -713,96 +1136,13 @@ Each vulnerability object MUST contain:
 - file paths and line numbers discovered via MCP tools
 - Concrete POC using actual API endpoints
 """
-    
-    # Bind MCP tools to LLM
-    llm_with_tools = llm
-    tools = []
-    if mcp_client:
-        try:
-            print(f"\n{'='*80}")
-            print(f"🔧 MCP TOOLS BINDING")
-            print(f"{'='*80}")
-            
-            # Get MCP tools (already in async context, no need for asyncio.run)
-            all_tools = await mcp_client.get_tools()
-            print("🔍 Retrieved MCP tools:")
-            for i, tool in enumerate(all_tools, 1):
-                print(f"  {i}. {tool.name}")
-            
-            # ============================================================
-            # TOOL FILTERING: Control which tools the agent can use
-            # ============================================================
-            # Option 1: ALLOW_LIST - Only allow specific tools (recommended for focused analysis)
-            ALLOWED_TOOLS = [
-                "list_dir",
-                "read_file",
-                "search_for_pattern",
-                "find_symbol",
-                "get_symbols_overview",
-                # "get_file_structure",
-                # "search_symbol_references",
-                # "get_declaration_location",
-                # Add more tools as needed
-            ]
-            
-            # Option 2: BLOCK_LIST - Block specific tools (use this if you want most tools)
-            BLOCKED_TOOLS = [
-                # "expensive_tool",
-                # "slow_tool",
-                # Add tools you want to block
-                "activate_project",
-                "replace_symbol_body", "insert_after_symbol", "insert_before_symbol", "write_memory", "read_memory", "list_memories", "delete_memory", "execute_shell_command", "switch_modes", "get_current_config", "check_onboarding_performed", "onboarding", "think_about_collected_information", "think_about_task_adherence", "think_about_whether_you_are_done", "prepare_for_new_conversation"
-            ]
-            # ['read_file', 'create_text_file', 'list_dir', 'find_file', 'replace_regex', 'search_for_pattern', 'get_symbols_overview', 'find_symbol', 'find_referencing_symbols', 'replace_symbol_body', 'insert_after_symbol', 'insert_before_symbol', 'write_memory', 'read_memory', 'list_memories', 'delete_memory', 'execute_shell_command', 'activate_project', 'switch_modes', 'get_current_config', 'check_onboarding_performed', 'onboarding', 'think_about_collected_information', 'think_about_task_adherence', 'think_about_whether_you_are_done', 'prepare_for_new_conversation']
-            # Apply filtering
-            # Uncomment ONE of the following:
-            
-            # Use ALLOW_LIST (recommended - only specified tools allowed)
-            # tools = [tool for tool in all_tools if tool.name in ALLOWED_TOOLS]
-            
-            # Use BLOCK_LIST (allows all except blocked ones)
-            tools = [tool for tool in all_tools if tool.name not in BLOCKED_TOOLS]
-            
-            # No filtering (use all tools)
-            # tools = all_tools
-            
-        #     if tools:
-        #         llm_with_tools = llm.bind_tools(tools)
-        #         print(f"✅ Successfully bound {len(tools)} MCP tools to LLM")
-        #         print(f"   (Filtered from {len(all_tools)} total available tools)")
-        #         print(f"\nAllowed tools:")
-        #         for i, tool in enumerate(tools, 1):
-        #             print(f"  {i}. {tool.name}")
-                
-        #         if len(all_tools) > len(tools):
-        #             blocked = [t.name for t in all_tools if t not in tools]
-        #             print(f"\n🚫 Blocked tools ({len(blocked)}):")
-        #             for tool_name in blocked[:5]:
-        #                 print(f"  • {tool_name}")
-        #             # if len(blocked) > 5:
-        #                 # print(f"  ... and {len(blocked) - 5} more")
-        #     else:
-        #         print(f"⚠️  No MCP tools available after filtering")
-        #     print(f"{'='*80}\n")
-        except Exception as e:
-            print(f"\n{'='*80}")
-            print(f"❌ MCP TOOLS BINDING FAILED")
-            print(f"{'='*80}")
-            print(f"Error: {e}")
-            print(f"Error type: {type(e).__name__}")
-            import traceback
-            print(f"\nFull traceback:")
-            traceback.print_exc()
-            print(f"{'='*80}\n")
-            tools = []
-            # Continue without MCP tools
 
     # Invoke LLM with rate limiting using ReAct Agent
     result_text = ""
     try:
         # Use provided provider (no guessing!)
         rate_limiter = get_rate_limiter(provider)
-        
+
         print(f"\n{'='*80}")
         print(f"🤖 CREATING REACT AGENT")
         print(f"{'='*80}")
@@ -814,24 +1154,18 @@ Each vulnerability object MUST contain:
         print(f"\nUser message preview (first 500 chars):")
         print(user_message[:500])
         print(f"{'='*80}\n")
-        
+
         # Create ReAct Agent - it handles tool calling loop automatically
-        # IMPORTANT: Use state_modifier to replace long system prompt with short instruction
-        from langgraph.prebuilt.chat_agent_executor import create_react_agent
-        
-        # Short system instruction with CLEAR stopping condition AND DETAILED SCHEMA
-        # Note: Using format() instead of f-string to avoid nested quote issues
+        # Compiled once per llm + tool set and reused across batches and workers
+        agent = _get_react_agent(llm, tools)
 
-        
-        agent = create_react_agent(llm, tools)
-        
-        print(f"✅ ReAct Agent created")
+        print(f"✅ ReAct Agent ready")
         print(f"   - Model: {llm.model_name if hasattr(llm, 'model_name') else 'Unknown'}")
         print(f"   - Tools: {len(tools)}")
         print(f"   - Recursion limit: 25 iterations\n")
-        
-        previous_history = state.get('agent_message_history', [])
 
+
+        system_prompt_message = _system_prompt_message(short_instruction, provider)
         history_messages: List[BaseMessage] = []
         if isinstance(previous_history, list):
             for msg in previous_history:
@@ -855,16 +1189,16 @@ Each vulnerability object MUST contain:
 
         if history_messages:
             print(f"\nReusing {len(history_messages)} summary messages from previous batches")
-            input_messages: List[BaseMessage] = [SystemMessage(content=short_instruction)]
+            input_messages: List[BaseMessage] = [system_prompt_message]
             input_messages.extend(history_messages)
             input_messages.append(HumanMessage(content=user_message))
         else:
             # First batch or no usable history - start fresh
             input_messages = [
-                SystemMessage(content=short_instruction),
+                system_prompt_message,
                 HumanMessage(content=user_message)
             ]
-        
+
         def estimate_message_tokens(messages) -> int:
             total_chars = 0
             for msg in messages:
@@ -882,21 +1216,21 @@ Each vulnerability object MUST contain:
                     if hasattr(msg, "tool_calls") and getattr(msg, "tool_calls"):
                         total_chars += len(str(msg.tool_calls))
             return total_chars // 4
-        
+
         max_prompt_tokens = max(512, ANALYSIS_CONTEXT_WINDOW - ANALYSIS_RESPONSE_TOKEN_RESERVE)
         prompt_tokens = estimate_message_tokens(input_messages)
-        
+
         if prompt_tokens > max_prompt_tokens and len(history_messages) > 1:
             print(
                 f"\nPrompt estimate {prompt_tokens} exceeds budget {max_prompt_tokens}. "
                 "Trimming history to the most recent summary message."
             )
             history_messages = history_messages[-1:]
-            input_messages = [SystemMessage(content=short_instruction)]
+            input_messages = [system_prompt_message]
             input_messages.extend(history_messages)
             input_messages.append(HumanMessage(content=user_message))
             prompt_tokens = estimate_message_tokens(input_messages)
-        
+
         if prompt_tokens > max_prompt_tokens:
             print(
                 f"\nPrompt still over budget ({prompt_tokens} > {max_prompt_tokens}). Using minimal prompt."
@@ -904,14 +1238,14 @@ Each vulnerability object MUST contain:
             if input_messages:
                 system_message = input_messages[0]
                 if not isinstance(system_message, SystemMessage):
-                    system_message = SystemMessage(content=short_instruction)
+                    system_message = system_prompt_message
                 keep_count = min(5, max(0, len(input_messages) - 1))
                 keep = input_messages[-keep_count:] if keep_count else []
                 input_messages = [system_message] + keep
                 prompt_tokens = estimate_message_tokens(input_messages)
-        
+
         estimated_tokens = prompt_tokens + ANALYSIS_RESPONSE_TOKEN_RESERVE
-        
+
         print(f"\n⏱️  Rate Limiter Stats ({provider.upper()}):")
         stats = rate_limiter.get_stats()
         print(f"   RPM: {stats['rpm']['current']}/{stats['rpm']['limit']}")
@@ -921,21 +1255,21 @@ Each vulnerability object MUST contain:
         print(f"   Response reserve: {ANALYSIS_RESPONSE_TOKEN_RESERVE}")
         print(f"   Context window limit: {ANALYSIS_CONTEXT_WINDOW}")
         print(f"   Estimated total tokens: {estimated_tokens}")
-        
+
         # Acquire rate limit permission now that message payload is finalized
         await rate_limiter.acquire(estimated_tokens=estimated_tokens)
-        
+
         if logger:
             model_name = llm.model_name if hasattr(llm, 'model_name') else 'Unknown'
             logger.log_llm_request(model_name, input_messages, len(tools))
-        
+
         print(f"   -> Sending {len(input_messages)} messages to agent")
-        
+
         # Invoke agent with increased recursion limit and error handling
         print(f"\n⚙️  Agent Configuration:")
         print(f"   Recursion Limit: {AGENT_RECURSION_LIMIT} (set via AGENT_RECURSION_LIMIT in .env)")
         print(f"   Max Tool Calls: {AGENT_MAX_TOOL_CALLS} (set via AGENT_MAX_TOOL_CALLS in .env)")
-        
+
         try:
             agent_result = await agent.ainvoke(
                 {"messages": input_messages},
@@ -951,47 +1285,38 @@ Each vulnerability object MUST contain:
                 print(f"   2. Tools are returning truncated results")
                 print(f"   3. Agent is stuck in a loop calling the same tools")
                 print(f"\n   💡 Returning empty result for this batch to continue...")
-                
+
                 # Return empty result to allow workflow to continue
-                return Command(
-                    update={
-                        "analyzed_batch": [],
-                        "processed_count": processed_count + len(current_batch),
-                        "current_stage": "analyzed",
-                        "messages": state.get('messages', []) + [
-                            f"Batch skipped due to recursion limit: {str(e)}"
-                        ]
-                    }
-                )
+                return _chunk_outcome([], f"Batch skipped due to recursion limit: {str(e)}")
             else:
                 raise  # Re-raise other errors
-        
+
         # Extract final response from agent result
         final_messages = agent_result.get("messages", [])
         if not final_messages:
             raise ValueError("Agent returned no messages")
-        
+
         # ============================================================================
         # 🔍 DEBUG: Print and log ALL intermediate messages
         # ============================================================================
         print(f"\n{'='*80}")
         print(f"🔍 REACT AGENT MESSAGE HISTORY ({len(final_messages)} messages)")
         print(f"{'='*80}\n")
-        
+
         tool_call_count = 0
         invalid_tool_calls_all = []
         for idx, msg in enumerate(final_messages, 1):
             msg_type = type(msg).__name__
-            
+
             # System/Human messages
             if msg_type in ['SystemMessage', 'HumanMessage']:
                 role = 'System' if msg_type == 'SystemMessage' else 'Human'
                 content_preview = msg.content[:200] if hasattr(msg, 'content') else str(msg)[:200]
-                
+
                 print(f"Message #{idx} [{role}]:")
                 print(f"  Length: {len(msg.content) if hasattr(msg, 'content') else len(str(msg))} chars")
                 print(f"  Preview: {content_preview}...")
-                
+
                 # Log to file (use proper signature)
                 # if logger:
                 #     logger.log_llm_request(
@@ -999,7 +1324,7 @@ Each vulnerability object MUST contain:
                 #         messages=[{"role": role.lower(), "content": msg.content if hasattr(msg, 'content') else str(msg)}],
                 #         tools_count=0
                 #     )
-            
+
             # AI messages (with or without tool calls)
             elif msg_type == 'AIMessage':
                 has_tool_calls = hasattr(msg, 'tool_calls') and msg.tool_calls
@@ -1020,50 +1345,50 @@ Each vulnerability object MUST contain:
                     print(f"\nMessage #{idx} [AI - Tool Calls]:")
                     print(f"  Content length: {content_length} chars")
                     print(f"  Tool calls: {len(msg.tool_calls)}")
-                    
+
                     for i, tool_call in enumerate(msg.tool_calls, 1):
                         tool_name = tool_call.get('name', 'Unknown')
                         tool_args = tool_call.get('args', {})
                         tool_id = tool_call.get('id', 'Unknown')
-                        
+
                         tool_call_count += 1
-                        
+
                         print(f"\n  🔧 Tool Call #{i}:")
                         print(f"     Name: {tool_name}")
                         print(f"     ID: {tool_id}")
                         print(f"     Args: {json.dumps(tool_args, indent=6, ensure_ascii=False)}")
-                        
+
                         # Log MCP request
                         if logger:
                             logger.log_mcp_request(tool_name, tool_args)
-                        
+
                         print(f"\n  {'='*76}")
-                    
+
                     # Log AI response with tool calls
                     if logger:
                         logger.log_llm_response(msg.content if hasattr(msg, 'content') else "", full_response=msg)
-                
+
                 else:
                     # Regular AI response without tool calls
                     content_preview = (msg.content[:500] if hasattr(msg, 'content') else str(msg)[:500])
-                    
+
                     print(f"\nMessage #{idx} [AI - Response]:")
                     print(f"  Length: {content_length} chars")
                     print(f"  Preview: {content_preview}")
                     if content_length > 500:
                         print(f"  ... (truncated, total {content_length} chars)")
-                    
+
                     # Log AI response
                     if logger:
                         logger.log_llm_response(msg.content if hasattr(msg, 'content') else str(msg), full_response=msg)
-            
+
             # Tool messages (tool execution results)
             elif msg_type == 'ToolMessage':
                 tool_name = msg.name if hasattr(msg, 'name') else 'Unknown'
                 tool_id = msg.tool_call_id if hasattr(msg, 'tool_call_id') else 'Unknown'
                 content_length = len(msg.content) if hasattr(msg, 'content') else len(str(msg))
                 content_preview = (msg.content[:300] if hasattr(msg, 'content') else str(msg)[:300])
-                
+
                 print(f"\nMessage #{idx} [Tool Result]:")
                 print(f"  Tool: {tool_name}")
                 print(f"  Call ID: {tool_id}")
@@ -1071,21 +1396,21 @@ Each vulnerability object MUST contain:
                 print(f"  Preview: {content_preview}")
                 if content_length > 300:
                     print(f"  ... (truncated, total {content_length} chars)")
-                
+
                 # Log tool response (use proper signature)
                 if logger:
                     logger.log_mcp_response(
                         tool_name=tool_name,
                         output_data=msg.content if hasattr(msg, 'content') else str(msg)
                     )
-            
+
             else:
                 # Unknown message type
                 print(f"\nMessage #{idx} [Unknown: {msg_type}]:")
                 print(f"  Content: {str(msg)[:200]}...")
-            
+
             print()  # Blank line between messages
-        
+
         print(f"{'='*80}\n")
         if invalid_tool_calls_all:
             last_msg = final_messages[-1]
@@ -1132,20 +1457,14 @@ Each vulnerability object MUST contain:
                 print(f"    New total messages: {len(final_messages)}")
                 print(f"{'='*80}\n")
 
-        
+
         # Get the last AI message as final response
         final_response = final_messages[-1]
         if hasattr(final_response, "tool_calls") and final_response.tool_calls:
             pending_msg = "LLM output ended with pending tool calls and no final response"
             print(f"   ⚠️  {pending_msg}")
-            return Command(
-                update={
-                    "analyzed_batch": [],
-                    "current_stage": "analyzed",
-                    "messages": state.get('messages', []) + [pending_msg]
-                }
-            )
-        
+            return _chunk_outcome([], pending_msg)
+
         result_text = final_response.content if hasattr(final_response, 'content') else str(final_response)
 
         mcp_tool_count = sum(
@@ -1155,7 +1474,7 @@ Each vulnerability object MUST contain:
         )
         mcp_used = mcp_tool_count > 0 or bool(invalid_tool_calls_all)
 
-                
+
         print(f"\n{'='*80}")
         print(f"✅ REACT AGENT COMPLETED")
         print(f"{'='*80}")
@@ -1167,7 +1486,7 @@ Each vulnerability object MUST contain:
         if len(result_text) > 1000:
             print(f"... (truncated, total {len(result_text)} chars)")
         print(f"{'='*80}\n")
-        
+
         if not mcp_used:
             print(f"\n{'='*80}")
             print(f"⚠️  WARNING: AGENT DID NOT USE ANY MCP TOOLS!")
@@ -1188,7 +1507,7 @@ Each vulnerability object MUST contain:
             print(f"Analysis should be based on actual code evidence.")
             print(f"Confidence level: HIGH")
             print(f"{'='*80}\n")
-        
+
         # Store metrics for later analysis
         analysis_metadata = {
             "mcp_used": mcp_used,
@@ -1198,7 +1517,7 @@ Each vulnerability object MUST contain:
             "batch_size": len(current_batch),
             "total_messages": len(final_messages)
         }
-        
+
         # Pre-process response text before JSON parsing
         # 1. Remove <think>...</think> tags if present
         if "</think>" in result_text:
@@ -1208,37 +1527,27 @@ Each vulnerability object MUST contain:
             if think_end != -1:
                 result_text = result_text[think_end + len("</think>"):]
                 print(f"   ✅ Removed thinking section, remaining: {len(result_text)} chars")
-        
+
         # 2. Strip whitespace
         result_text = result_text.strip()
-        
+
         if not result_text:
             warn_msg = "LLM returned empty response (no content) despite completion"
             print(f"   ⚠️  {warn_msg}")
 
-            failed_elements = state.get("failed_elements", [])
-            failed_elements.extend(current_batch)
+            return _chunk_outcome([], warn_msg)
 
-            return Command(
-                update={
-                    "analyzed_batch": [],
-                    "failed_elements": failed_elements,
-                    "current_stage": "analyzed",
-                    "messages": state.get('messages', []) + [warn_msg]
-                }
-            )
-        
         # 3. Extract JSON from markdown code blocks
         if "```json" in result_text:
             result_text = result_text.split("```json")[1].split("```")[0].strip()
         elif "```" in result_text:
             result_text = result_text.split("```")[1].split("```")[0].strip()
-        
+
         print(f"\n📋 Final text for JSON parsing ({len(result_text)} chars):")
         print(f"   First 200 chars: {result_text[:200]}")
         if len(result_text) > 200:
             print(f"   Last 200 chars: ...{result_text[-200:]}")
-        
+
         # Parse JSON response
         try:
             analyzed_batch = json.loads(result_text)
@@ -1250,7 +1559,7 @@ Each vulnerability object MUST contain:
             except Exception as repair_exc:
                 print(f"   ❌ JSON repair also failed: {repair_exc}")
                 analyzed_batch = []
-        
+
         # If LLM returned empty array, warn but continue
         if not analyzed_batch:
             print(f"   ⚠️  LLM returned empty analysis (0 vulnerabilities)")
@@ -1267,7 +1576,7 @@ Each vulnerability object MUST contain:
                 analyzed_batch = [analyzed_batch]
         elif not isinstance(analyzed_batch, list):
             analyzed_batch = [analyzed_batch]
-        
+
         # Ensure every vulnerability includes a code_fix_patch field (LLM should supply it)
         enriched_batch: List[Dict[str, Any]] = []
         for vuln in analyzed_batch:
@@ -1286,39 +1595,21 @@ Each vulnerability object MUST contain:
 
         analyzed_batch = enriched_batch
 
-        # Update all_analyzed list
-        all_analyzed = state.get('all_analyzed', [])
-        all_analyzed.extend(analyzed_batch)
-        
-        summary_history = _coerce_system_history(state.get('agent_message_history', []))
         summary_message = _build_history_summary_message(analyzed_batch, tool_call_count)
-        if summary_message:
-            summary_history.append(summary_message)
-            if len(summary_history) > 5:
-                summary_history = summary_history[-5:]
+        return _chunk_outcome(analyzed_batch, summary=summary_message)
 
-        return Command(
-            update={
-                "analyzed_batch": analyzed_batch,
-                "all_analyzed": all_analyzed,
-                "processed_count": processed_count + len(current_batch),
-                "current_stage": "analyzed",
-                "agent_message_history": summary_history
-            }
-        )
-    
     except json.JSONDecodeError as e:
         error_msg = f"Failed to parse LLM response as JSON: {e}"
         print(f"\n{'='*80}")
         print(f"   ❌ {error_msg}")
         print(f"{'='*80}")
-        
+
         if 'result_text' in locals():
             print(f"\n📄 FULL RESPONSE TEXT ({len(result_text)} chars):")
             print(f"{'='*80}")
             print(result_text)
             print(f"{'='*80}\n")
-            
+
             # Log to file for debugging (logger is always defined at this point)
             if logger:  # Should always be True since logger = get_logger() above
                 logger._write_log({
@@ -1330,7 +1621,7 @@ Each vulnerability object MUST contain:
                 })
         else:
             print(f"   ⚠️  result_text variable not available (response might be empty)")
-            
+
             if logger:
                 logger._write_log({
                     "type": "JSON_PARSE_ERROR",
@@ -1338,30 +1629,21 @@ Each vulnerability object MUST contain:
                     "error": str(e),
                     "note": "result_text not available in locals"
                 })
-        
-        return Command(
-            update={
-                "analyzed_batch": [],
-                "processed_count": processed_count + len(current_batch),
-                "current_stage": "analyzed",
-                "messages": state.get('messages', []) + [
-                    f"Failed to parse batch: {str(e)}"
-                ]
-            }
-        )
-    
+
+        return _chunk_outcome([], f"Failed to parse batch: {str(e)}")
+
 
     except Exception as e:
         print(f"   ❌ Analysis error: {e}")
         print(f"   Error type: {type(e).__name__}")
-        
+
         # ✅ Print full traceback
         import traceback
         print("\n📍 FULL ERROR TRACEBACK:")
         print("="*80)
         traceback.print_exc()
         print("="*80)
-        
+
         # ✅ Print local variables if available
         import sys
         exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -1372,7 +1654,7 @@ Each vulnerability object MUST contain:
             for var_name, var_value in list(frame.f_locals.items())[:10]:  # First 10 vars
                 print(f"  {var_name}: {type(var_value).__name__} = {str(var_value)[:100]}...")
             print("="*80)
-        
+
         # ✅ Log to file
         if logger:
             logger.log_error(
@@ -1380,31 +1662,230 @@ Each vulnerability object MUST contain:
                 error=e,
                 traceback_str=traceback.format_exc()
             )
-        
-        failed_elements = state.get('failed_elements', [])
-        if current_batch:
-            failed_elements = list(failed_elements) + current_batch
-            print(f"   ⚠️  Added {len(current_batch)} items to failed queue due to error (total failed: {len(failed_elements)})")
 
+        print(f"   ⚠️  {len(current_batch)} items will be queued for retry due to error")
+        return _chunk_outcome([], f"Analysis error: {str(e)}")
+
+
+async def analyze_batch(state: AnalysisState, llm, mcp_client, provider: str = "unknown") -> Command:
+    """
+    Perform deep vulnerability analysis for current batch using LLM + MCP
+
+    The batch may hold several chunks (see prepare_batch); they are analyzed
+    concurrently, at most `max_concurrency` at a time.
+
+    Args:
+        state: Current state
+        llm: Language model instance
+        mcp_client: MCP client for tools
+        provider: LLM provider (google/groq/openai)
+    """
+    current_batch = state.get('current_batch', [])
+
+    if not current_batch:
         return Command(
             update={
                 "analyzed_batch": [],
-                "processed_count": processed_count + len(current_batch),
-                "current_stage": "analyzed",
-                "failed_elements": failed_elements,
-                "messages": state.get('messages', []) + [
-                    f"Analysis error: {str(e)}"
-                ]
+                "failed_batch": [],
+                "current_stage": "analyzed"
             }
         )
 
+    processed_count = state.get('processed_count', 0)
+    total_elements = state.get('total_elements', 0)
+    chunks = state.get('current_chunks') or [current_batch]
 
-def save_results(state: AnalysisState) -> Command:
+    print(f"\n🔬 Analyzing batch ({len(current_batch)} elements in {len(chunks)} chunk(s))...")
+    print(f"   Progress: {processed_count}/{total_elements} ({processed_count / total_elements * 100:.1f}%)")
+    max_tool_calls = AGENT_MAX_TOOL_CALLS
+
+    short_instruction = _build_system_prompt(state, max_tool_calls)
+    tools = await _get_analysis_tools(mcp_client)
+    previous_history = state.get('agent_message_history', [])
+    target_label = state.get("target_label")
+
+    # LLM + MCP calls are I/O bound: overlap chunks up to the configured concurrency.
+    # Each chunk is a multi-turn ReAct run with tool calls between LLM turns, so it
+    # cannot be folded into one llm.abatch / provider batch request; abatch would only
+    # add the same max_concurrency gather on top of the per-chunk rate limiting below.
+    semaphore = asyncio.Semaphore(max(1, int(state.get('max_concurrency', 1) or 1)))
+
+    async def run_one(chunk: List[Dict[str, Any]]) -> Dict[str, Any]:
+        async with semaphore:
+            return await _analyze_chunk(
+                chunk, llm, tools, provider, short_instruction, target_label, previous_history
+            )
+
+    # An error escaping one chunk fails that chunk only; its siblings keep their results
+    outcomes = await asyncio.gather(*(run_one(chunk) for chunk in chunks), return_exceptions=True)
+
+    analyzed_batch: List[Dict[str, Any]] = []
+    failed_batch: List[Dict[str, Any]] = []
+    messages: List[str] = []
+    summary_history = _coerce_system_history(previous_history)
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, asyncio.CancelledError):
+            raise outcome
+        if isinstance(outcome, BaseException):
+            print(f"   ⚠️  {len(chunk)} items will be queued for retry due to error: {outcome}")
+            outcome = _chunk_outcome([], f"Analysis error: {outcome}")
+        messages.extend(outcome["messages"])
+        if outcome["analyzed"]:
+            analyzed_batch.extend(outcome["analyzed"])
+        else:
+            failed_batch.extend(chunk)
+        if outcome["summary"] is not None:
+            summary_history.append(outcome["summary"])
+    if len(summary_history) > 5:
+        summary_history = summary_history[-5:]
+
+    update: Dict[str, Any] = {
+        "analyzed_batch": analyzed_batch,
+        "failed_batch": failed_batch,
+        "processed_count": processed_count + len(current_batch),
+        "current_stage": "analyzed",
+        "agent_message_history": summary_history,
+    }
+    if analyzed_batch:
+        # Results themselves go to disk in save_results; state only keeps running counts
+        severity_counts = dict(state.get('severity_counts') or {})
+        cwe_counts = dict(state.get('cwe_counts') or {})
+        for vuln in analyzed_batch:
+            if not isinstance(vuln, dict):
+                print(f"   ⚠️  Skipping non-dict analysis result: {vuln!r}")
+                continue
+            severity = vuln.get('severity', 'Unknown')
+            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+            cwe = vuln.get('cwe', 'Unknown')
+            cwe_counts[cwe] = cwe_counts.get(cwe, 0) + 1
+        update["analyzed_total"] = state.get('analyzed_total', 0) + len(analyzed_batch)
+        update["severity_counts"] = severity_counts
+        update["cwe_counts"] = cwe_counts
+    if messages:
+        update["messages"] = state.get('messages', []) + messages
+    return Command(update=update)
+
+
+
+# run_id -> last queued batch write of that run; each write waits for the previous one
+_PENDING_WRITES: Dict[str, asyncio.Task] = {}
+
+
+def _queue_batch_write(run_id: str, write: Awaitable[None]) -> None:
+    previous = _PENDING_WRITES.get(run_id)
+
+    async def chained():
+        if previous is not None:
+            await asyncio.wait([previous])
+        await write
+
+    _PENDING_WRITES[run_id] = asyncio.get_running_loop().create_task(chained())
+
+
+async def flush_pending_writes(run_id: str) -> None:
+    """Wait for the queued result writes of a run"""
+    task = _PENDING_WRITES.pop(run_id, None)
+    if task is not None:
+        await asyncio.wait([task])
+
+
+# Process-wide writer: (loop, queue of (output_file, latest_file, batch, done future), task)
+_BATCH_WRITER: Optional[tuple] = None
+
+
+def _write_batch_files(jobs: List[tuple]) -> None:
+    """Write the queued batches of all workers in one pass"""
+    appends: Dict[Path, List[Dict[str, Any]]] = {}
+    for output_file, latest_file, annotated_batch, _ in jobs:
+        # Save timestamped file with ONLY current batch (not cumulative)
+        with _lock_for(output_file):
+            with open(output_file, 'wb') as f:
+                _write_json_array(f, annotated_batch)
+        appends.setdefault(latest_file, []).extend(annotated_batch)
+
+    # Append to the cumulative results: O(batch) instead of rewriting all results,
+    # one append per file for every batch queued since the last pass
+    for latest_file, results in appends.items():
+        with _lock_for(latest_file):
+            _append_pending_results(latest_file, results)
+
+
+async def _run_batch_writer(queue: asyncio.Queue) -> None:
+    while True:
+        jobs = [await queue.get()]
+        while not queue.empty():
+            jobs.append(queue.get_nowait())
+        try:
+            await asyncio.to_thread(_write_batch_files, jobs)
+        except Exception as e:  # pylint: disable=broad-except
+            for *_, done in jobs:
+                if not done.done():
+                    done.set_exception(e)
+        else:
+            for *_, done in jobs:
+                if not done.done():
+                    done.set_result(None)
+
+
+async def _write_batch_files_async(output_file: Path, latest_file: Path, annotated_batch: List[Dict[str, Any]]) -> None:
+    """
+    Hand a batch to the single writer task and wait until it is on disk
+
+    All workers (and categories) of the process funnel their result files through
+    one consumer instead of each locking the shared files from its own thread.
+    """
+    global _BATCH_WRITER
+    loop = asyncio.get_running_loop()
+    if _BATCH_WRITER is None or _BATCH_WRITER[0] is not loop or _BATCH_WRITER[2].done():
+        queue: asyncio.Queue = asyncio.Queue()
+        _BATCH_WRITER = (loop, queue, loop.create_task(_run_batch_writer(queue)))
+    done = loop.create_future()
+    _BATCH_WRITER[1].put_nowait((output_file, latest_file, annotated_batch, done))
+    await done
+
+
+async def _write_batch_results(
+    project_title: str,
+    output_file: Path,
+    latest_file: Path,
+    annotated_batch: List[Dict[str, Any]],
+    update_data: List[Dict[str, Any]],
+) -> None:
+    try:
+        await _write_batch_files_async(output_file, latest_file, annotated_batch)
+        print(f"   ✅ Saved to {output_file}")
+        print(f"   ✅ Appended to {_pending_results_file(latest_file)}")
+    except Exception as e:
+        print(f"   ⚠️ Failed to save results to {output_file}: {e}")
+
+    if not update_data:
+        return
+    print(f"\n📤 Updating backend database with {len(update_data)} analysis results...")
+    try:
+        from ...utils.api_client import batch_update_vulnerabilities
+        result = await batch_update_vulnerabilities(project_title, update_data)
+
+        if "error" in result:
+            print(f"   ⚠️ Backend update error: {result['error']}")
+        else:
+            print(f"   ✅ Backend updated successfully")
+    except Exception as e:
+        print(f"   ⚠️ Failed to update backend: {e}")
+        # Continue even if backend update fails - local files are saved
+
+
+async def save_results(state: AnalysisState) -> Command:
     """
     Save analysis results to file and update backend database
+
+    The state updates (analyzed/failed keys) are applied right away; the writes
+    themselves run in the background, in batch order, and are awaited by
+    check_completion before the worker finishes.
     """
     analyzed_batch = state.get('analyzed_batch', [])
     current_batch = state.get('current_batch', [])
+    # Elements of chunks that produced no results (retried later)
+    failed_batch = state.get('failed_batch', [])
 
     # Track items based on success/failure
     analyzed_keys = state.get('analyzed_keys', set())
@@ -1422,11 +1903,13 @@ def save_results(state: AnalysisState) -> Command:
         if not (result.get("vulnerability_title") == "NO" and result.get("cwe") == "NO")
     ]
 
-    if not original_results:
+    if failed_batch or not original_results:
         # Analysis failed - add to failed_elements for later retry
+        newly_failed = failed_batch if original_results else current_batch
+        failed_elements.extend(newly_failed)
+        print(f"   📍 Added {len(newly_failed)} failed items to retry queue (total failed: {len(failed_elements)})")
+    if not original_results:
         print("   ⏭️  No analysis results to save (likely JSON parsing error)")
-        failed_elements.extend(current_batch)
-        print(f"   📍 Added {len(current_batch)} failed items to retry queue (total failed: {len(failed_elements)})")
         return Command(
             update={
                 "failed_elements": failed_elements,
@@ -1434,9 +1917,15 @@ def save_results(state: AnalysisState) -> Command:
             }
         )
 
-    # Success case - add to analyzed_keys
+    # Success case - add the elements of answered chunks to analyzed_keys
+    failed_keys = {make_elem_key(vuln, target_label) for vuln in failed_batch}
+    succeeded_batch = []
+    new_keys = set()
     for vuln in current_batch:
-        analyzed_keys.add(make_elem_key(vuln, target_label))
+        key = make_elem_key(vuln, target_label)
+        if key not in failed_keys:
+            succeeded_batch.append(vuln)
+            new_keys.add(key)
 
     print(
         f"\n💾 Processing {len(original_results)} analysis responses "
@@ -1453,20 +1942,10 @@ def save_results(state: AnalysisState) -> Command:
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file = output_dir / f"{project_title}_{timestamp}_analysis.json"
 
-    # Also create/update a "latest" file without timestamp
+    # Also create/update a "latest" file without timestamp; batches are appended to its
+    # .jsonl companion and folded into it when the worker completes
     latest_file = output_dir / f"{project_title}_latest.json"
 
-    # Load existing results if any from latest file
-    existing_results = []
-    if latest_file.exists():
-        try:
-            with FILE_IO_LOCK:
-                with open(latest_file, 'r', encoding='utf-8') as f:
-                    existing_results = json.load(f)  # ✅ 정석
-        except Exception as e:
-            print(f"   ⚠️ Failed to load existing latest file: {e}")
-            existing_results = []
-
     annotated_batch = []
     for analysis_result in analyzed_batch:
         annotated = dict(analysis_result)
@@ -1474,37 +1953,10 @@ def save_results(state: AnalysisState) -> Command:
             annotated["analysis_target_label"] = target_label
         annotated_batch.append(annotated)
 
-    if annotated_batch:
-        # Append new results to cumulative file
-        existing_results.extend(annotated_batch)
-
-        # Save timestamped file with ONLY current batch (not cumulative)
-        with FILE_IO_LOCK:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(annotated_batch, f, ensure_ascii=False, indent=2)
-
-            # Save latest file with ALL results (cumulative)
-            with open(latest_file, 'w', encoding='utf-8') as f:
-                json.dump(existing_results, f, ensure_ascii=False, indent=2)
-
-        print(f"   ✅ Saved to {output_file}")
-        print(f"   ✅ Updated {latest_file}")
-    else:
-        print("   📨 No confirmed vulnerabilities to persist for this batch.")
-
-    # Update backend database
-    backend_message = ""
-    if not annotated_batch:
-        backend_message = "No confirmed vulnerabilities to update"
-    elif _is_json_classification_mode(state):
-        print("   ⚠️ Skipping backend update (JSON input mode)")
-        backend_message = "Skipped backend update in JSON mode"
-    else:
-        print(f"\n📤 Updating backend database with {len(analyzed_batch)} analysis results...")
-
-        # Combine original vulnerability data with analysis results
-        update_data = []
-        for orig_vuln, analysis_result in zip(current_batch, analyzed_batch):
+    # Combine original vulnerability data with analysis results for the backend
+    update_data = []
+    if annotated_batch and not _is_json_classification_mode(state):
+        for orig_vuln, analysis_result in zip(succeeded_batch, analyzed_batch):
             # Create update payload combining original data with analysis
             update_item = {
                 "file_path": orig_vuln.get("file_path"),
@@ -1515,25 +1967,28 @@ def save_results(state: AnalysisState) -> Command:
             }
             update_data.append(update_item)
 
-        try:
-            from ...utils.api_client import batch_update_vulnerabilities
-            result = asyncio.run(batch_update_vulnerabilities(project_title, update_data))
+    # Update backend database
+    backend_message = ""
+    if not annotated_batch:
+        print("   📨 No confirmed vulnerabilities to persist for this batch.")
+        backend_message = "No confirmed vulnerabilities to update"
+    elif not update_data:
+        print("   ⚠️ Skipping backend update (JSON input mode)")
+        backend_message = "Skipped backend update in JSON mode"
+    else:
+        backend_message = f"Queued backend update of {len(analyzed_batch)} results"
 
-            if "error" in result:
-                print(f"   ⚠️ Backend update error: {result['error']}")
-                backend_message = f"Backend update error: {result['error']}"
-            else:
-                print(f"   ✅ Backend updated successfully")
-                backend_message = f"Updated backend database with {len(analyzed_batch)} results"
-        except Exception as e:
-            print(f"   ⚠️ Failed to update backend: {e}")
-            backend_message = f"Backend update failed: {e}"
-            # Continue even if backend update fails - local files are saved
+    if annotated_batch:
+        # Files and backend are written in the background while the next batch is analyzed
+        _queue_batch_write(
+            state.get('run_id') or project_title,
+            _write_batch_results(project_title, output_file, latest_file, annotated_batch, update_data),
+        )
 
-    print(f"   📍 Tracked {len(current_batch)} successfully analyzed items (total tracked: {len(analyzed_keys)})")
+    print(f"   📍 Tracked {len(succeeded_batch)} successfully analyzed items (total tracked: {len(analyzed_keys | new_keys)})")
     message_list = []
     if annotated_batch:
-        message_list.append(f"Saved {len(analyzed_batch)} results to {output_file}")
+        message_list.append(f"Saving {len(analyzed_batch)} results to {output_file}")
     if dismissed_results:
         message_list.append(f"Marked {len(dismissed_results)} items as non-vulnerable")
     if backend_message:
@@ -1541,7 +1996,9 @@ def save_results(state: AnalysisState) -> Command:
 
     return Command(
         update={
-            "analyzed_keys": analyzed_keys,
+            # Merged into the state's set by its union reducer
+            "analyzed_keys": new_keys,
+            "failed_elements": failed_elements,
             "current_stage": "saved",
             "messages": state.get('messages', []) + message_list
         }
@@ -1550,7 +2007,7 @@ def save_results(state: AnalysisState) -> Command:
 
 
 
-def check_completion(state: AnalysisState) -> Command:
+async def check_completion(state: AnalysisState) -> Command:
     """
     Check if all elements have been analyzed
     """
@@ -1565,45 +2022,51 @@ def check_completion(state: AnalysisState) -> Command:
     failed_elements = state.get('failed_elements', [])
     processed_count = state.get('processed_count', 0)
     total_elements = state.get('total_elements', 0)
-    all_analyzed = state.get('all_analyzed', [])
+    analyzed_total = state.get('analyzed_total', 0)
     failed_retry_count = state.get('failed_retry_count', 0)
     max_failed_retries = MAX_FAILED_RETRIES
     target_label = state.get('target_label')
     
-    print(f"\n🔍 CHECK_COMPLETION DEBUG:")
-    print(f"   - classified_elements total: {len(classified_elements)}")
-    print(f"   - successfully analyzed: {len(analyzed_keys)}")
-    print(f"   - failed (will retry): {len(failed_elements)}")
-    print(f"   - processed_count: {processed_count}/{total_elements}")
-    print(f"   - all_analyzed count: {len(all_analyzed)}")
+    log.debug(
+        "check_completion: classified=%d analyzed=%d failed=%d processed_count=%d/%d results=%d",
+        len(classified_elements), len(analyzed_keys), len(failed_elements),
+        processed_count, total_elements, analyzed_total,
+    )
     
     # Check if we still have unanalyzed elements
     # IMPORTANT: Normalize line_num to string for key comparison!
     failed_keys = {make_elem_key(elem, target_label) for elem in failed_elements}
 
     
-    unanalyzed_count = len([
-        elem for elem in classified_elements
-        if make_elem_key(elem, target_label) not in analyzed_keys
-        and make_elem_key(elem, target_label) not in failed_keys
-    ])
+    unanalyzed_count = sum(
+        1 for key in _classified_keys(state)
+        if key not in analyzed_keys and key not in failed_keys
+    )
         
     if unanalyzed_count == 0 and failed_elements and failed_retry_count < max_failed_retries:
         retry_attempt = failed_retry_count + 1
-        print(
-            f"[DEBUG] Retrying failed elements: current failed_retry_count={failed_retry_count}, "
-            f"next_attempt={retry_attempt}, max={max_failed_retries}, state_id={id(state)}"
+        log.debug(
+            "Retrying failed elements: failed_retry_count=%d next_attempt=%d max=%d",
+            failed_retry_count, retry_attempt, max_failed_retries,
         )
         retry_msg = (
-            f"Retrying {len(failed_elements)} failed elements "
+            f"Retrying {len(failed_elements)} failed elements one at a time "
             f"(attempt {retry_attempt}/{max_failed_retries})"
         )
         print(f"\n🔁 {retry_msg}")
+
+        # Exponential backoff with jitter: failures are mostly rate limits and
+        # transient API errors, and workers should not retry in lockstep
+        delay = FAILED_RETRY_BACKOFF * 2 ** failed_retry_count * random.uniform(0.5, 1.5)
+        if delay > 0:
+            print(f"   ⏳ Waiting {delay:.1f}s before retrying")
+            await asyncio.sleep(delay)
         
         retry_elements = [elem for elem in failed_elements]
         return Command(
             update={
                 "classified_elements": retry_elements,
+                "element_keys": [make_elem_key(elem, target_label) for elem in retry_elements],
                 "failed_elements": [],
                 "current_batch": [],
                 "processed_count": len(analyzed_keys),
@@ -1613,9 +2076,9 @@ def check_completion(state: AnalysisState) -> Command:
             }
         )
     else:
-        print(
-            f"[DEBUG] No retry triggered: failed_retry_count={failed_retry_count}, max={max_failed_retries}, "
-            f"failed_elements={len(failed_elements)}, unanalyzed_count={unanalyzed_count}"
+        log.debug(
+            "No retry triggered: failed_retry_count=%d max=%d failed_elements=%d unanalyzed_count=%d",
+            failed_retry_count, max_failed_retries, len(failed_elements), unanalyzed_count,
         )
     
     if unanalyzed_count > 0:
@@ -1632,43 +2095,38 @@ def check_completion(state: AnalysisState) -> Command:
         print(f"   Successfully analyzed: {len(analyzed_keys)}/{total_elements}")
         print(f"   Failed (need retry): {len(failed_elements)}")
         
-        # Save failed elements to file for later retry
+        project_title = state.get('project_title', 'unknown')
+        output_dir = Path("analysis_results")
+        output_dir.mkdir(exist_ok=True)
+        latest_file = output_dir / f"{project_title}_latest.json"
+
+        # Elements that failed every retry: one file per run (categories and workers
+        # finish concurrently), loadable as a classification file for a later run
         if failed_elements:
-            
-            project_title = state.get('project_title', 'unknown')
-            output_dir = Path("analysis_results")
-            output_dir.mkdir(exist_ok=True)
-            
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            failed_file = output_dir / f"{project_title}_{timestamp}_failed.json"
-            
-            with FILE_IO_LOCK:
-                with open(failed_file, 'w', encoding='utf-8') as f:
-                    json.dump(failed_elements, f, ensure_ascii=False, indent=2)
+            label = "".join(ch if ch.isalnum() else "_" for ch in (state.get('target_label') or 'all'))
+            run_tag = f"{label}_w{int(state.get('worker_id', 0) or 0) + 1}"
+            failed_file = output_dir / f"{project_title}_{timestamp}_{run_tag}_failed.json"
+            await asyncio.to_thread(_write_failed_elements, failed_file, failed_elements)
             
             print(f"\n⚠️  Failed elements saved to: {failed_file}")
-            print(f"   You can retry these later by running analysis again with this file")
+            print(
+                f"   You can retry these later with: --mode analysis "
+                f"--input-seed-source json --input-seed-file {failed_file}"
+            )
         
         # Print summary statistics
-        project_title = state.get('project_title', 'unknown')
-        output_dir = Path("analysis_results")
-        output_dir.mkdir(exist_ok=True)
-        latest_file = output_dir / f"{project_title}_latest.json"
+        await flush_pending_writes(state.get('run_id') or project_title)
+        await asyncio.to_thread(_compact_latest_results, latest_file)
 
-        if all_analyzed:
+        if analyzed_total:
             print(f"\n" + "="*80)
             print("📊 Analysis Summary")
             print("="*80)
-            print(f"Total vulnerabilities analyzed: {len(all_analyzed)}")
+            print(f"Total vulnerabilities analyzed: {analyzed_total}")
             
             # Count by severity
-            severity_counts = {}
-            for vuln in all_analyzed:
-                if not isinstance(vuln, dict):
-                    print(f"   ⚠️  Skipping non-dict entry in all_analyzed: {vuln!r}")
-                    continue
-                severity = vuln.get('severity', 'Unknown')
-                severity_counts[severity] = severity_counts.get(severity, 0) + 1
+            severity_counts = state.get('severity_counts') or {}
             
             print(f"\nBy Severity:")
             for severity in ['Critical', 'High', 'Medium', 'Low']:
@@ -1676,12 +2134,7 @@ def check_completion(state: AnalysisState) -> Command:
                     print(f"  {severity}: {severity_counts[severity]}")
             
             # Count by CWE
-            cwe_counts = {}
-            for vuln in all_analyzed:
-                if not isinstance(vuln, dict):
-                    continue
-                cwe = vuln.get('cwe', 'Unknown')
-                cwe_counts[cwe] = cwe_counts.get(cwe, 0) + 1
+            cwe_counts = state.get('cwe_counts') or {}
             
             print(f"\nTop CWEs:")
             sorted_cwes = sorted(cwe_counts.items(), key=lambda x: x[1], reverse=True)
@@ -1693,7 +2146,7 @@ def check_completion(state: AnalysisState) -> Command:
             print(f"  {latest_file.absolute()}")
             print("="*80)
         else:
-            latest_file = _write_empty_result_files(project_title)
+            latest_file = await asyncio.to_thread(_write_empty_result_files, project_title)
             print(f"\n📁 Results saved to:")
             print(f"  {latest_file.absolute()}")
             print("="*80)
@@ -1702,4 +2155,46 @@ def check_completion(state: AnalysisState) -> Command:
             update={
                 "current_stage": "completed"
             }
-        )   
\ No newline at end of file
+        )   
+
+
+async def run_all_batches(state: AnalysisState, llm, mcp_client, provider: str = "unknown") -> Dict[str, Any]:
+    """
+    Analyze every batch of the run inside one graph node
+
+    Runs prepare_batch -> analyze_batch -> save_results -> check_completion until
+    check_completion stops asking for more, applying each step's update to a local
+    state instead of dispatching (and tracing) four graph nodes per batch.
+
+    Args:
+        state: State after fetch_classified
+        llm: Language model instance
+        mcp_client: MCP client for tools
+        provider: LLM provider (google/groq/openai)
+
+    Returns:
+        Combined state update of all batches
+    """
+    current: Dict[str, Any] = dict(state)
+    changes: Dict[str, Any] = {}
+    # Run-local copy, grown in place instead of rebuilt for every batch
+    analyzed_keys = set(current.get("analyzed_keys") or set())
+    current["analyzed_keys"] = analyzed_keys
+
+    def apply(command: Command) -> None:
+        for key, value in (command.update or {}).items():
+            if key == "analyzed_keys":
+                # Same union the state's reducer applies between graph nodes
+                analyzed_keys.update(value)
+                value = analyzed_keys
+            current[key] = value
+            changes[key] = value
+
+    while True:
+        apply(prepare_batch(current))
+        apply(await analyze_batch(current, llm, mcp_client, provider))
+        apply(await save_results(current))
+        apply(await check_completion(current))
+        if current.get("current_stage") != "processing":
+            return changes
+
@@ -1,5 +1,5 @@
 """Discovery Agent module"""
-from .graph import build_discovery_graph
+from .graph import build_discovery_graph, get_discovery_graph
 from .agent import DiscoveryAgent
 
-__all__ = ["build_discovery_graph", "DiscoveryAgent"]
+__all__ = ["build_discovery_graph", "get_discovery_graph", "DiscoveryAgent"]
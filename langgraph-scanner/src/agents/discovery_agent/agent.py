@@ -4,9 +4,10 @@ Discovery Agent - Main agent class
 import json
 import uuid
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, Callable, Iterator, List, Optional
 import asyncio
-from .graph import build_discovery_graph
+import ijson
+from .graph import get_discovery_graph
 from ...models import DiscoveryState
 from ...config import DISCOVERY_MAX_WORKERS, DISCOVERY_WORKER_MAX_RETRIES, DISCOVERY_RECURSION_LIMIT
 from ...utils import fetch_unseen_vulnerabilities
@@ -51,6 +52,32 @@ class DiscoveryAgent:
             raise ValueError(f"Seed data must be a list, got {type(payload).__name__}")
         return payload
 
+    def _load_seed_payload_filtered(
+        self,
+        seed_path: Path,
+        predicate: Callable[[Any], bool],
+    ) -> Iterator[Any]:
+        """
+        Stream seed elements from disk, yielding only those matching predicate.
+
+        Accepts the same layouts as _load_seed_payload (a top-level list or an
+        object with an "elements" list) without materializing the whole payload.
+        """
+        if not seed_path.exists():
+            raise FileNotFoundError(f"Seed file not found: {seed_path}")
+        with seed_path.open("rb") as handle:
+            head = handle.read(64).lstrip()
+            handle.seek(0)
+            if head.startswith(b"["):
+                prefix = "item"
+            elif head.startswith(b"{"):
+                prefix = "elements.item"
+            else:
+                raise ValueError(f"Seed data must be a list or an object with 'elements': {seed_path}")
+            for elem in ijson.items(handle, prefix, use_float=True):
+                if predicate(elem):
+                    yield elem
+
     def _ensure_local_seed_file(self, project_title: str) -> str:
         if self.seed_source != "json":
             return ""
@@ -81,9 +108,13 @@ class DiscoveryAgent:
         elements: list[Any],
         worker_count: int | None = None,
         callbacks: list | None = None,
+        output_queue: asyncio.Queue | None = None,
     ) -> dict:
         """
         Classify provided elements in parallel. Fetch/update are handled by caller.
+
+        If output_queue is given, each classified batch is also put on it (merged
+        over its seed entry) as soon as a worker produces it.
         """
         workers = max(1, worker_count or DISCOVERY_MAX_WORKERS)
 
@@ -111,15 +142,44 @@ class DiscoveryAgent:
                 break
             slices.append(unseen_elements[start:end])
 
-        # Build classify-only graph
-        classify_graph = build_discovery_graph(
+        # Classify-only graph, compiled once and shared by every run
+        classify_graph = get_discovery_graph(
             self.llm, self.mcp_client, self.provider, include_fetch=False, include_update=False
         )
 
         def make_key(entry: dict[str, Any]):
             return (entry.get("file_path"), str(entry.get("line_num")))
 
+        async def stream_worker(state: DiscoveryState, invoke_config: dict, payload: list[Any]) -> dict:
+            originals = {make_key(entry): entry for entry in payload}
+            result: dict = {}
+            async for mode, chunk in classify_graph.astream(
+                state, config=invoke_config, stream_mode=["updates", "values"]
+            ):
+                if mode == "values":
+                    result = chunk
+                    continue
+                if not isinstance(chunk, dict):
+                    continue
+                update = chunk.get("classify_batch") or {}
+                ready = [
+                    {**originals.get(make_key(entry), {}), **entry}
+                    for entry in update.get("classified_batch") or []
+                    if entry.get("vulnerability_types")
+                ]
+                if ready:
+                    await output_queue.put(ready)
+            return result
+
         async def run_worker(idx: int, payload: list[Any]):
+            # Each attempt gets its own thread on the shared graph; drop it once read
+            thread_id = f"discovery::{project_title}::worker-{idx}::{uuid.uuid4().hex}"
+            try:
+                return await classify_worker(idx, payload, thread_id)
+            finally:
+                await classify_graph.checkpointer.adelete_thread(thread_id)
+
+        async def classify_worker(idx: int, payload: list[Any], thread_id: str):
             state: DiscoveryState = {
                 "project_title": project_title,
                 "unseen_elements": payload,
@@ -133,14 +193,17 @@ class DiscoveryAgent:
             }
             
             invoke_config = {
-                "configurable": {"thread_id": f"discovery::{project_title}::worker-{idx}"},
+                "configurable": {"thread_id": thread_id},
                 "recursion_limit": DISCOVERY_RECURSION_LIMIT  # Increase limit to prevent early exit
             }
             if callbacks:
                 invoke_config["callbacks"] = callbacks
 
             try:
-                result = await classify_graph.ainvoke(state, config=invoke_config)
+                if output_queue is None:
+                    result = await classify_graph.ainvoke(state, config=invoke_config)
+                else:
+                    result = await stream_worker(state, invoke_config, payload)
             except Exception as exc:
                 print(f"⚠️ Worker {idx} encountered error: {exc}")
                 # Try to recover partial state from checkpoint
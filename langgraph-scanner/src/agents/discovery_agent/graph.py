@@ -7,6 +7,11 @@ from langgraph.checkpoint.memory import MemorySaver
 from ...models import DiscoveryState
 from . import nodes
 
+# Compiled graphs keyed by (id(llm), id(mcp_client), provider, include_fetch, include_update).
+# The llm and client are kept in the value so their ids cannot be recycled while the
+# entry is alive.
+_GRAPH_CACHE: dict = {}
+
 
 def build_discovery_graph(
     llm,
@@ -80,3 +85,31 @@ def build_discovery_graph(
     
     memory = checkpointer or MemorySaver()
     return workflow.compile(checkpointer=memory)
+
+
+def get_discovery_graph(
+    llm,
+    mcp_client,
+    provider: str = "unknown",
+    include_fetch: bool = True,
+    include_update: bool = True,
+):
+    """
+    Return the compiled Discovery Agent graph for this llm/mcp_client/provider and
+    node set, building it on first use and sharing it with every later caller.
+
+    Callers must use a fresh thread_id per run and delete it afterwards, since the
+    graph's MemorySaver is shared too.
+
+    Returns:
+        Compiled StateGraph
+    """
+    key = (id(llm), id(mcp_client), provider, include_fetch, include_update)
+    cached = _GRAPH_CACHE.get(key)
+    if cached is None:
+        graph = build_discovery_graph(
+            llm, mcp_client, provider, include_fetch=include_fetch, include_update=include_update
+        )
+        cached = (llm, mcp_client, graph)
+        _GRAPH_CACHE[key] = cached
+    return cached[2]
@@ -18,6 +18,7 @@ from ...utils import (
 )
 from ...config import MAX_ANSWER_CHARS, DISCOVERY_TOOL_ONLY_RETRY_LIMIT
 from ...utils.rate_limiter import get_rate_limiter
+from ...utils.mcp_tools import get_mcp_tools
 from ...utils.logging import get_logger
 
 import json_repair
@@ -552,11 +553,12 @@ Your response must be ONLY the raw JSON array. Do not wrap it in markdown code b
             print("\n" + "=" * 80)
             print("[MCP] Binding available tools")
             print("=" * 80)
-            all_tools = await mcp_client.get_tools()
+            all_tools = await get_mcp_tools(mcp_client)
             print("[MCP] Available tools:")
-            for index, tool in enumerate(all_tools, 1):
-                tool_name = getattr(tool, "name", f"tool_{index}")
-                print(f"  {index}. {tool_name}")
+            print("\n".join(
+                f"  {index}. {getattr(tool, 'name', f'tool_{index}')}"
+                for index, tool in enumerate(all_tools, 1)
+            ))
 
             # ALLOWED_TOOLS = [
             #     "list_dir",
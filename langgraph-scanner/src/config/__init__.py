@@ -5,7 +5,10 @@ from .settings import (
     API_BASE_URL,
     MCP_SERVER_URL,
     MAX_CHUNK_SIZE,
+    ANALYSIS_CHUNK_TOKEN_BUDGET,
     MAX_ANSWER_CHARS,
+    MCP_TOOL_CACHE_SIZE,
+    MCP_SESSION_POOL_SIZE,
     AGENT_RECURSION_LIMIT,
     AGENT_MAX_TOOL_CALLS,
     ANALYSIS_CONTEXT_WINDOW,
@@ -15,12 +18,15 @@ from .settings import (
     DISCOVERY_WORKER_MAX_RETRIES,
     DISCOVERY_RECURSION_LIMIT,
     MAX_FAILED_RETRIES,
+    FAILED_RETRY_BACKOFF,
     DEFAULT_PROJECT_TITLE,
     DEFAULT_LLM_PROVIDER,
     DEFAULT_LLM_MODEL,
     ANALYSIS_WORKERS_DEFAULT,
     ANALYSIS_WORKER_OVERRIDES,
     ANALYSIS_WORKER_MAX_RETRIES,
+    ANALYSIS_MAX_CONCURRENT_AGENTS,
+    ANALYSIS_BATCH_CONCURRENCY,
 )
 from .vulnerabilities import (
     VULNERABILITY_TYPE_DEFINITIONS,
@@ -34,7 +40,10 @@ __all__ = [
     "API_BASE_URL",
     "MCP_SERVER_URL",
     "MAX_CHUNK_SIZE",
+    "ANALYSIS_CHUNK_TOKEN_BUDGET",
     "MAX_ANSWER_CHARS",
+    "MCP_TOOL_CACHE_SIZE",
+    "MCP_SESSION_POOL_SIZE",
     "AGENT_RECURSION_LIMIT",
     "AGENT_MAX_TOOL_CALLS",
     "ANALYSIS_CONTEXT_WINDOW",
@@ -44,12 +53,15 @@ __all__ = [
     "DISCOVERY_WORKER_MAX_RETRIES",
     "DISCOVERY_RECURSION_LIMIT",
     "MAX_FAILED_RETRIES",
+    "FAILED_RETRY_BACKOFF",
     "DEFAULT_PROJECT_TITLE",
     "DEFAULT_LLM_PROVIDER",
     "DEFAULT_LLM_MODEL",
     "ANALYSIS_WORKERS_DEFAULT",
     "ANALYSIS_WORKER_OVERRIDES",
     "ANALYSIS_WORKER_MAX_RETRIES",
+    "ANALYSIS_MAX_CONCURRENT_AGENTS",
+    "ANALYSIS_BATCH_CONCURRENCY",
     "VULNERABILITY_TYPE_DEFINITIONS",
     "DISCOVERY_VULNERABILITY_TYPES",
     "get_analysis_targets",
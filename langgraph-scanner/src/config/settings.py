@@ -2,6 +2,7 @@
 Configuration settings for Discovery-With-Seed project
 """
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
@@ -52,6 +53,7 @@ MCP_CONFIG = {
 LLMProvider = Literal["google", "groq", "openai", "azure", "anthropic", "compatible", "openrouter", "bedrock"]
 
 # LLM Configuration
+@lru_cache(maxsize=16)
 def get_llm(
     provider: str = "google",
     model_name: str | None = None,
@@ -68,7 +70,8 @@ def get_llm(
         max_tokens: Maximum tokens for response (default: 8192)
     
     Returns:
-        Configured LLM instance
+        Configured LLM instance (cached per argument set, so repeated calls share
+        one client and its connection pool)
     
     Supported Models:
     - Google: gemini-2.0-flash-exp, gemini-1.5-pro, gemini-1.5-flash
@@ -224,7 +227,10 @@ DEFAULT_LLM_MODEL = os.getenv("LLM_MODEL", None)  # Use provider default if not
 
 # Analysis Configuration
 MAX_CHUNK_SIZE = int(os.getenv("MAX_CHUNK_SIZE", "30000"))  # Maximum JSON string length per chunk (reduced for large prompts)
+ANALYSIS_CHUNK_TOKEN_BUDGET = int(os.getenv("ANALYSIS_CHUNK_TOKEN_BUDGET", "0"))  # Estimated tokens per analysis chunk (0 = use MAX_CHUNK_SIZE)
 MAX_ANSWER_CHARS = int(os.getenv("MAX_ANSWER_CHARS", "100000"))  # MCP tool max answer chars
+MCP_TOOL_CACHE_SIZE = int(os.getenv("MCP_TOOL_CACHE_SIZE", "512"))  # Cached read-only MCP tool results (0 = disabled)
+MCP_SESSION_POOL_SIZE = int(os.getenv("MCP_SESSION_POOL_SIZE", "0"))  # Long-lived MCP sessions per server shared by all workers (0 = new session per tool call)
 AGENT_RECURSION_LIMIT = int(os.getenv("AGENT_RECURSION_LIMIT", "50"))  # ReAct Agent recursion limit
 AGENT_MAX_TOOL_CALLS = int(os.getenv("AGENT_MAX_TOOL_CALLS", "10"))   # Max tool calls per batch
 ANALYSIS_CONTEXT_WINDOW = int(
@@ -234,10 +240,13 @@ ANALYSIS_CONTEXT_WINDOW = int(
 )
 ANALYSIS_RESPONSE_TOKEN_RESERVE = int(os.getenv("ANALYSIS_RESPONSE_TOKEN_RESERVE", "2000"))
 MAX_FAILED_RETRIES = int(os.getenv("MAX_FAILED_RETRIES", "0"))  # Max retries for failed batches (0 = no retry)
+FAILED_RETRY_BACKOFF = float(os.getenv("FAILED_RETRY_BACKOFF", "2"))  # Base delay (seconds) before a retry pass, doubled per attempt
 DISCOVERY_TOOL_ONLY_RETRY_LIMIT = int(os.getenv("DISCOVERY_TOOL_ONLY_RETRY_LIMIT", "10"))
 ANALYSIS_WORKERS_DEFAULT = int(os.getenv("ANALYSIS_WORKERS_DEFAULT", "1"))
 ANALYSIS_WORKER_OVERRIDES = os.getenv("ANALYSIS_WORKER_OVERRIDES", "")
 ANALYSIS_WORKER_MAX_RETRIES = int(os.getenv("ANALYSIS_WORKER_MAX_RETRIES", "0"))
+ANALYSIS_MAX_CONCURRENT_AGENTS = int(os.getenv("ANALYSIS_MAX_CONCURRENT_AGENTS", "0"))  # Max analysis workers running at once across all categories (0 = unlimited)
+ANALYSIS_BATCH_CONCURRENCY = int(os.getenv("ANALYSIS_BATCH_CONCURRENCY", "1"))  # Chunks each worker analyzes concurrently per batch
 
 # Discovery Configuration - Multi-worker settings
 # Discovery Configuration - Multi-worker settings
@@ -138,6 +138,7 @@ class AnalysisState(TypedDict, total=False):
     State for Analysis Agent workflow
     """
     project_title: str
+    run_id: str  # Unique per analyze() call; keys the run's background result writes
     classification_source: str
     classification_file: Optional[str]
     ignore_previous_versions: bool
@@ -147,13 +148,23 @@ class AnalysisState(TypedDict, total=False):
     target_is_general: bool
     worker_id: int
     worker_count: int
+    preloaded_elements: Optional[List[VulnerabilityElement]]  # Elements handed over by discovery (full workflow)
     classified_elements: List[VulnerabilityElement]
+    element_keys: List[tuple]  # make_elem_key of each classified element, same order
+    element_sizes: Dict[tuple, int]  # make_elem_key -> JSON length, measured once in fetch_classified
     total_elements: int
     processed_count: int
     current_batch: List[VulnerabilityElement]
+    current_chunks: List[List[VulnerabilityElement]]  # current_batch split into concurrently analyzed chunks
+    max_concurrency: int  # Max chunks analyzed at once per worker
+    token_budget: int  # Estimated tokens per chunk (0 = MAX_CHUNK_SIZE characters)
     analyzed_batch: List[DetailedVulnerability]
-    all_analyzed: List[DetailedVulnerability]
-    analyzed_keys: set  # Set of (file_path, line_num) tuples successfully analyzed
+    failed_batch: List[VulnerabilityElement]  # Elements of current_batch whose chunk produced no results
+    # Running totals over analyzed results; the results themselves are only on disk
+    analyzed_total: int
+    severity_counts: Dict[str, int]
+    cwe_counts: Dict[str, int]
+    analyzed_keys: Annotated[set, operator.or_]  # make_elem_key tuples successfully analyzed; updates are unioned in
     failed_elements: List[VulnerabilityElement]  # Elements that failed JSON parsing
     failed_retry_count: int  # Number of retries for failed items
     messages: List[str]
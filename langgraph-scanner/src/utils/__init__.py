@@ -6,12 +6,14 @@ from .api_client import (
 )
 from .chunking import (
     split_elements_into_chunks,
-    get_chunk_stats
+    get_chunk_stats,
+    measure_elements
 )
 __all__ = [
     "fetch_unseen_vulnerabilities",
     "batch_update_vulnerabilities",
     "fetch_classified_vulnerabilities",
     "split_elements_into_chunks",
-    "get_chunk_stats"
+    "get_chunk_stats",
+    "measure_elements"
 ]
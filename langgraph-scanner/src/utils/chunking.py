@@ -2,13 +2,16 @@
 Utility functions for chunking data
 """
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from ..config import MAX_CHUNK_SIZE
 
 
 def split_elements_into_chunks(
     elements: List[Dict[str, Any]], 
-    max_chars: int = MAX_CHUNK_SIZE
+    max_chars: int = MAX_CHUNK_SIZE,
+    max_tokens: Optional[int] = None,
+    interleave: bool = False,
+    lengths: Optional[List[int]] = None,
 ) -> List[List[Dict[str, Any]]]:
     """
     Split list of elements into chunks that fit within max_chars limit
@@ -18,6 +21,10 @@ def split_elements_into_chunks(
     Args:
         elements: List of elements to split
         max_chars: Maximum characters per chunk (default: 3000)
+        max_tokens: Estimated token budget per chunk; replaces max_chars when set
+        interleave: Alternate the largest and smallest remaining elements so each
+            chunk pairs a large element with small ones and chunk sizes even out
+        lengths: Precomputed JSON length per element (see measure_elements)
     
     Returns:
         List of element chunks
@@ -30,29 +37,41 @@ def split_elements_into_chunks(
     if not elements:
         return []
     
+    if max_tokens:
+        # Rough token estimate for mixed text/code: 1 token ~ 4 characters
+        limit_label = f"{max_tokens} tokens"
+        fits = lambda length: length // 4 <= max_tokens
+    else:
+        limit_label = f"{max_chars} chars"
+        fits = lambda length: length <= max_chars
+    
     chunks = []
     current_chunk = []
+    # Length of json.dumps(current_chunk) is "[" + ", ".join(items) + "]",
+    # so it is tracked incrementally instead of re-serializing the chunk per element
+    current_length = 2
     
-    for element in elements:
-        # Try adding element to current chunk
-        test_chunk = current_chunk + [element]
-        test_json = json.dumps(test_chunk, ensure_ascii=False)
-        
-        if len(test_json) <= max_chars:
-            # Fits in current chunk
-            current_chunk.append(element)
-        else:
+    if lengths is None:
+        lengths = measure_elements(elements)
+    sized = list(zip(lengths, elements))
+    if interleave:
+        sized = _interleave_by_size(sized)
+    
+    for element_length, element in sized:
+        if current_chunk and not fits(current_length + 2 + element_length):
             # Doesn't fit - save current chunk and start new one
-            if current_chunk:
-                chunks.append(current_chunk)
-            
-            # Start new chunk with this element
-            current_chunk = [element]
-            
-            # Sanity check: if single element exceeds max_chars, include it anyway
-            single_json = json.dumps([element], ensure_ascii=False)
-            if len(single_json) > max_chars:
-                print(f"⚠️  Warning: Single element exceeds {max_chars} chars ({len(single_json)} chars)")
+            chunks.append(current_chunk)
+            current_chunk = []
+            current_length = 2
+        
+        if current_chunk:
+            current_length += 2
+        current_length += element_length
+        current_chunk.append(element)
+        
+        # Sanity check: if single element exceeds the limit, include it anyway
+        if len(current_chunk) == 1 and not fits(current_length):
+            print(f"⚠️  Warning: Single element exceeds {limit_label} ({current_length} chars)")
     
     # Don't forget last chunk
     if current_chunk:
@@ -61,12 +80,40 @@ def split_elements_into_chunks(
     return chunks
 
 
-def get_chunk_stats(chunks: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+def measure_elements(elements: List[Dict[str, Any]]) -> List[int]:
+    """
+    JSON length of every element, measured in one pass
+
+    Elements are re-chunked on every batch; measuring them once up front keeps
+    each later split_elements_into_chunks call from serializing them again.
+    """
+    return [len(json.dumps(element, ensure_ascii=False)) for element in elements]
+
+
+def _interleave_by_size(sized: List[tuple]) -> List[tuple]:
+    """Order (length, element) pairs as largest, smallest, 2nd largest, 2nd smallest, ..."""
+    ordered = sorted(sized, key=lambda item: item[0])
+    result = []
+    low, high = 0, len(ordered) - 1
+    while low <= high:
+        result.append(ordered[high])
+        high -= 1
+        if low <= high:
+            result.append(ordered[low])
+            low += 1
+    return result
+
+
+def get_chunk_stats(
+    chunks: List[List[Dict[str, Any]]],
+    json_lengths: Optional[List[int]] = None,
+) -> Dict[str, Any]:
     """
     Get statistics about chunks
     
     Args:
         chunks: List of element chunks
+        json_lengths: Precomputed JSON length per chunk
     
     Returns:
         Dictionary with chunk statistics
@@ -84,7 +131,8 @@ def get_chunk_stats(chunks: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
         }
     
     chunk_sizes = [len(chunk) for chunk in chunks]
-    json_lengths = [len(json.dumps(chunk, ensure_ascii=False)) for chunk in chunks]
+    if json_lengths is None:
+        json_lengths = [len(json.dumps(chunk, ensure_ascii=False)) for chunk in chunks]
     
     return {
         "num_chunks": len(chunks),
@@ -0,0 +1,124 @@
+"""
+Pool of long-lived MCP sessions shared by all workers
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from langchain_core.tools import ToolException
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+
+class MCPSessionPool:
+    """
+    Fixed set of initialized sessions to one MCP server.
+
+    Tools obtained from MultiServerMCPClient.get_tools() open a new session (and
+    repeat the initialize handshake) for every call. The pool keeps `size` sessions
+    open for the whole run and hands them out to callers one at a time.
+
+    Each session is opened and closed by its own task, since the transport's
+    cancel scopes must be exited by the task that entered them. A session whose
+    call fails or is cancelled with anything but a ToolException is closed and
+    reopened instead of being handed out again.
+    """
+
+    def __init__(self, mcp_client, server_name: str, size: int):
+        self.mcp_client = mcp_client
+        self.server_name = server_name
+        self.size = size
+        # Idle sessions as (tool name -> session-bound tool, stop event); None means
+        # no session is left and none is being opened
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._stops: Set[asyncio.Event] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._live = 0
+        self._opening = 0
+        self._closing = False
+        # Names of the tools this server provides
+        self.tool_names: Set[str] = set()
+
+    async def start(self) -> int:
+        """
+        Open the sessions
+
+        Returns:
+            Number of sessions opened (0 means the pool is unusable)
+        """
+        ready = [self._open_session() for _ in range(self.size)]
+        results = await asyncio.gather(*ready, return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            print(f"⚠️  Could not open {len(errors)} MCP session(s) to {self.server_name}: {errors[0]}")
+        return self.size - len(errors)
+
+    def _open_session(self) -> asyncio.Future:
+        """Start a task holding one new session; the future resolves once it is idle"""
+        ready = asyncio.get_running_loop().create_future()
+        self._opening += 1
+        self._tasks.append(asyncio.create_task(self._hold_session(ready)))
+        return ready
+
+    async def _hold_session(self, ready: asyncio.Future) -> None:
+        stop = asyncio.Event()
+        self._stops.add(stop)
+        try:
+            async with self.mcp_client.session(self.server_name) as session:
+                tools = await load_mcp_tools(session)
+                self.tool_names.update(tool.name for tool in tools)
+                self._opening -= 1
+                self._live += 1
+                await self._idle.put(({tool.name: tool for tool in tools}, stop))
+                ready.set_result(True)
+                if not self._closing:
+                    await stop.wait()
+        except Exception as exc:  # pylint: disable=broad-except
+            if not ready.done():
+                self._opening -= 1
+                ready.set_exception(exc)
+                # Wake waiters when the last session could not be replaced
+                if self._live == 0 and self._opening == 0 and not self._closing:
+                    self._idle.put_nowait(None)
+        finally:
+            self._stops.discard(stop)
+
+    def _discard(self, entry: Tuple[Dict[str, Any], asyncio.Event]) -> None:
+        """Close a broken session and open a replacement"""
+        _, stop = entry
+        stop.set()
+        self._live -= 1
+        if self._closing:
+            return
+        replacement = self._open_session()
+        # The failure (if any) is reported by the next acquire, not here
+        replacement.add_done_callback(lambda future: future.cancelled() or future.exception())
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Dict[str, Any]]:
+        """Borrow one session's tools (name -> tool) until the block exits"""
+        entry: Optional[Tuple[Dict[str, Any], asyncio.Event]] = await self._idle.get()
+        if entry is None:
+            # Leave the marker for the next waiter
+            self._idle.put_nowait(None)
+            raise RuntimeError(f"No open MCP session to {self.server_name}")
+        broken = False
+        try:
+            yield entry[0]
+        except ToolException:
+            raise
+        except BaseException:
+            # Includes cancellation: the session may be left mid-request
+            broken = True
+            raise
+        finally:
+            if broken:
+                self._discard(entry)
+            else:
+                self._idle.put_nowait(entry)
+
+    async def close(self) -> None:
+        """Close every session"""
+        self._closing = True
+        for stop in list(self._stops):
+            stop.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,179 @@
+"""
+Cached MCP tool discovery, pooled sessions and read-only tool results
+"""
+import asyncio
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.tools import ToolException
+from ..config import MCP_TOOL_CACHE_SIZE, MCP_SESSION_POOL_SIZE
+from .mcp_pool import MCPSessionPool
+
+
+# id(mcp_client) -> (mcp_client, tools, tools_by_name)
+# The client is kept in the value so its id cannot be recycled while cached.
+_tools_cache: Dict[int, Tuple[Any, List[Any], Dict[str, Any]]] = {}
+_tools_lock: Optional[asyncio.Lock] = None
+# id(mcp_client) -> one session pool per configured server
+_session_pools: Dict[int, List[MCPSessionPool]] = {}
+
+# Source-browsing tools whose results only depend on their arguments. Many findings
+# point at the same files, so workers and batches repeat these calls verbatim.
+_CACHEABLE_TOOLS = frozenset({
+    "read_file",
+    "list_dir",
+    "find_file",
+    "search_for_pattern",
+    "find_symbol",
+    "find_referencing_symbols",
+    "get_symbols_overview",
+})
+# (tool name, canonical arguments) -> tool result, least recently used first
+_result_cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+
+
+def _get_lock() -> asyncio.Lock:
+    global _tools_lock
+    if _tools_lock is None:
+        _tools_lock = asyncio.Lock()
+    return _tools_lock
+
+
+def _is_cacheable(tool) -> bool:
+    if MCP_TOOL_CACHE_SIZE <= 0 or getattr(tool, "name", None) not in _CACHEABLE_TOOLS:
+        return False
+    # Honour the server's annotations: a tool not marked read-only is never cached
+    metadata = getattr(tool, "metadata", None) or {}
+    return metadata.get("readOnlyHint") is not False
+
+
+def _with_result_cache(tool):
+    """Return a copy of `tool` whose results are kept in the shared LRU cache."""
+    coroutine = getattr(tool, "coroutine", None)
+    if coroutine is None or not _is_cacheable(tool):
+        return tool
+
+    async def cached_call(**arguments):
+        key = (tool.name, json.dumps(arguments, sort_keys=True, default=str))
+        if key in _result_cache:
+            _result_cache.move_to_end(key)
+            return _result_cache[key]
+        # Errors raise (ToolException) and are therefore never cached
+        result = await coroutine(**arguments)
+        _result_cache[key] = result
+        if len(_result_cache) > MCP_TOOL_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+        return result
+
+    return tool.model_copy(update={"coroutine": cached_call})
+
+
+async def _start_session_pools(mcp_client) -> List[MCPSessionPool]:
+    pools = []
+    for server_name in getattr(mcp_client, "connections", None) or {}:
+        pool = MCPSessionPool(mcp_client, server_name, MCP_SESSION_POOL_SIZE)
+        opened = await pool.start()
+        if opened:
+            print(f"🔌 Opened {opened} pooled MCP session(s) to {server_name}")
+            pools.append(pool)
+        else:
+            await pool.close()
+    _session_pools[id(mcp_client)] = pools
+    return pools
+
+
+def _with_session_pool(tool, pools: List[MCPSessionPool]):
+    """Return a copy of `tool` that calls through a pooled session of its server."""
+    coroutine = getattr(tool, "coroutine", None)
+    pool = next((pool for pool in pools if tool.name in pool.tool_names), None)
+    if coroutine is None or pool is None:
+        return tool
+
+    async def pooled_call(**arguments):
+        try:
+            async with pool.acquire() as session_tools:
+                return await session_tools[tool.name].coroutine(**arguments)
+        except ToolException:
+            raise
+        except Exception as exc:  # pylint: disable=broad-except
+            # Broken pooled session: fall back to a one-off session for this call
+            print(f"⚠️  Pooled MCP call to {tool.name} failed ({exc}); retrying on a new session")
+            return await coroutine(**arguments)
+
+    return tool.model_copy(update={"coroutine": pooled_call})
+
+
+async def _load_tools(mcp_client) -> Tuple[List[Any], Dict[str, Any]]:
+    entry = _tools_cache.get(id(mcp_client))
+    if entry is not None:
+        return entry[1], entry[2]
+    async with _get_lock():
+        # Another caller may have populated the cache while we waited
+        entry = _tools_cache.get(id(mcp_client))
+        if entry is None:
+            tools = list(await mcp_client.get_tools())
+            if MCP_SESSION_POOL_SIZE > 0:
+                pools = await _start_session_pools(mcp_client)
+                tools = [_with_session_pool(tool, pools) for tool in tools]
+            tools = [_with_result_cache(tool) for tool in tools]
+            tools_by_name = {getattr(tool, "name", None): tool for tool in tools}
+            entry = (mcp_client, tools, tools_by_name)
+            _tools_cache[id(mcp_client)] = entry
+    return entry[1], entry[2]
+
+
+async def get_mcp_tools(mcp_client) -> List[Any]:
+    """
+    Get the MCP server's tools, fetching them only once per client
+
+    Args:
+        mcp_client: MCP client instance
+
+    Returns:
+        List of tools (shared; do not mutate)
+    """
+    tools, _ = await _load_tools(mcp_client)
+    return tools
+
+
+async def get_mcp_tools_by_name(mcp_client) -> Dict[str, Any]:
+    """
+    Get the MCP server's tools keyed by tool name, fetching them only once per client
+
+    Args:
+        mcp_client: MCP client instance
+
+    Returns:
+        Dict of tool name -> tool (shared; do not mutate)
+    """
+    _, tools_by_name = await _load_tools(mcp_client)
+    return tools_by_name
+
+
+def invalidate_mcp_tools(mcp_client=None) -> None:
+    """
+    Drop cached tools and tool results (e.g. after reconnecting to the MCP server)
+
+    Args:
+        mcp_client: Client whose tools to drop, or None to clear all
+    """
+    _result_cache.clear()
+    if mcp_client is None:
+        _tools_cache.clear()
+    else:
+        _tools_cache.pop(id(mcp_client), None)
+
+
+async def close_mcp_sessions(mcp_client=None) -> None:
+    """
+    Close pooled MCP sessions (see MCP_SESSION_POOL_SIZE)
+
+    Args:
+        mcp_client: Client whose sessions to close, or None to close all
+    """
+    if mcp_client is None:
+        pools = [pool for client_pools in _session_pools.values() for pool in client_pools]
+        _session_pools.clear()
+    else:
+        pools = _session_pools.pop(id(mcp_client), [])
+    await asyncio.gather(*(pool.close() for pool in pools))
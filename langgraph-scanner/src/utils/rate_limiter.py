@@ -4,10 +4,76 @@ Rate limiter for LLM API calls
 import os
 import time
 import asyncio
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple, Type
 from datetime import datetime, timedelta
 from collections import deque
 
+import httpx
+
+# Errors worth retrying: the request may succeed if repeated after a pause
+_TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (
+    asyncio.TimeoutError,
+    httpx.TimeoutException,
+    httpx.TransportError,
+)
+try:
+    import openai
+    _TRANSIENT_ERRORS += (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+except ImportError:
+    pass
+try:
+    import anthropic
+    _TRANSIENT_ERRORS += (
+        anthropic.RateLimitError,
+        anthropic.APITimeoutError,
+        anthropic.APIConnectionError,
+        anthropic.InternalServerError,
+    )
+except ImportError:
+    pass
+try:
+    import groq
+    _TRANSIENT_ERRORS += (
+        groq.RateLimitError,
+        groq.APITimeoutError,
+        groq.APIConnectionError,
+        groq.InternalServerError,
+    )
+except ImportError:
+    pass
+try:
+    from google.api_core import exceptions as google_exceptions
+    _TRANSIENT_ERRORS += (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServerError,
+        google_exceptions.DeadlineExceeded,
+    )
+except ImportError:
+    pass
+try:
+    from botocore import exceptions as botocore_exceptions
+    _TRANSIENT_ERRORS += (
+        botocore_exceptions.ConnectionError,
+        botocore_exceptions.ReadTimeoutError,
+    )
+except ImportError:
+    pass
+
+# Bedrock reports throttling as a ClientError carrying one of these codes
+_TRANSIENT_ERROR_CODES = frozenset({
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+    "InternalServerException",
+})
+
 
 class RateLimiter:
     """
@@ -225,3 +291,37 @@ def update_rate_limits(provider: str, rpm: Optional[int] = None, tpm: Optional[i
             print(f"✅ Updated {provider} TPM limit: {tpm}")
     else:
         _rate_limiters[provider] = RateLimiter(rpm=rpm, tpm=tpm, name=f"{provider.upper()} RateLimiter")
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    Check whether an error is transient (rate limit, timeout, connection, 5xx)
+
+    Args:
+        exc: Raised exception
+
+    Returns:
+        True if retrying the same call may succeed
+    """
+    if isinstance(exc, _TRANSIENT_ERRORS):
+        return True
+    status = _status_code(exc)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of a provider error whose type is not listed above, if it carries one"""
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        # botocore ClientError
+        if response.get("Error", {}).get("Code") in _TRANSIENT_ERROR_CODES:
+            return 429
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    else:
+        status = getattr(exc, "status_code", None)
+        if status is None:
+            status = getattr(response, "status_code", None)
+        if status is None:
+            # google-genai APIError
+            status = getattr(exc, "code", None)
+    return status if isinstance(status, int) else None